@@ -0,0 +1,93 @@
+"""Zero-shot classifier throughput on sec_10k_sentences.csv, for sizing nodes.
+
+Needs transformers plus torch or onnxruntime, and a local NLI checkpoint
+directory (nothing is downloaded), e.g. one saved with
+``AutoModelForSequenceClassification.save_pretrained`` or exported to ONNX
+with ``optimum-cli export onnx``. Small distilled checkpoints are fine.
+
+Run from the repository root:
+
+    python benchmarks/bench_classifier.py --model models/nli-distilroberta-base
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from swot.classifier import ZeroShotClassifier, available  # noqa: E402
+from swot.pipeline import candidate_labels  # noqa: E402
+
+
+def load_sentences(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [row["sentence"] for row in csv.DictReader(fh) if row.get("sentence")]
+
+
+def unbucketed(classifier, sentences, batch):
+    """Fixed-size batches in input order, one at a time: the plain pipeline loop."""
+    rows = len(classifier.labels)
+    out = []
+    for i in range(0, len(sentences), batch):
+        logits = classifier._run(sentences[i:i + batch])
+        out.append(logits.reshape(-1, rows))
+    return np.concatenate(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", required=True, help="local NLI checkpoint directory")
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--limit", type=int, default=512, help="sentences to classify")
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--workers", type=int, default=2, help="batches in flight")
+    parser.add_argument("--batch-tokens", type=int, default=8192)
+    parser.add_argument("--baseline-batch", type=int, default=8, help="sentences per unbucketed batch")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)[:args.limit]
+    print(f"{len(sentences)} sentences, {args.threads} threads; throughput in sentences/s")
+    print(f"{'backend':>8} {'int8':>5} {'load s':>7} {'unbucketed':>11} {'bucketed':>9} {'batches':>8} {'max |dp|':>9}")
+
+    for backend in args.backends.split(","):
+        if not available(backend):
+            print(f"{backend:>8}: not installed, skipped")
+            continue
+        for quantize in (False, True):
+            start = time.perf_counter()
+            try:
+                classifier = ZeroShotClassifier(args.model, candidate_labels, backend=backend, quantize=quantize,
+                                                batch_tokens=args.batch_tokens, threads=args.threads,
+                                                workers=args.workers)
+            except FileNotFoundError as e:
+                print(f"{backend:>8}: {e}")
+                break
+            load = time.perf_counter() - start
+            with classifier:
+                classifier.classify(sentences[:16])  # warm up
+                start = time.perf_counter()
+                baseline = unbucketed(classifier, sentences, args.baseline_batch)
+                base_rate = len(sentences) / (time.perf_counter() - start)
+
+                before = classifier.throughput()
+                probs = classifier.classify(sentences)
+                after = classifier.throughput()
+                rate = (after["sentences"] - before["sentences"]) / (after["seconds"] - before["seconds"])
+
+                # bucketing must not change the result beyond padding noise
+                exp = np.exp(baseline - baseline.max(axis=1, keepdims=True))
+                drift = np.abs(probs - exp / exp.sum(axis=1, keepdims=True)).max()
+                n_batches = len(classifier.batches(sentences))
+            print(f"{backend:>8} {str(quantize):>5} {load:>7.1f} {base_rate:>11.1f} {rate:>9.1f} "
+                  f"{n_batches:>8} {drift:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""EdgarDownloader against a local stand-in for EDGAR.
+
+Serves canned company_tickers.json, submissions JSON and SGML submissions
+from an in-process aiohttp server, optionally with per-request latency,
+random 429s and bodies cut off mid-transfer (which the downloader has to
+resume with a Range request). Reports throughput and checks that every
+submission lands in the portfolio directory and loads with datamule.
+
+Run from the repository root:
+
+    python benchmarks/bench_downloader.py --filings 40 --latency 0.05 --throttle 0.1 --truncate 0.2
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from swot.downloader import EdgarDownloader  # noqa: E402
+
+CIK = 320193
+
+SGML = """<SEC-DOCUMENT>{dashed}.txt : {date}
+<SEC-HEADER>{dashed}.hdr.sgml : {date}
+ACCESSION NUMBER:\t\t{dashed}
+CONFORMED SUBMISSION TYPE:\t10-K
+PUBLIC DOCUMENT COUNT:\t\t1
+FILED AS OF DATE:\t\t{date}
+FILER:
+\tCOMPANY DATA:\t
+\t\tCOMPANY CONFORMED NAME:\t\t\tApple Inc.
+\t\tCENTRAL INDEX KEY:\t\t\t{cik:010d}
+</SEC-HEADER>
+<DOCUMENT>
+<TYPE>10-K
+<SEQUENCE>1
+<FILENAME>annual-report.htm
+<DESCRIPTION>10-K
+<TEXT>
+<html><body>{body}</body></html>
+</TEXT>
+</DOCUMENT>
+</SEC-DOCUMENT>
+"""
+
+
+def make_filings(n, paragraphs, seed=0):
+    rng = random.Random(seed)
+    filings = {}
+    for i in range(n):
+        dashed = f"{CIK:010d}-{20 + i % 5:02d}-{i:06d}"
+        date = f"20{20 + i % 5:02d}{1 + i % 12:02d}{1 + i % 28:02d}"
+        body = "".join(
+            f"<p>Paragraph {j}: the Company faces competition and expects revenue growth of {rng.random():.4f}.</p>"
+            for j in range(paragraphs))
+        filings[dashed] = {
+            "date": f"{date[:4]}-{date[4:6]}-{date[6:]}",
+            "sgml": SGML.format(dashed=dashed, date=date, cik=CIK, body=body).encode(),
+        }
+    return filings
+
+
+def make_app(filings, latency=0.0, throttle=0.0, truncate=0.0, seed=0):
+    rng = random.Random(seed)
+    truncated = set()
+    counters = {"requests": 0, "throttled": 0, "truncated": 0, "ranged": 0}
+
+    async def gate():
+        counters["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if rng.random() < throttle:
+            counters["throttled"] += 1
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "0.05"})
+
+    async def tickers(request):
+        await gate()
+        return web.json_response({"0": {"cik_str": CIK, "ticker": "AAPL", "title": "Apple Inc."}})
+
+    async def submissions(request):
+        await gate()
+        names = sorted(filings)
+        return web.json_response({"cik": str(CIK), "filings": {"recent": {
+            "accessionNumber": names,
+            "filingDate": [filings[a]["date"] for a in names],
+            "form": ["10-K"] * len(names),
+        }, "files": []}})
+
+    async def archive(request):
+        await gate()
+        accession = request.match_info["accession"]
+        if accession not in filings:
+            raise web.HTTPNotFound()
+        data = filings[accession]["sgml"]
+        start = 0
+        if request.http_range.start is not None:
+            counters["ranged"] += 1
+            start = request.http_range.start
+            if start >= len(data):
+                raise web.HTTPRequestRangeNotSatisfiable()
+        status = 206 if start else 200
+        resp = web.StreamResponse(status=status, headers={"Content-Length": str(len(data) - start)})
+        if start:
+            resp.headers["Content-Range"] = f"bytes {start}-{len(data) - 1}/{len(data)}"
+        await resp.prepare(request)
+        if accession not in truncated and rng.random() < truncate:
+            # send half the body, then drop the connection
+            truncated.add(accession)
+            counters["truncated"] += 1
+            await resp.write(data[start:start + (len(data) - start) // 2])
+            request.transport.close()
+            return resp
+        await resp.write(data[start:])
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/files/company_tickers.json", tickers)
+    app.router.add_get("/submissions/{name}", submissions)
+    app.router.add_get("/Archives/edgar/data/{cik}/{accession}.txt", archive)
+    return app, counters
+
+
+async def bench(args, portfolio_dir):
+    filings = make_filings(args.filings, args.paragraphs)
+    app, counters = make_app(filings, args.latency, args.throttle, args.truncate)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+
+    results = []
+    try:
+        for label in ("cold", "warm"):
+            downloader = EdgarDownloader(
+                portfolio_dir, "bench bench@example.com", requests_per_second=args.rps,
+                max_connections=args.connections, backoff=0.05, www_base=base, data_base=base)
+            t0 = time.perf_counter()
+            summary = await downloader.run(tickers=["AAPL"], forms=["10-K"])
+            results.append((label, time.perf_counter() - t0, summary))
+    finally:
+        await runner.cleanup()
+    return filings, results, counters
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--filings", type=int, default=40)
+    ap.add_argument("--paragraphs", type=int, default=200, help="paragraphs per synthetic submission")
+    ap.add_argument("--rps", type=float, default=10, help="downloader rate limit (requests/s)")
+    ap.add_argument("--connections", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    ap.add_argument("--throttle", type=float, default=0.1, help="fraction of requests answered with 429")
+    ap.add_argument("--truncate", type=float, default=0.2, help="fraction of submissions cut off once")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        portfolio_dir = Path(tmp) / "sec_portfolio"
+        filings, results, counters = asyncio.run(bench(args, portfolio_dir))
+
+        print(f"{'run':>6} {'seconds':>8} {'filings/s':>10} {'downloaded':>11} {'skipped':>8} "
+              f"{'failed':>7} {'requests':>9} {'retries':>8} {'resumed':>8} {'MiB':>7}")
+        for label, secs, s in results:
+            st = s["stats"]
+            print(f"{label:>6} {secs:8.2f} {len(filings) / secs:10.1f} {len(s['downloaded']):11d} "
+                  f"{len(s['skipped']):8d} {len(s['failed']):7d} {st['requests']:9d} {st['retries']:8d} "
+                  f"{st['resumed']:8d} {st['bytes'] / 2**20:7.2f}")
+        print(f"server: {counters}")
+
+        tars = sorted(p.stem for p in portfolio_dir.glob("*.tar"))
+        expected = sorted(a.replace("-", "") for a in filings)
+        print(f"tars written: {len(tars)}/{len(expected)} {'OK' if tars == expected else 'MISMATCH'}")
+        print(f"partial files left: {len(list(portfolio_dir.glob('.*.part')))}")
+
+        try:
+            from datamule import Portfolio
+        except ImportError:
+            return
+        port = Portfolio(str(portfolio_dir))
+        port.MAX_WORKERS = max(port.MAX_WORKERS, 1)
+        docs = list(port.document_type("10-K"))
+        intact = sum(d.content == filings[f"{d.accession[:10]}-{d.accession[10:12]}-{d.accession[12:]}"]["sgml"]
+                     .split(b"<TEXT>\n", 1)[1].split(b"\n</TEXT>", 1)[0] for d in docs
+                     if len(str(d.accession)) == 18)
+        print(f"datamule loaded {len(docs)} 10-K document(s); {intact} byte-identical to the served text")
+
+
+if __name__ == "__main__":
+    main()
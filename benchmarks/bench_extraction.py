@@ -0,0 +1,103 @@
+"""Peak memory of streaming vs. list-building extraction on a deeply nested document.
+
+Run from the repository root:
+
+    python benchmarks/bench_extraction.py --depth 2000 --width 20
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from swot.pipeline import classify_sentences, iter_filing_texts, iter_sentences  # noqa: E402
+from swot.text import clean_text, split_sentences  # noqa: E402
+
+KEYWORDS = {
+    "Strength": ["strong", "leading", "advantage", "growth", "robust", "increase in", "strength"],
+    "Weakness": ["decline", "risk", "cost", "vulnerable", "loss", "decrease", "weak"],
+    "Opportunity": ["opportunit", "potential", "emerging", "expand", "growth opportunity", "could benefit"],
+    "Threat": ["competition", "regulation", "lawsuit", "uncertain", "disruptor", "threat", "risk of"]
+}
+
+
+def load_sentences(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [row["sentence"] for row in csv.DictReader(fh) if row.get("sentence")]
+
+
+def nested_document(sentences, depth, width, seed=0):
+    """datamule-style ``document`` dict: ``width`` sections, each a chain ``depth`` levels deep."""
+    rng = random.Random(seed)
+    parts = {}
+    for p in range(width):
+        node = {"text": " ".join(rng.sample(sentences, 4))}
+        for level in range(depth):
+            node = {"title": f"Section {p}.{level}", "contents": [rng.choice(sentences), node]}
+        parts[str(p)] = {"contents": node}
+    return parts
+
+
+def recursive_extract(contents):
+    """The original list-building recursive extractor."""
+    texts = []
+    if isinstance(contents, str):
+        texts.append(contents)
+    elif isinstance(contents, dict):
+        for k, v in contents.items():
+            texts.extend(recursive_extract(v))
+    elif isinstance(contents, list):
+        for item in contents:
+            texts.extend(recursive_extract(item))
+    return texts
+
+
+def list_pipeline(doc_content):
+    sentences = []
+    for part in doc_content.values():
+        for t in recursive_extract(part.get("contents", {})):
+            tclean = clean_text(t)
+            if len(tclean) >= 30:
+                sentences.extend((None, s, None) for s in split_sentences(tclean))
+    return classify_sentences(sentences, KEYWORDS)
+
+
+def streaming_pipeline(doc_content):
+    return classify_sentences(iter_sentences(iter_filing_texts(doc_content)), KEYWORDS)
+
+
+def measure(fn, doc_content):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn(doc_content)
+        outcome = f"{result['sentences']} sentences, {len(result['records'])} labelled"
+    except RecursionError:
+        outcome = "RecursionError"
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, outcome  # timings include tracemalloc overhead
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--depth", type=int, default=200, help="nesting levels per section")
+    parser.add_argument("--width", type=int, default=100, help="number of top-level parts")
+    args = parser.parse_args()
+
+    doc_content = nested_document(load_sentences(args.sentences), args.depth, args.width)
+    print(f"synthetic document: {args.width} parts x {args.depth} levels")
+    for name, fn in (("recursive lists", list_pipeline), ("streaming", streaming_pipeline)):
+        elapsed, peak, outcome = measure(fn, doc_content)
+        print(f"{name:>16}: {elapsed:7.2f}s  peak {peak / 2**20:8.1f} MiB  ({outcome})")
+
+
+if __name__ == "__main__":
+    main()
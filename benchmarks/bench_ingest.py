@@ -0,0 +1,117 @@
+"""Peak memory of streaming upload ingestion (swot.ingest) as files grow.
+
+Writes HTML filings and text-only PDFs of increasing size from the
+sentences in sec_10k_sentences.csv, with Items 1, 1A, 7 and 7A, and runs
+each through ``UploadedFiling.iter_fragments`` (read, tokenize, re-cut,
+section-tag, spool, read back) under tracemalloc. For HTML the whole-file
+approach, ``read_text`` and one ``feed``, is timed as a reference.
+
+Run from the repository root:
+
+    python benchmarks/bench_ingest.py --html-mib 8,32,128 --pdf-pages 100,400,1600
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_sentences  # noqa: E402
+from swot.ingest import UploadedFiling, _HtmlText, available_formats  # noqa: E402
+from swot.pdf import TextPdf  # noqa: E402
+
+ITEMS = ["1", "1A", "7", "7A"]
+
+
+def write_html(path, sentences, mib, seed=0):
+    rng = random.Random(seed)
+    target = mib * 2**20
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("<html><head><title>10-K</title></head><body>\n")
+        written, item = 0, 0
+        while written < target:
+            if written >= item * target / len(ITEMS) and item < len(ITEMS):
+                fh.write(f'<p style="font-weight:bold">Item {ITEMS[item]}. Heading</p>\n')
+                item += 1
+            para = " ".join(rng.sample(sentences, 5)).replace("&", "&amp;").replace("<", "&lt;")
+            line = f'<p style="margin:0;font-family:Times">{para}</p>\n'
+            fh.write(line)
+            written += len(line)
+        fh.write("</body></html>\n")
+
+
+def write_pdf(path, sentences, pages, seed=0):
+    rng = random.Random(seed)
+    with TextPdf(path) as pdf:
+        for i in range(pages):
+            if i % max(1, pages // len(ITEMS)) == 0 and i // max(1, pages // len(ITEMS)) < len(ITEMS):
+                pdf.text(f"Item {ITEMS[i // max(1, pages // len(ITEMS))]}. Heading", font="bold")
+            for _ in range(12):
+                pdf.text(" ".join(rng.sample(sentences, 2)))
+            pdf.new_page()
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def stream(path):
+    chars = 0
+    for fragment in UploadedFiling(path).iter_fragments():
+        if isinstance(fragment, list):
+            chars += len(fragment[2])
+    return chars
+
+
+def whole_html(path):
+    parser = _HtmlText()
+    parser.feed(Path(path).read_text(encoding="utf-8"))
+    parser.close()
+    return len(parser.drain())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--html-mib", default="8,32,128")
+    parser.add_argument("--pdf-pages", default="100,400,1600")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    print(f"{'input':>16} {'file MiB':>9} {'text MiB':>9} {'stream s':>9} {'stream peak MiB':>16} "
+          f"{'whole s':>8} {'whole peak MiB':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mib in (int(n) for n in args.html_mib.split(",")):
+            path = Path(tmp) / f"filing-{mib}.htm"
+            write_html(path, sentences, mib)
+            chars, t_stream, peak_stream = measure(lambda: stream(path))
+            _, t_whole, peak_whole = measure(lambda: whole_html(path))
+            print(f"{f'html {mib} MiB':>16} {path.stat().st_size / 2**20:>9.1f} {chars / 2**20:>9.1f} "
+                  f"{t_stream:>9.2f} {peak_stream:>16.1f} {t_whole:>8.2f} {peak_whole:>15.1f}")
+            path.unlink()
+        if "pdf" not in available_formats():
+            print("pypdf is not installed; skipping PDFs")
+            return
+        import pypdf  # noqa: F401  imported up front so the first PDF's peak does not count the import
+        for pages in (int(n) for n in args.pdf_pages.split(",")):
+            path = Path(tmp) / f"filing-{pages}.pdf"
+            write_pdf(path, sentences, pages)
+            chars, t_stream, peak_stream = measure(lambda: stream(path))
+            print(f"{f'pdf {pages} pages':>16} {path.stat().st_size / 2**20:>9.1f} {chars / 2**20:>9.1f} "
+                  f"{t_stream:>9.2f} {peak_stream:>16.1f} {'-':>8} {'-':>15}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Throughput of KeywordMatcher vs. the nested-loop weak_label as lexicons grow.
+
+Run from the repository root:
+
+    python benchmarks/bench_matcher.py
+"""
+import argparse
+import csv
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from swot.matcher import KeywordMatcher  # noqa: E402
+
+LABELS = ["Strength", "Weakness", "Opportunity", "Threat"]
+
+
+def load_sentences(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [row["sentence"] for row in csv.DictReader(fh) if row.get("sentence")]
+
+
+def synthetic_keywords(sentences, per_label, seed=0):
+    """Random 1-3 word phrases drawn from the corpus vocabulary."""
+    rng = random.Random(seed)
+    vocab = sorted(set(re.findall(r"[a-z]{3,}", " ".join(sentences).lower())))
+    keywords = {}
+    for label in LABELS:
+        phrases = set()
+        while len(phrases) < per_label:
+            phrases.add(" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 3))))
+        keywords[label] = sorted(phrases)
+    return keywords
+
+
+def naive_first_label(keywords, sentence):
+    s = sentence.lower()
+    for label, kws in keywords.items():
+        for kw in kws:
+            if kw in s:
+                return label
+    return None
+
+
+def naive_all_labels(keywords, sentence):
+    s = sentence.lower()
+    return [label for label, kws in keywords.items() if any(kw in s for kw in kws)]
+
+
+def timed(fn, sentences, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for s in sentences:
+            fn(s)
+        best = min(best, time.perf_counter() - start)
+    return len(sentences) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="keywords per label")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    print(f"{len(sentences)} sentences from {args.sentences}; throughput in sentences/s")
+    print(f"{'kw/label':>9} {'build s':>8} {'naive first':>12} {'naive all':>10} "
+          f"{'ac first':>9} {'ac match':>9} {'hits/sent':>9}")
+
+    for size in (int(x) for x in args.sizes.split(",")):
+        keywords = synthetic_keywords(sentences, size)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build = time.perf_counter() - start
+
+        # sanity: compatibility mode must agree with the original loop
+        for s in sentences:
+            assert matcher.first_label(s) == naive_first_label(keywords, s), s
+
+        naive_first = timed(lambda s: naive_first_label(keywords, s), sentences, args.repeat)
+        naive_all = timed(lambda s: naive_all_labels(keywords, s), sentences, args.repeat)
+        ac_first = timed(matcher.first_label, sentences, args.repeat)
+        ac_match = timed(matcher.match, sentences, args.repeat)
+        # match() cost grows with the number of hits reported, not with lexicon size
+        hits = sum(1 for s in sentences for _ in matcher.iter_matches(s)) / len(sentences)
+        print(f"{size:>9} {build:>8.3f} {naive_first:>12.0f} {naive_all:>10.0f} "
+              f"{ac_first:>9.0f} {ac_match:>9.0f} {hits:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Time and peak memory of every pipeline stage on synthetic 10-K filings, saved as JSON.
+
+Each stage runs separately on the output of the one before it, then whole
+filings go through ``process_filing`` end to end. Timings are the best of
+``--repeat`` runs; peak memory comes from one extra run under tracemalloc so
+its overhead does not skew the timings. Results are written to
+``benchmarks/results/pipeline-<commit>.json``; pass an earlier file to
+``--compare`` to see the change per stage (the exit status is 1 if any stage
+got slower than ``--tolerance``).
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --sizes 1000,10000 --depths 3,200
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-<old commit>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import FIXTURE, load_sentences, synthetic_document, synthetic_filings  # noqa: E402
+from swot.matcher import KeywordMatcher  # noqa: E402
+from swot.pipeline import build_report, extract_key_phrases, make_settings, process_filing  # noqa: E402
+from swot.segmenter import Segmenter  # noqa: E402
+from swot.text import clean_text, extract_text_from_contents, split_sentences  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+KEYWORDS = {
+    "Strength": ["strong", "leading", "advantage", "growth", "robust", "increase in", "strength"],
+    "Weakness": ["decline", "risk", "cost", "vulnerable", "loss", "decrease", "weak"],
+    "Opportunity": ["opportunit", "potential", "emerging", "expand", "growth opportunity", "could benefit"],
+    "Threat": ["competition", "regulation", "lawsuit", "uncertain", "disruptor", "threat", "risk of"]
+}
+LABELS = list(KEYWORDS)
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return sha, dirty
+
+
+# ---------------- stages ----------------
+# each takes the previous stage's output and returns (output, items processed)
+
+def stage_extract(document):
+    texts = []
+    for part in document.values():
+        if isinstance(part, dict):
+            texts.extend(extract_text_from_contents(part.get("contents", {})))
+    return texts, len(texts)
+
+
+def stage_clean(texts):
+    cleaned = [clean_text(t) for t in texts]
+    return cleaned, len(texts)
+
+
+def stage_split(cleaned):
+    sentences = [s for t in cleaned for s in split_sentences(t)]
+    return sentences, len(sentences)
+
+
+def stage_segment(texts):
+    sentences = list(Segmenter().iter_split_batch(texts))
+    return sentences, len(sentences)
+
+
+def stage_weak_label(sentences):
+    matcher = KeywordMatcher(KEYWORDS)
+    records = []
+    for s in sentences:
+        lab = matcher.first_label(s)
+        if lab:
+            records.append({"sentence": s, "label": lab, "score": 1.0})
+    return records, len(sentences)
+
+
+def stage_key_phrases(records):
+    by_label = {lab: [r["sentence"] for r in records if r["label"] == lab] for lab in LABELS}
+    phrases = {lab: extract_key_phrases(sents) for lab, sents in by_label.items()}
+    return phrases, len(records)
+
+
+def stage_write(records):
+    df = pd.DataFrame(records)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = build_report(df, LABELS) if not df.empty else {}
+        with open(Path(tmp) / "report.json", "w", encoding="utf-8") as fh:
+            json.dump({"meta": {}, "report": report}, fh, indent=2, ensure_ascii=False)
+        if not df.empty:
+            df[["sentence", "label", "score"]].to_csv(Path(tmp) / "records.csv", index=False)
+    return None, len(records)
+
+
+STAGES = [
+    ("extract_text_from_contents", stage_extract, "document"),
+    ("clean_text", stage_clean, "texts"),
+    ("split_sentences", stage_split, "cleaned"),
+    ("segmenter", stage_segment, "texts"),
+    ("weak_label", stage_weak_label, "sentences"),
+    ("extract_key_phrases", stage_key_phrases, "records"),
+    ("report_csv_write", stage_write, "records"),
+]
+
+
+# ---------------- measurement ----------------
+
+def measure(fn, arg, repeat):
+    """``(best seconds, peak MiB, output, items)`` of ``fn(arg)``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out, items = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20, out, items
+
+
+def run_stages(sentences, size, depth, repeat):
+    document = synthetic_document(sentences, size, depth)
+    inputs = {"document": document}
+    results = []
+    for name, fn, source in STAGES:
+        seconds, peak, out, items = measure(fn, inputs[source], repeat)
+        results.append({"stage": name, "sentences": size, "depth": depth, "seconds": seconds,
+                        "peak_mib": peak, "items": items, "items_per_second": items / seconds if seconds else None})
+        # feed the next stage
+        if name == "extract_text_from_contents":
+            inputs["texts"] = out
+        elif name == "clean_text":
+            inputs["cleaned"] = out
+        elif name == "split_sentences":
+            inputs["sentences"] = out
+        elif name == "weak_label":
+            inputs["records"] = out
+    return results
+
+
+def run_end_to_end(sentences, size, depth, filings, repeat):
+    """``process_filing`` over ``filings`` consecutive synthetic filings, each run in a fresh output directory."""
+    docs = synthetic_filings(sentences, filings, size, depth)
+
+    def run(_):
+        # process_filing reports progress on stdout
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            settings = make_settings(tmp, KEYWORDS, ["AAPL"])
+            for doc in docs:
+                process_filing(doc, settings)
+        return None, len(docs)
+
+    seconds, peak, _, items = measure(run, None, repeat)
+    return {"stage": "end_to_end", "sentences": size, "depth": depth, "seconds": seconds, "peak_mib": peak,
+            "items": items, "items_per_second": items / seconds if seconds else None}
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    old = {(r["stage"], r["sentences"], r["depth"]): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline['meta']['commit']} ({baseline_path}); time and peak ratios new/old")
+    regressions = 0
+    for r in results:
+        o = old.get((r["stage"], r["sentences"], r["depth"]))
+        if o is None:
+            continue
+        t = r["seconds"] / o["seconds"] if o["seconds"] else float("inf")
+        m = r["peak_mib"] / o["peak_mib"] if o["peak_mib"] else float("inf")
+        flag = "REGRESSION" if t > 1 + tolerance else ""
+        regressions += bool(flag)
+        print(f"{r['stage']:>27} {r['sentences']:>8} {r['depth']:>6} {t:>7.2f}x {m:>7.2f}x  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(FIXTURE), help="real-text fixture CSV with a sentence column")
+    parser.add_argument("--sizes", default="1000,10000", help="sentences per synthetic filing")
+    parser.add_argument("--depths", default="3,200", help="section nesting depths")
+    parser.add_argument("--filings", type=int, default=3, help="filings per end-to-end run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="result JSON (default benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    commit, dirty = git_commit()
+    print(f"{len(sentences)} fixture sentences from {args.sentences}; commit {commit}{' (dirty)' if dirty else ''}")
+    print(f"{'stage':>27} {'size':>8} {'depth':>6} {'seconds':>9} {'peak MiB':>9} {'items/s':>11}")
+
+    results = []
+    for size in (int(x) for x in args.sizes.split(",")):
+        for depth in (int(x) for x in args.depths.split(",")):
+            rows = run_stages(sentences, size, depth, args.repeat)
+            rows.append(run_end_to_end(sentences, size, depth, args.filings, args.repeat))
+            for r in rows:
+                print(f"{r['stage']:>27} {size:>8} {depth:>6} {r['seconds']:>9.4f} {r['peak_mib']:>9.1f} "
+                      f"{r['items_per_second'] or 0:>11.0f}")
+            results.extend(rows)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline-{commit}{'-dirty' if dirty else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "commit": commit, "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "args": vars(args),
+    }
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
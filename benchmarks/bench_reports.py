@@ -0,0 +1,96 @@
+"""Report load latency: indented JSON vs. binary ``.swotr`` reports (swot.reportfile).
+
+Reports are built the way the pipeline writes them, with per-stage metrics,
+10-K section spans and ``--evidence`` sentences per SWOT label taken from
+sec_10k_sentences.csv, then loaded whole and by section:
+
+- ``json.load``: what the dashboard did before, parsing the whole file
+- ``read_report (all)``: every section of the binary file
+- ``read_report (counts)``: header and counts only, as for a results list
+- ``read_report (view)``: counts, themes and evidence, as for the report page
+
+Run from the repository root:
+
+    python benchmarks/bench_reports.py --evidence 3,100,1000,5000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import load_sentences  # noqa: E402
+from swot.reportfile import read_report, write_report  # noqa: E402
+
+LABELS = ["Strength", "Weakness", "Opportunity", "Threat"]
+STAGES = ["parse", "extract", "segment", "dedup", "classify", "themes", "search", "report", "write", "diff"]
+
+
+def make_report(sentences, evidence):
+    stage = {"wall_s": 0.0123, "cpu_s": 0.0119, "calls": 1, "peak_rss_mib": 182.4}
+    meta = {
+        "ticker": "AAPL", "cik": "320193", "accession": "000032019324000123", "filing_date": "2024-11-01",
+        "section_filter": ["1", "1A", "7", "7A"],
+        "sections": [{"section": s, "title": f"Item {s}", "start": i * 40_000, "end": (i + 1) * 40_000}
+                     for i, s in enumerate(["cover", "1", "1A", "1B", "1C", "2", "3", "4", "5", "6", "7", "7A",
+                                            "8", "9", "9A", "9B", "10", "11", "12", "13", "14", "15", "16"])],
+        "metrics": {"wall_s": 0.123, "cpu_s": 0.119, "peak_rss_mib": 182.4,
+                    "stages": {name: dict(stage) for name in STAGES},
+                    "counters": {"sentences_in": 4000, "sentences_out": 4 * evidence, "bytes_written": 250_000}},
+    }
+    report = {}
+    for i, lab in enumerate(LABELS):
+        rows = [(i * evidence + j) % len(sentences) for j in range(evidence)]
+        report[lab] = {
+            "count": evidence, "share": 0.25, "mean_score": 0.8123,
+            "top_bullets": [sentences[r] for r in rows], "evidence_rows": rows,
+            "key_themes": ["supply chain", "competition", "services"],
+            "summary": f"{evidence} {lab.lower()} indicators found",
+        }
+    return {"meta": meta, "report": report}
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--evidence", default="3,100,1000,5000", help="evidence sentences per label")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.sentences)
+    loaders = {
+        "json.load": lambda p: json.loads(p["json"].read_text(encoding="utf-8")),
+        "read_report (all)": lambda p: read_report(p["binary"]),
+        "read_report (counts)": lambda p: read_report(p["binary"], ("counts",)),
+        "read_report (view)": lambda p: read_report(p["binary"], ("counts", "themes", "evidence")),
+    }
+    print(f"{'evidence/label':>14} {'json KiB':>9} {'binary KiB':>10}  " + "  ".join(f"{n:>20}" for n in loaders))
+    with tempfile.TemporaryDirectory() as tmp:
+        for evidence in (int(n) for n in args.evidence.split(",")):
+            data = make_report(sentences, evidence)
+            paths = {"json": Path(tmp) / f"report-{evidence}.json", "binary": Path(tmp) / f"report-{evidence}.swotr"}
+            # the pipeline's previous format: json.dump(..., indent=2)
+            with open(paths["json"], "w", encoding="utf-8") as fh:
+                json.dump(data, fh, indent=2, ensure_ascii=False)
+            write_report(paths["binary"], data)
+            assert read_report(paths["binary"]) == data
+            times = [best_ms(lambda: load(paths), args.repeat) for load in loaders.values()]
+            print(f"{evidence:>14} {paths['json'].stat().st_size / 2**10:>9.1f} "
+                  f"{paths['binary'].stat().st_size / 2**10:>10.1f}  " + "  ".join(f"{t:>17.3f} ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
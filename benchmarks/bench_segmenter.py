@@ -0,0 +1,74 @@
+"""Segmenter throughput vs. clean_text + split_sentences on sec_10k_sentences.csv.
+
+The corpus sentences are joined back into paragraphs (with the line feeds,
+carriage returns and form feeds found in raw filings) and re-segmented.
+
+Run from the repository root:
+
+    python benchmarks/bench_segmenter.py
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from swot.segmenter import Segmenter  # noqa: E402
+from swot.text import MIN_SENTENCE_LENGTH, clean_text, split_sentences  # noqa: E402
+
+
+def load_sentences(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [row["sentence"] for row in csv.DictReader(fh) if row.get("sentence")]
+
+
+def paragraphs(sentences, size, copies, seed=0):
+    rng = random.Random(seed)
+    seps = [" ", " ", " ", "\n", "\r\n", "  ", "\x0c"]
+    out = []
+    for _ in range(copies):
+        for i in range(0, len(sentences), size):
+            chunk = sentences[i:i + size]
+            out.append("".join(s + rng.choice(seps) for s in chunk))
+    return out
+
+
+def baseline(texts):
+    out = []
+    for t in texts:
+        tclean = clean_text(t)
+        if len(tclean) >= MIN_SENTENCE_LENGTH:
+            out.extend(split_sentences(tclean))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", default=str(ROOT / "sec_10k_sentences.csv"))
+    parser.add_argument("--paragraph", type=int, default=8, help="sentences per paragraph")
+    parser.add_argument("--copies", type=int, default=20, help="times the corpus is repeated")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = paragraphs(load_sentences(args.sentences), args.paragraph, args.copies)
+    n_chars = sum(len(t) for t in texts)
+    segmenter = Segmenter()
+    print(f"{len(texts)} paragraphs, {n_chars / 2**20:.1f} MiB of text")
+
+    for name, fn in (("clean_text+split_sentences", baseline),
+                     ("Segmenter.iter_split_batch", lambda ts: list(segmenter.iter_split_batch(ts)))):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            sents = fn(texts)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>27}: {n_chars / best / 2**20:6.1f} MiB/s  {len(sents) / best:9.0f} sentences/s  "
+              f"{len(sents)} sentences kept")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cold import time of the dashboard and of ``swot.analysis``, checked against a budget.
+
+Each target is imported in a fresh interpreter, ``--repeat`` times, and the
+fastest run counts:
+
+- ``dashboard``: the module-level imports of dashboard.py, read with ``ast``
+  so Streamlit does not have to start (Streamlit itself is timed on its own
+  line when installed, but is not part of the budget)
+- ``swot.analysis``: what the dashboard's job runner and the notebook import
+
+A target fails when it takes longer than ``--budget-ms`` or loads one of the
+``HEAVY`` modules, which only the views and pipeline stages that need them
+should import. Exits with status 1 on any failure.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --budget-ms 150
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("pandas", "numpy", "plotly", "pyarrow", "datamule", "aiohttp", "transformers", "torch", "onnxruntime")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<imports>", "exec"), {})
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "heavy": sorted({m.split(".")[0] for m in sys.modules} & set(sys.argv[2:]))}))
+"""
+
+
+def dashboard_imports(path, exclude=("streamlit",)):
+    """Source of the module-level import statements in ``path``, minus ``exclude``."""
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    lines = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [a for a in node.names if a.name.split(".")[0] not in exclude]
+            if names:
+                lines.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] not in exclude:
+            lines.append(ast.unparse(node))
+    return "\n".join(lines)
+
+
+def probe(source, repeat):
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE, source, *HEAVY], cwd=ROOT, capture_output=True, text=True)
+        if out.returncode:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1])
+        result = json.loads(out.stdout)
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    targets = {"dashboard": dashboard_imports(ROOT / "dashboard.py"), "swot.analysis": "import swot.analysis"}
+    failed = False
+    print(f"{'target':>14} {'import ms':>10}  heavy modules loaded")
+    for name, source in targets.items():
+        result = probe(source, args.repeat)
+        ok = result["ms"] <= args.budget_ms and not result["heavy"]
+        failed |= not ok
+        print(f"{name:>14} {result['ms']:>10.1f}  {', '.join(result['heavy']) or '-'}{'' if ok else '  FAIL'}")
+    try:
+        result = probe("import streamlit", args.repeat)
+        print(f"{'(streamlit)':>14} {result['ms']:>10.1f}  not budgeted")
+    except RuntimeError:
+        print(f"{'(streamlit)':>14} {'-':>10}  not installed")
+    print(f"budget: {args.budget_ms:.0f} ms per target, none of {', '.join(HEAVY)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Synthetic 10-K filings for benchmarks.
+
+``synthetic_document`` builds a datamule-style ``document`` dict: numbered
+parts, each a ``{"contents": ...}`` tree of titled sections ``depth`` levels
+deep, with paragraphs of several sentences at every level. Sentences come from
+a real-text fixture (``sec_10k_sentences.csv`` by default); ``mutate``
+rewrites numbers and swaps words so large documents do not just repeat the
+fixture verbatim. ``SyntheticFiling`` wraps a document in the attributes and
+``parse()`` method the pipeline expects from a datamule Document.
+"""
+import csv
+import json
+import random
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = ROOT / "sec_10k_sentences.csv"
+
+_NUMBER = re.compile(r'\d+')
+_SEPARATORS = [" ", " ", " ", "\n", "\r\n", "  ", "\x0c"]
+
+
+def load_sentences(path=FIXTURE):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [row["sentence"] for row in csv.DictReader(fh) if row.get("sentence")]
+
+
+def mutate(sentence, rng):
+    """Change the numbers and swap two words so the sentence is new but still reads like a filing."""
+    sentence = _NUMBER.sub(lambda m: str(rng.randint(1, 10 ** len(m.group(0)))), sentence)
+    words = sentence.split(" ")
+    if len(words) > 4:
+        i, j = rng.sample(range(1, len(words) - 1), 2)
+        words[i], words[j] = words[j], words[i]
+    return " ".join(words)
+
+
+def synthetic_document(sentences, n_sentences=2000, depth=3, parts=20, paragraph=6, mutate_ratio=0.5, seed=0):
+    """A datamule-style ``document`` dict holding about ``n_sentences`` sentences.
+
+    The sentences are spread over ``parts`` top-level parts; each part is a
+    chain of sections ``depth`` levels deep with ``paragraph``-sentence
+    paragraphs at every level. ``mutate_ratio`` of the sentences are rewritten
+    with ``mutate``.
+    """
+    rng = random.Random(seed)
+
+    def paragraph_text(k):
+        picked = [rng.choice(sentences) for _ in range(k)]
+        picked = [mutate(s, rng) if rng.random() < mutate_ratio else s for s in picked]
+        return "".join(s + rng.choice(_SEPARATORS) for s in picked)
+
+    per_part = max(1, n_sentences // parts)
+    levels = max(1, depth)
+    document = {}
+    for p in range(parts):
+        counts = [per_part // levels] * levels
+        counts[-1] += per_part % levels
+        # build the chain bottom-up; every section holds its paragraphs, then its subsection
+        node = None
+        for level in reversed(range(levels)):
+            contents = [paragraph_text(min(paragraph, counts[level] - i)) for i in range(0, counts[level], paragraph)]
+            if node is not None:
+                contents.append(node)
+            node = {"title": f"Item {p + 1}.{level}", "contents": contents}
+        document[str(p + 1)] = {"title": f"Item {p + 1}", "contents": node}
+    # a top-level string part, like the cover page datamule sometimes returns as plain text
+    document["cover"] = "UNITED STATES SECURITIES AND EXCHANGE COMMISSION Washington, D.C. 20549 FORM 10-K"
+    return document
+
+
+class SyntheticFiling:
+    """Stands in for a datamule Document: ``parse()`` fills ``data`` with metadata and the document."""
+
+    def __init__(self, document, accession, cik="320193", ticker="AAPL", filing_date="2024-11-01"):
+        self.accession = accession
+        self.cik = cik
+        self.filing_date = filing_date
+        self._metadata = {"accession_number": accession, "cik": cik, "ticker": ticker, "filing_date": filing_date}
+        self._document = document
+        self.content = json.dumps(document, sort_keys=True).encode("utf-8")
+        self.data = {}
+
+    def parse(self):
+        self.data = {"metadata": dict(self._metadata), "document": self._document}
+
+
+def synthetic_filings(sentences, count, n_sentences=2000, depth=3, seed=0, **kwargs):
+    """``count`` filings of one company in consecutive years, sharing the fixture's boilerplate."""
+    return [
+        SyntheticFiling(synthetic_document(sentences, n_sentences, depth, seed=seed + i, **kwargs),
+                        accession=f"{9_000_000_000 + seed * 1000 + i:018d}",
+                        filing_date=f"{2000 + i:04d}-11-01")
+        for i in range(count)
+    ]
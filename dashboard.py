@@ -1,15 +1,24 @@
 import streamlit as st
-import pandas as pd
 import json
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from pathlib import Path
-import subprocess
-import sys
 from datetime import datetime, date as dt_date  # Rename to avoid conflict
 import time
 
+# pandas, plotly, swot.exports (pyarrow) and swot.sentstore (numpy) are imported by the
+# views that use them, so the dashboard starts without them; see benchmarks/bench_startup.py
+from swot.catalog import open_catalog
+from swot.jobs import JobRunner
+from swot.metrics import read_runs
+from swot.reportfile import read_report
+from swot.search import open_evidence_index
+
+OUTPUT_DIR = "sec_swot_output"
+UPLOAD_DIR = "sec_uploads"
+SENTENCE_DATASET_DIR = Path(OUTPUT_DIR) / "sentences"
+RESULTS_PAGE_SIZE = 25
+SWOT_LABELS = ["Strength", "Weakness", "Opportunity", "Threat"]
+SWOT_COLORS = {'Strength': '#38a169', 'Weakness': '#e53e3e', 'Opportunity': '#4299e1', 'Threat': '#ed8936'}
+
 # Page configuration
 st.set_page_config(
     page_title="SEC SWOT Analysis Dashboard",
@@ -162,85 +171,225 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Utility functions
-@st.cache_data
-def load_analysis_results(output_dir="sec_swot_output"):
-    """Load analysis results from output directory"""
+def query_reports(ticker=None, start_date=None, end_date=None, page=1, page_size=RESULTS_PAGE_SIZE, output_dir=OUTPUT_DIR):
+    """One page of catalog entries, newest filing first"""
     try:
-        index_file = Path(output_dir) / "index.json"
-        if index_file.exists():
-            with open(index_file, 'r') as f:
-                return json.load(f)
-        return []
+        with open_catalog(output_dir) as catalog:
+            return catalog.query(
+                ticker=ticker,
+                start_date=start_date,
+                end_date=end_date,
+                limit=page_size,
+                offset=(page - 1) * page_size
+            )
     except Exception as e:
         st.error(f"Error loading results: {e}")
         return []
 
+def count_reports(ticker=None, start_date=None, end_date=None, output_dir=OUTPUT_DIR):
+    """Number of catalog entries matching the filters"""
+    try:
+        with open_catalog(output_dir) as catalog:
+            return catalog.count(ticker=ticker, start_date=start_date, end_date=end_date)
+    except Exception as e:
+        st.error(f"Error loading results: {e}")
+        return 0
+
+def catalog_overview(output_dir=OUTPUT_DIR):
+    """Tickers and filing date bounds available in the catalog"""
+    try:
+        with open_catalog(output_dir) as catalog:
+            return catalog.tickers(), catalog.date_bounds(), catalog.count()
+    except Exception as e:
+        st.error(f"Error loading results: {e}")
+        return [], (None, None), 0
+
+@st.cache_data(ttl=60)
+def load_label_trends(tickers, labels, start_date, end_date, output_dir=OUTPUT_DIR):
+    """Per-filing label rollups for the trend view, straight from the catalog"""
+    import pandas as pd
+    try:
+        with open_catalog(output_dir) as catalog:
+            return pd.DataFrame(catalog.label_trends(list(tickers), list(labels), start_date, end_date))
+    except Exception as e:
+        st.error(f"Error loading rollups: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=60)
+def load_peer_snapshot(tickers, labels, start_date, end_date, output_dir=OUTPUT_DIR):
+    """Label rollups of each ticker's latest filing in the date range"""
+    import pandas as pd
+    try:
+        with open_catalog(output_dir) as catalog:
+            return pd.DataFrame(catalog.peer_snapshot(list(tickers), list(labels), start_date, end_date))
+    except Exception as e:
+        st.error(f"Error loading rollups: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=60)
+def search_evidence(query, tickers, labels, start_date, end_date, limit, output_dir=OUTPUT_DIR):
+    """Ranked full-text matches and the query time in milliseconds"""
+    try:
+        with open_evidence_index(output_dir) as evidence:
+            started = time.perf_counter()
+            hits = evidence.search(query, list(tickers), list(labels), start_date, end_date, limit=limit)
+            return hits, (time.perf_counter() - started) * 1000
+    except Exception as e:
+        st.error(f"Error searching evidence: {e}")
+        return [], 0.0
+
+@st.cache_resource(max_entries=1)
+def _open_sentence_store(output_dir, version):
+    """Memory-mapped sentence store; ``version`` changes whenever the pipeline commits to it"""
+    from swot.sentstore import open_sentence_store
+    return open_sentence_store(output_dir)
+
+def sentence_store(output_dir=OUTPUT_DIR):
+    """The sentence store as of its last commit, or None before the pipeline has written one"""
+    from swot.sentstore import STORE_DIR
+    meta_path = Path(output_dir) / STORE_DIR / "meta.json"
+    try:
+        return _open_sentence_store(output_dir, meta_path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.error(f"Error opening sentence store: {e}")
+        return None
+
+def format_evidence(record):
+    """One stored sentence with its category, 10-K Item and evidence ID"""
+    section = f" · Item {record['section']}" if record['section'] and record['section'] != 'cover' else ""
+    sentence = record['sentence'].replace('$', '\\$')
+    return f"**{record['label']}**{section} · `{record['evidence_id']}`  \n{sentence}"
+
 @st.cache_data
-def load_swot_report(json_path):
-    """Load SWOT report from JSON file"""
+def load_swot_report(report_path, parts=None):
+    """Load a SWOT report (binary or JSON) with only the sections in ``parts``"""
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_report(report_path, parts)
     except Exception as e:
         st.error(f"Error loading SWOT report: {e}")
         return None
 
-def run_analysis(ticker, start_date, end_date):
-    """Run SWOT analysis for given parameters"""
+@st.cache_data
+def load_json(json_path):
+    """Load a JSON file such as a filing diff"""
     try:
-        # Update config in swot_analysis.py (simplified approach)
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        status_text.text("🔄 Initializing analysis...")
-        progress_bar.progress(20)
-        
-        # Import and run analysis
-        import sys
-        sys.path.append('.')
-        
-        status_text.text("📊 Running SWOT analysis...")
-        progress_bar.progress(40)
-        
-        # This would call your existing analysis function
-        from swot_analysis import analyze_portfolio
-        
-        # Configure parameters
-        config = {
-            'TICKERS': [ticker],
-            'FORMS': ["10-K"],
-            'DATE_RANGE': (start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")),
-            'OUTPUT_DIR': "sec_swot_output",
-            'PORTFOLIO_DIR': "sec_portfolio"
-        }
-        
-        status_text.text("🔍 Processing filings...")
-        progress_bar.progress(60)
-        
-        # Run analysis
-        analyze_portfolio(
-            tickers=config['TICKERS'],
-            forms=config['FORMS'],
-            date_range=config['DATE_RANGE'],
-            output_dir=config['OUTPUT_DIR'],
-            portfolio_dir=config['PORTFOLIO_DIR']
-        )
-        
-        status_text.text("✅ Analysis complete!")
-        progress_bar.progress(100)
-        
-        time.sleep(1)
-        progress_bar.empty()
-        status_text.empty()
-        
-        return True
-        
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except Exception as e:
-        st.error(f"Analysis failed: {e}")
-        return False
+        st.error(f"Error loading {json_path}: {e}")
+        return None
+
+def offer_download(label, path, file_name, mime, key):
+    """Download button for an export file on disk; the file is read only to hand it to Streamlit"""
+    with open(path, 'rb') as fh:
+        st.download_button(label=label, data=fh, file_name=file_name, mime=mime, key=key)
+
+def analysis_job(ticker, forms, start_date, end_date, progress):
+    """Pipeline call executed on the background job runner"""
+    from swot.analysis import analyze_portfolio
+
+    analyze_portfolio(
+        tickers=[ticker],
+        forms=list(forms),
+        date_range=(start_date, end_date),
+        output_dir=OUTPUT_DIR,
+        portfolio_dir="sec_portfolio",
+        progress=progress
+    )
+    return True
+
+def upload_job(paths, ticker, filing_date, progress):
+    """Uploaded files streamed through the pipeline on the background job runner"""
+    from swot.analysis import analyze_uploads
+
+    entries, failures = analyze_uploads(paths, ticker=ticker, filing_date=filing_date, output_dir=OUTPUT_DIR,
+                                        progress=progress)
+    if failures and not entries:
+        raise RuntimeError(f"none of the {len(paths)} upload(s) could be processed: {failures[0][1]}")
+    return {"processed": len(entries), "failed": len(failures)}
+
+JOBS = {"analysis": analysis_job, "upload": upload_job}
+
+def run_job(kind, progress, **params):
+    return JOBS[kind](progress=progress, **params)
+
+@st.cache_resource
+def get_job_runner():
+    """One job runner per server process, so jobs outlive page reruns and sessions.
+
+    A single worker also keeps the pipeline's output (catalog, sentence store) to one writer.
+    """
+    return JobRunner(run_job, max_workers=1)
+
+def run_analysis(ticker, start_date, end_date):
+    """Queue a SWOT analysis; identical in-flight requests share one job"""
+    return get_job_runner().submit(
+        kind="analysis",
+        ticker=ticker,
+        forms=["10-K"],
+        start_date=start_date.strftime("%Y-%m-%d"),
+        end_date=end_date.strftime("%Y-%m-%d")
+    )
+
+def save_upload(uploaded, upload_dir=UPLOAD_DIR):
+    """Copy a Streamlit upload to disk in blocks; the file is named after its content, so re-uploads are reused"""
+    import hashlib
+    import shutil
+    import tempfile
+    upload_dir = Path(upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    uploaded.seek(0)
+    with tempfile.NamedTemporaryFile(dir=upload_dir, suffix=".part", delete=False) as tmp:
+        for block in iter(lambda: uploaded.read(1 << 20), b""):
+            digest.update(block)
+            tmp.write(block)
+    path = upload_dir / f"{digest.hexdigest()[:16]}-{Path(uploaded.name).name}"
+    if path.exists():
+        Path(tmp.name).unlink()
+    else:
+        shutil.move(tmp.name, path)
+    return str(path)
+
+def process_uploads(uploaded_files, ticker, filing_date):
+    """Queue the uploaded files for analysis as one job"""
+    return get_job_runner().submit(
+        kind="upload",
+        paths=[save_upload(f) for f in uploaded_files],
+        ticker=ticker or None,
+        filing_date=filing_date.strftime("%Y-%m-%d") if filing_date else None
+    )
+
+def job_title(params):
+    """Short description of a job's parameters"""
+    if params.get('kind') == "upload":
+        files = ", ".join(Path(p).name.split("-", 1)[-1] for p in params['paths'][:3])
+        more = f" +{len(params['paths']) - 3}" if len(params['paths']) > 3 else ""
+        return f"{params.get('ticker') or 'Uploads'} · {files}{more}"
+    return f"{params['ticker']} · {params['start_date']} → {params['end_date']}"
+
+STAGE_LABELS = {
+    None: "🔄 Waiting for a worker...",
+    "download": "📥 Downloading filings...",
+    "submissions": "🗂️ Preparing submissions...",
+    "filings": "🔍 Processing filings...",
+    "index": "🗃️ Updating catalog...",
+    "done": "✅ Analysis complete!"
+}
+
+def display_job_status(job):
+    """Show real pipeline progress for a background job"""
+    info = job.to_dict()
+    st.markdown(f"**{job_title(info['params'])}** · job #{info['id']} ({info['status']})")
+    st.progress(job.fraction)
+    label = STAGE_LABELS.get(info['stage'], info['stage'])
+    st.text(f"{label} {info['message']}" if info['message'] and info['status'] != 'failed' else label)
 
 def create_swot_visualization(report_data):
     """Create SWOT visualization charts"""
+    import plotly.graph_objects as go
     
     # Extract counts
     categories = ['Strength', 'Weakness', 'Opportunity', 'Threat']
@@ -365,7 +514,7 @@ def main():
         # Analysis mode
         analysis_mode = st.radio(
             "Analysis Mode",
-            ["📈 Quick Analysis", "📋 Upload Documents", "📊 View Results"],
+            ["📈 Quick Analysis", "📋 Upload Documents", "📊 View Results", "📉 Trends & Peers", "🔎 Evidence Search"],
             index=0
         )
         
@@ -404,48 +553,59 @@ def main():
             
             # Analysis button
             if st.button("🚀 Run Analysis", type="primary"):
-                st.session_state.run_analysis = True
-                st.session_state.analysis_params = {
-                    'ticker': ticker,
-                    'start_date': start_date,
-                    'end_date': end_date
-                }
+                job = run_analysis(ticker, start_date, end_date)
+                st.session_state.analysis_job_id = job.id
+            
+            # Jobs from every session on this server
+            recent_jobs = get_job_runner().jobs()[:5]
+            if recent_jobs:
+                st.markdown("### Background Jobs")
+                for job in recent_jobs:
+                    st.caption(f"#{job.id} {job_title(job.params)} · {job.status} · {int(job.fraction * 100)}%")
         
         elif analysis_mode == "📋 Upload Documents":
+            from swot.ingest import available_formats
+
             st.markdown("### Document Upload")
+            formats = available_formats()
             uploaded_files = st.file_uploader(
                 "Upload SEC Filings",
-                type=['txt', 'pdf', 'html'],
+                type=formats + (['htm'] if 'html' in formats else []),
                 accept_multiple_files=True
             )
+            if 'pdf' not in formats:
+                st.caption("Install pypdf to upload PDF filings.")
+            
+            upload_ticker = st.text_input("Ticker (optional)").strip().upper()
+            upload_date = st.date_input("Filing date", value=dt_date.today(), max_value=dt_date.today(),
+                                        help="EDGAR submissions (.txt) carry their own filing date")
             
             if uploaded_files:
                 st.success(f"📄 {len(uploaded_files)} files uploaded")
                 if st.button("Process Documents", type="primary"):
-                    st.info("Document processing feature coming soon!")
+                    job = process_uploads(uploaded_files, upload_ticker, upload_date)
+                    st.session_state.upload_job_id = job.id
 
     # Main content area based on selected mode
     if analysis_mode == "📈 Quick Analysis":
         # Quick Analysis main content
-        if st.session_state.get('run_analysis', False):
-            params = st.session_state.get('analysis_params', {})
-            
+        job_id = st.session_state.get('analysis_job_id')
+        job = get_job_runner().get(job_id) if job_id else None
+        if job is not None:
             st.markdown("## 🔄 Running Analysis")
             
-            success = run_analysis(
-                params['ticker'],
-                params['start_date'], 
-                params['end_date']
-            )
+            display_job_status(job)
             
-            if success:
-                st.success("✅ Analysis completed successfully!")
-                st.session_state.run_analysis = False
+            if not job.finished:
+                # poll instead of blocking the script thread
+                time.sleep(1)
                 st.rerun()
+            elif job.status == "done":
+                st.success("✅ Analysis completed successfully!")
+                del st.session_state['analysis_job_id']
             else:
-                st.error("❌ Analysis failed. Please try again.")
-                st.session_state.run_analysis = False
-                return
+                st.error(f"❌ Analysis failed: {job.error}")
+                del st.session_state['analysis_job_id']
         else:
             # Quick analysis instructions using Streamlit components
             st.markdown("""
@@ -539,15 +699,36 @@ def main():
         
         st.markdown("<br>", unsafe_allow_html=True)
         
-        st.warning("⚠️ **Coming Soon**: Document upload functionality is currently under development. Use Quick Analysis mode to analyze SEC filings automatically.")
-        
-        st.info("📁 Use the file upload widget in the sidebar to get started")
+        # files are streamed through the pipeline in bounded memory, several at a time
+        job_id = st.session_state.get('upload_job_id')
+        job = get_job_runner().get(job_id) if job_id else None
+        if job is not None:
+            st.markdown("## 🔄 Processing Uploads")
+            display_job_status(job)
+            if not job.finished:
+                time.sleep(1)
+                st.rerun()
+            elif job.status == "done":
+                result = job.result or {}
+                failed = f", {result['failed']} could not be read" if result.get('failed') else ""
+                st.success(f"✅ Processed {result.get('processed', 0)} document(s){failed}. See 📊 View Results.")
+                del st.session_state['upload_job_id']
+            else:
+                st.error(f"❌ Processing failed: {job.error}")
+                del st.session_state['upload_job_id']
+        else:
+            st.info("📁 Use the file upload widget in the sidebar to get started. Reports are added to 📊 View Results, "
+                    "Trends & Peers and Evidence Search like downloaded filings.")
     
     elif analysis_mode == "📊 View Results":
+        import pandas as pd
+        import plotly.express as px
+        from swot import exports
+
         # View Results main content (keep the existing code)
-        results = load_analysis_results()
+        tickers, (first_date, last_date), total_reports = catalog_overview()
         
-        if not results:
+        if not total_reports:
             st.markdown("""
             <div class="analysis-summary">
                 <h3 style="color: #63b3ed; text-align: center;">No Analysis Results Found</h3>
@@ -561,6 +742,35 @@ def main():
         # Results selector
         st.markdown("## 📈 Analysis Results")
         
+        # Filters are applied in the catalog query; only one page of options is built
+        fcol1, fcol2, fcol3 = st.columns(3)
+        with fcol1:
+            ticker_filter = st.selectbox("Ticker", ["All"] + tickers)
+        with fcol2:
+            date_from = st.date_input(
+                "Filed From",
+                value=dt_date.fromisoformat(first_date) if first_date else dt_date(2020, 1, 1)
+            )
+        with fcol3:
+            date_to = st.date_input(
+                "Filed To",
+                value=dt_date.fromisoformat(last_date) if last_date else dt_date.today()
+            )
+        
+        filters = {
+            'ticker': None if ticker_filter == "All" else ticker_filter,
+            'start_date': date_from.isoformat(),
+            'end_date': date_to.isoformat()
+        }
+        matching = count_reports(**filters)
+        if not matching:
+            st.info("No reports match these filters.")
+            return
+        
+        pages = (matching + RESULTS_PAGE_SIZE - 1) // RESULTS_PAGE_SIZE
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        results = query_reports(page=page, **filters)
+        
         # Create options for selectbox
         options = []
         for result in results:
@@ -570,7 +780,7 @@ def main():
             options.append(f"{ticker_name} - {filing_date} ({accession})")
         
         selected_idx = st.selectbox(
-            "Select Report to View",
+            f"Select Report to View ({matching} matching)",
             range(len(options)),
             format_func=lambda x: options[x]
         )
@@ -578,7 +788,8 @@ def main():
         selected_result = results[selected_idx]
         
         # Load SWOT report
-        report_data = load_swot_report(selected_result['json'])
+        # metrics and 10-K section spans are loaded where they are shown
+        report_data = load_swot_report(selected_result['json'], ("counts", "themes", "evidence", "extra"))
         
         if not report_data:
             st.error("Failed to load SWOT report")
@@ -598,7 +809,12 @@ def main():
             </p>
         </div>
         """, unsafe_allow_html=True)
-        
+        spans = (load_swot_report(selected_result['json'], ("sections",)) or {}).get('meta', {}).get('sections') or []
+        if meta.get('section_filter'):
+            found = {s['section'] for s in spans}
+            analyzed = [f"Item {s}" for s in meta['section_filter'] if s in found]
+            st.caption("Sections analyzed: " + (", ".join(analyzed) or "none found"))
+
         # Visualization
         fig = create_swot_visualization(report_data)
         st.plotly_chart(fig, use_container_width=True)
@@ -673,34 +889,301 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
-        # Download options
+        # Year-over-year changes (written when near-duplicate filtering is on)
+        diff_data = load_json(selected_result['diff']) if selected_result.get('diff') else None
+        if diff_data:
+            previous = diff_data['previous']
+            st.markdown("## 🔄 Changes Since Last Filing")
+            st.caption(f"Compared with {previous['accession']} filed {previous.get('filing_date') or 'N/A'}")
+
+            col1, col2, col3 = st.columns(3)
+            for col, key, title in ((col1, 'new', 'New'), (col2, 'removed', 'Removed'), (col3, 'changed', 'Changed')):
+                with col:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-value">{diff_data['counts'][key]}</div>
+                        <div class="metric-label">{title} Sentences</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+            with st.expander("🆕 New sentences"):
+                for sentence in diff_data['new'][:50]:
+                    st.markdown(f"- {sentence}")
+            with st.expander("🗑️ Removed sentences"):
+                for sentence in diff_data['removed'][:50]:
+                    st.markdown(f"- {sentence}")
+            with st.expander("✏️ Changed sentences"):
+                for pair in diff_data['changed'][:50]:
+                    st.markdown(f"- ~~{pair['before']}~~  \n  {pair['after']}")
+
+        # Sentences come straight from the memory-mapped store; only the page shown is decoded
+        store = sentence_store()
+        if store is not None and store.block(selected_result['accession']):
+            with st.expander("📑 Browse labelled sentences"):
+                bcol1, bcol2, bcol3 = st.columns([3, 2, 1])
+                with bcol1:
+                    browse_labels = st.multiselect("Categories", SWOT_LABELS, default=SWOT_LABELS, key="browse_labels")
+                with bcol2:
+                    items = [span['section'] for span in spans if span['section'] != 'cover']
+                    browse_section = st.selectbox("Section", ["All"] + list(dict.fromkeys(items)),
+                                                  format_func=lambda s: s if s == "All" else f"Item {s}",
+                                                  key="browse_section")
+                browse_sections = None if browse_section == "All" else [browse_section]
+                total = store.count(selected_result['accession'], browse_labels, browse_sections)
+                pages = max(1, -(-total // 20))
+                with bcol3:
+                    page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+                st.caption(f"{total} sentence(s), page {page} of {pages}")
+                for record in store.filing_rows(selected_result['accession'], browse_labels, browse_sections,
+                                                offset=(page - 1) * 20, limit=20):
+                    st.markdown(format_evidence(record))
+
+        # Stage timings recorded by the pipeline (reports written before they were recorded have none)
+        filing_metrics = selected_result.get('metrics') or (
+            load_swot_report(selected_result['json'], ("metrics",)) or {}).get('meta', {}).get('metrics')
+        runs = read_runs(OUTPUT_DIR)
+        if filing_metrics or runs:
+            with st.expander("⚙️ Pipeline performance"):
+                if filing_metrics:
+                    counters = filing_metrics.get('counters', {})
+                    col1, col2, col3, col4 = st.columns(4)
+                    for col, value, title in (
+                        (col1, f"{filing_metrics['wall_s']:.2f}s", "Wall Time"),
+                        (col2, f"{filing_metrics['cpu_s']:.2f}s", "CPU Time"),
+                        (col3, f"{counters.get('sentences_in', 0)} → {counters.get('sentences_out', 0)}", "Sentences In → Labelled"),
+                        (col4, f"{counters.get('bytes_written', 0) / 2**10:.0f} KiB", "Written"),
+                    ):
+                        with col:
+                            st.markdown(f"""
+                            <div class="metric-card">
+                                <div class="metric-value" style="font-size: 1.4rem;">{value}</div>
+                                <div class="metric-label">{title}</div>
+                            </div>
+                            """, unsafe_allow_html=True)
+
+                    stages = pd.DataFrame([
+                        {'Stage': name, 'Wall (s)': s['wall_s'], 'CPU (s)': s['cpu_s'], 'Calls': s['calls'],
+                         'Peak RSS (MiB)': s.get('peak_rss_mib')}
+                        for name, s in filing_metrics.get('stages', {}).items()
+                    ])
+                    if not stages.empty:
+                        fig = px.bar(stages.sort_values('Wall (s)'), x='Wall (s)', y='Stage', orientation='h',
+                                     hover_data=['CPU (s)', 'Calls', 'Peak RSS (MiB)'],
+                                     title="Where this filing's time went")
+                        fig.update_layout(height=320, margin=dict(l=10, r=10, t=40, b=10))
+                        st.plotly_chart(fig, use_container_width=True)
+
+                if runs:
+                    st.markdown("**Recent pipeline runs**")
+                    st.dataframe(pd.DataFrame([
+                        {'Finished': run['finished_at'], 'Filings': run.get('filings'), 'Reused': run.get('reused'),
+                         'Failed': run.get('failed'), 'Wall (s)': round(run['wall_s'], 2),
+                         **{f"{name} (s)": round(stage['wall_s'], 2) for name, stage in run['stages'].items()},
+                         'Peak RSS (MiB)': run.get('peak_rss_mib')}
+                        for run in runs
+                    ]), use_container_width=True, hide_index=True)
+
+        # Exports are streamed to disk in chunks and cached by query, so repeated downloads are free
         st.markdown("## 📥 Export Options")
+        ecol1, ecol2, ecol3, ecol4 = st.columns(4)
+        with ecol1:
+            scope = st.radio("Scope", ["This filing", f"All {matching} matching filings"])
+        with ecol2:
+            export_labels = st.multiselect("Categories", SWOT_LABELS, default=SWOT_LABELS, key="export_labels")
+        with ecol3:
+            export_format = st.selectbox("Format", list(exports.FORMATS), format_func={"csv": "CSV", "jsonl": "JSON Lines"}.get)
+        with ecol4:
+            compression = st.selectbox("Compression", exports.available_compressions(), index=1,
+                                       format_func=lambda c: c or "none")
+
+        if scope == "This filing":
+            export_filters = {'accessions': [selected_result['accession']]}
+            export_name = f"{meta['ticker']}_{meta['accession']}"
+        else:
+            export_filters = {
+                'tickers': [filters['ticker']] if filters['ticker'] else None,
+                'start_date': filters['start_date'],
+                'end_date': filters['end_date']
+            }
+            export_name = f"{filters['ticker'] or 'all'}_{filters['start_date']}_{filters['end_date']}"
+        # a single filing is cheap enough to export right away; larger exports wait for a click
+        build = scope == "This filing"
+        suffix = exports.SUFFIXES[compression]
+
         col1, col2, col3 = st.columns(3)
-        
         with col1:
-            if st.button("📊 Download CSV", type="secondary"):
-                csv_path = selected_result['csv']
-                with open(csv_path, 'rb') as f:
-                    st.download_button(
-                        label="Download Raw Data",
-                        data=f.read(),
-                        file_name=f"swot_data_{meta['ticker']}.csv",
-                        mime="text/csv"
-                    )
-        
+            sentence_args = dict(fmt=export_format, compression=compression, dataset_dir=SENTENCE_DATASET_DIR,
+                                 labels=export_labels, **export_filters)
+            path = exports.export_sentences(OUTPUT_DIR, build=build, **sentence_args)
+            if path is None and st.button("📊 Prepare sentence export", type="secondary"):
+                with st.spinner("Writing export..."):
+                    path = exports.export_sentences(OUTPUT_DIR, **sentence_args)
+            if path is not None:
+                offer_download("📊 Download Sentences", path, f"swot_data_{export_name}.{export_format}{suffix}",
+                               exports.mime_type(export_format, compression), key="download_sentences")
+
         with col2:
-            if st.button("📄 Download JSON", type="secondary"):
-                json_data = json.dumps(report_data, indent=2)
-                st.download_button(
-                    label="Download Report",
-                    data=json_data,
-                    file_name=f"swot_report_{meta['ticker']}.json",
-                    mime="application/json"
-                )
-        
+            if scope == "This filing" and compression is None:
+                # reports written before the binary format are offered as they are
+                if selected_result['json'].endswith('.json'):
+                    offer_download("📄 Download JSON", selected_result['json'], f"swot_report_{export_name}.json",
+                                   "application/json", key="download_report")
+                else:
+                    st.download_button(label="📄 Download JSON", key="download_report",
+                                       data=json.dumps(load_swot_report(selected_result['json']), indent=2, ensure_ascii=False),
+                                       file_name=f"swot_report_{export_name}.json", mime="application/json")
+            else:
+                path = exports.export_reports(OUTPUT_DIR, compression=compression, build=build, **export_filters)
+                if path is None and st.button("📄 Prepare report export", type="secondary"):
+                    with st.spinner("Writing export..."):
+                        path = exports.export_reports(OUTPUT_DIR, compression=compression, **export_filters)
+                if path is not None:
+                    offer_download("📄 Download Reports", path, f"swot_reports_{export_name}.jsonl{suffix}",
+                                   exports.mime_type("jsonl", compression), key="download_report")
+
         with col3:
-            if st.button("📈 Generate PDF", type="secondary"):
-                st.info("PDF generation feature coming soon!")
+            try:
+                path = exports.export_pdf(OUTPUT_DIR, selected_result, labels=export_labels)
+            except Exception as e:
+                st.error(f"Error rendering PDF: {e}")
+            else:
+                offer_download("📈 Download PDF", path, f"swot_report_{meta['ticker']}_{meta['accession']}.pdf",
+                               "application/pdf", key="download_pdf")
+
+    elif analysis_mode == "📉 Trends & Peers":
+        import pandas as pd
+        import plotly.express as px
+
+        # Served from the catalog's label rollups; no report files are opened
+        tickers, (first_date, last_date), total_reports = catalog_overview()
+        if not total_reports:
+            st.info("No analysis results yet. Run an analysis using the Quick Analysis mode first.")
+            return
+
+        st.markdown("## 📉 SWOT Trends & Peer Comparison")
+        fcol1, fcol2, fcol3, fcol4 = st.columns([3, 2, 1, 1])
+        with fcol1:
+            selected_tickers = st.multiselect("Tickers", tickers, default=tickers[:5])
+        with fcol2:
+            selected_labels = st.multiselect("Categories", SWOT_LABELS, default=SWOT_LABELS)
+        with fcol3:
+            date_from = st.date_input(
+                "Filed From",
+                value=dt_date.fromisoformat(first_date) if first_date else dt_date(2020, 1, 1)
+            )
+        with fcol4:
+            date_to = st.date_input(
+                "Filed To",
+                value=dt_date.fromisoformat(last_date) if last_date else dt_date.today()
+            )
+        measure = st.radio(
+            "Measure",
+            ["count", "share", "mean_score"],
+            format_func={"count": "Sentences", "share": "Share of labelled sentences", "mean_score": "Mean score"}.get,
+            horizontal=True
+        )
+        if not selected_tickers or not selected_labels:
+            st.info("Select at least one ticker and one category.")
+            return
+        query = (tuple(selected_tickers), tuple(selected_labels), date_from.isoformat(), date_to.isoformat())
+
+        trends = load_label_trends(*query)
+        st.markdown("### 📈 Trends Over Time")
+        if trends.empty:
+            st.info("No rolled-up filings match these filters yet; they are added on the next pipeline run.")
+        else:
+            fig = px.line(
+                trends, x='filing_date', y=measure, color='ticker', facet_col='label', facet_col_wrap=2,
+                markers=True, hover_data=['accession'],
+                category_orders={'label': SWOT_LABELS}
+            )
+            fig.update_layout(height=600, margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+
+        peers = load_peer_snapshot(*query)
+        st.markdown("### 🏢 Peer Comparison (latest filing per ticker)")
+        if not peers.empty:
+            fig = px.bar(
+                peers, x='ticker', y=measure, color='label', barmode='group', hover_data=['filing_date', 'accession'],
+                category_orders={'label': SWOT_LABELS},
+                color_discrete_map=SWOT_COLORS
+            )
+            fig.update_layout(height=420, margin=dict(l=10, r=10, t=20, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+
+            st.dataframe(pd.DataFrame({
+                'Ticker': peers['ticker'],
+                'Filed': peers['filing_date'],
+                'Category': peers['label'],
+                'Sentences': peers['count'],
+                'Key Themes': peers['themes'].map(lambda themes: ", ".join(f"{term} ({score:.1f})" for term, score in themes)),
+                'Evidence': peers['evidence'].map(", ".join),
+            }), use_container_width=True, hide_index=True)
+            st.caption("Evidence IDs are `<accession>:<row>` in the filing's CSV export.")
+
+            store = sentence_store()
+            if store is not None:
+                with st.expander("📑 Evidence sentences"):
+                    for ticker, label, evidence in zip(peers['ticker'], peers['label'], peers['evidence']):
+                        records = [r for r in map(store.get, evidence) if r]
+                        if records:
+                            st.markdown(f"**{ticker} · {label}**")
+                            for record in records:
+                                st.markdown(format_evidence(record))
+
+    elif analysis_mode == "🔎 Evidence Search":
+        # Full-text search over every labelled sentence of every processed filing
+        tickers, (first_date, last_date), total_reports = catalog_overview()
+        if not total_reports:
+            st.info("No analysis results yet. Run an analysis using the Quick Analysis mode first.")
+            return
+
+        st.markdown("## 🔎 Evidence Search")
+        query = st.text_input(
+            "Search sentences",
+            placeholder='e.g. "supply chain" AND (china OR tariff*) NOT covid'
+        )
+        st.caption('Quote phrases, combine terms with AND / OR / NOT and parentheses, end a word with * for a prefix search.')
+        fcol1, fcol2, fcol3, fcol4, fcol5 = st.columns([3, 2, 1, 1, 1])
+        with fcol1:
+            search_tickers = st.multiselect("Tickers", tickers, key="search_tickers")
+        with fcol2:
+            search_labels = st.multiselect("Categories", SWOT_LABELS, key="search_labels")
+        with fcol3:
+            date_from = st.date_input(
+                "Filed From",
+                value=dt_date.fromisoformat(first_date) if first_date else dt_date(2020, 1, 1),
+                key="search_from"
+            )
+        with fcol4:
+            date_to = st.date_input(
+                "Filed To",
+                value=dt_date.fromisoformat(last_date) if last_date else dt_date.today(),
+                key="search_to"
+            )
+        with fcol5:
+            limit = st.selectbox("Results", [25, 50, 100], key="search_limit")
+
+        if not query.strip():
+            return
+        hits, elapsed_ms = search_evidence(
+            query, tuple(search_tickers), tuple(search_labels), date_from.isoformat(), date_to.isoformat(), limit
+        )
+        st.caption(f"{len(hits)} result(s) in {elapsed_ms:.0f} ms, best match first")
+        # the full-text index has no section column; the sentence store knows each hit's 10-K Item
+        store = sentence_store()
+        for hit in hits:
+            record = store.get(hit['evidence_id']) if store is not None else None
+            section = f" · Item {record['section']}" if record and record['section'] not in (None, 'cover') else ""
+            st.markdown(f"""
+            <div class="metric-card {hit['label'].lower()}-card" style="padding: 0.8rem 1.2rem; margin: 0.5rem 0;">
+                <div style="font-size: 0.85rem; opacity: 0.85;">
+                    {hit['ticker']} · {hit['filing_date'] or 'N/A'} · {hit['label']}{section} · <code>{hit['evidence_id']}</code>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            # matched terms come back wrapped in ** by the index; $ would start a LaTeX span
+            st.markdown(hit['snippet'].replace('$', '\\$'))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
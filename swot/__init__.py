@@ -0,0 +1 @@
+"""Reusable building blocks for the SEC SWOT analysis pipeline."""
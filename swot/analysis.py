@@ -0,0 +1,241 @@
+"""``analyze_portfolio``, ``analyze_uploads`` and ``reclassify``: the notebook pipeline as an importable module.
+
+``swot_analysis.ipynb`` and the dashboard's job runner both call these. The
+defaults below match the notebook's CONFIG cell; every one of them can be
+passed as an argument. Importing this module is cheap: datamule, pandas, the
+downloader and the classifier backends are imported by the functions that
+use them, so ``import swot.analysis`` does not pull them in
+(``benchmarks/bench_startup.py`` checks this).
+
+    python -m swot.analysis AAPL MSFT --forms 10-K --start 2023-01-01 --end 2024-12-31
+    python -m swot.analysis --upload aapl-10k.htm annual-report.pdf --ticker AAPL
+"""
+import argparse
+import json
+import os
+
+from swot.matcher import KeywordMatcher
+from swot.text import MAX_SENTENCE_LENGTH, MIN_SENTENCE_LENGTH, ensure_dir
+
+OUTPUT_DIR = "sec_swot_output"
+PORTFOLIO_DIR = "sec_portfolio"
+# "edgar": concurrent rate-limited downloader (swot.downloader); "datamule": Portfolio.download_submissions
+DOWNLOADER = "edgar"
+SEC_USER_AGENT = "StrategicSWOT research contact@example.com"  # $SEC_USER_AGENT overrides
+SEC_REQUESTS_PER_SECOND = 10
+CACHE_DIR = "sec_swot_cache"
+SENTENCE_DATASET_DIR = "sec_swot_output/sentences"
+TICKERS = ["AAPL"]
+FORMS = ["10-K"]
+DATE_RANGE = ("2023-01-01", "2024-12-31")
+WORKERS = 1
+# uploads are processed concurrently, each in bounded memory (swot.ingest)
+UPLOAD_WORKERS = min(4, os.cpu_count() or 1)
+CLASSIFIER = None
+DEDUP = {"boilerplate_tickers": 5}
+PROFILE = None
+SECTIONS = ["1", "1A", "7", "7A"]
+
+# simple weak-supervision keyword rules
+KEYWORDS = {
+    "Strength": ["strong", "leading", "advantage", "growth", "robust", "increase in", "strength"],
+    "Weakness": ["decline", "risk", "cost", "vulnerable", "loss", "decrease", "weak"],
+    "Opportunity": ["opportunit", "potential", "emerging", "expand", "growth opportunity", "could benefit"],
+    "Threat": ["competition", "regulation", "lawsuit", "uncertain", "disruptor", "threat", "risk of"]
+}
+
+_matchers = {}
+
+
+def get_matcher(keywords=None):
+    """Compiled matcher for ``keywords`` (``KEYWORDS`` if None), rebuilt when they change."""
+    keywords = keywords or KEYWORDS
+    key = json.dumps(keywords, sort_keys=True)
+    if key not in _matchers:
+        _matchers.clear()
+        _matchers[key] = KeywordMatcher(keywords)
+    return _matchers[key]
+
+
+def weak_label(sentence, keywords=None):
+    """First label in ``keywords`` order with a keyword hit."""
+    return get_matcher(keywords).first_label(sentence)
+
+
+def weak_label_all(sentence, keywords=None):
+    """Every matching label with hit counts and match offsets."""
+    return get_matcher(keywords).match(sentence)
+
+
+def pipeline_settings(tickers, output_dir=OUTPUT_DIR, cache_dir=CACHE_DIR, dataset_dir=SENTENCE_DATASET_DIR,
+                      keywords=None, classifier=CLASSIFIER, dedup=DEDUP, profile=PROFILE, sections=SECTIONS,
+                      ciks=None, min_len=MIN_SENTENCE_LENGTH, max_len=MAX_SENTENCE_LENGTH):
+    """``make_settings`` with the optional Parquet dataset and classifier dropped when not installed."""
+    from swot import columnar
+    from swot.classifier import available as classifier_available
+    from swot.pipeline import make_settings
+
+    if dataset_dir and not columnar.available():
+        print("pyarrow is not installed; skipping the Parquet sentence dataset.")
+        dataset_dir = None
+    if classifier and not classifier_available(classifier.get("backend", "torch")):
+        print("transformers / model backend not installed; falling back to keyword weak supervision.")
+        classifier = None
+    return make_settings(output_dir, keywords or KEYWORDS, tickers, min_len, max_len,
+                         cache_dir=cache_dir, dataset_dir=dataset_dir, classifier=classifier, dedup=dedup,
+                         profile=profile, sections=sections, ciks=ciks)
+
+
+def _portfolio(portfolio_dir):
+    try:
+        from datamule import Portfolio
+    except Exception:
+        raise RuntimeError("datamule is required. Install with: pip install datamule")
+    return Portfolio(portfolio_dir)
+
+
+def analyze_portfolio(tickers=TICKERS, forms=FORMS, date_range=DATE_RANGE, portfolio_dir=PORTFOLIO_DIR,
+                      output_dir=OUTPUT_DIR, workers=WORKERS, cache_dir=CACHE_DIR, dataset_dir=SENTENCE_DATASET_DIR,
+                      progress=None, downloader=DOWNLOADER, user_agent=None,
+                      requests_per_second=SEC_REQUESTS_PER_SECOND, **options):
+    """Download ``tickers``' filings and write their SWOT reports to ``output_dir``.
+
+    ``progress(stage, done, total, message)`` receives per-stage updates, e.g.
+    from the dashboard job runner. ``options`` go to ``pipeline_settings``
+    (``keywords``, ``classifier``, ``dedup``, ``profile``, ``sections``,
+    ``min_len``, ``max_len``).
+    """
+    from swot.metrics import Metrics
+    from swot.pipeline import run_incremental
+    from swot.tickers import load_ticker_table
+
+    progress = progress or (lambda *args: None)
+    ensure_dir(output_dir)
+    # stage timings for the whole run; run_incremental adds its own and appends them to pipeline_runs.jsonl
+    metrics = Metrics()
+    # create or reuse portfolio
+    print("Initializing Portfolio in:", portfolio_dir)
+    port = _portfolio(portfolio_dir)
+    user_agent = user_agent or os.environ.get("SEC_USER_AGENT", SEC_USER_AGENT)
+    # CIK <-> ticker table, cached in cache_dir and refreshed weekly
+    try:
+        ciks = load_ticker_table(cache_dir, user_agent=user_agent).resolve(tickers)
+    except RuntimeError as e:
+        print("Warning:", e)
+        ciks = {}
+
+    # download submissions for tickers
+    print("Downloading filings (this can take a while)...")
+    progress("download", 0, 1, "Downloading filings")
+    with metrics.stage("download"):
+        if downloader == "edgar":
+            from swot.downloader import download_submissions
+
+            summary = download_submissions(portfolio_dir, tickers, forms=forms, date_range=date_range,
+                                           user_agent=user_agent, ciks={t: int(c) for c, t in ciks.items()} or None,
+                                           requests_per_second=requests_per_second, progress=progress)
+            print(f"Downloaded {len(summary['downloaded'])}, already present {len(summary['skipped'])}, "
+                  f"failed {len(summary['failed'])} submission(s).")
+        else:
+            try:
+                port.download_submissions(filing_date=date_range, submission_type=forms, ticker=tickers)
+            except Exception as e:
+                print("Warning: download_submissions raised:", e)
+                # continue; maybe files already present
+
+    # process local submissions (uses datamule's internal caching)
+    progress("submissions", 0, 1, "Processing local submissions")
+    with metrics.stage("submissions"):
+        try:
+            port.process_submissions(lambda s: None)
+        except Exception:
+            # process_submissions may require callback; ignore if fails
+            pass
+
+        # iterate documents of requested type
+        docs = [doc for form in forms for doc in port.document_type(form)]
+    print(f"Found {len(docs)} documents of type {', '.join(forms)} in portfolio.")
+    progress("filings", 0, len(docs), f"Found {len(docs)} filings")
+
+    settings = pipeline_settings(tickers, output_dir, cache_dir, dataset_dir, ciks=ciks, **options)
+    if settings.get("classifier"):
+        print("Using zero-shot classification with", settings["classifier"]["model"])
+    else:
+        print("Using weak supervision keyword-based classification.")
+    run_incremental(docs, settings, workers=workers, progress=progress, metrics=metrics)
+
+    progress("done", 1, 1, "Analysis complete")
+    print("All done. Reports saved to", output_dir)
+
+
+def analyze_uploads(paths, ticker=None, filing_date=None, output_dir=OUTPUT_DIR, workers=UPLOAD_WORKERS,
+                    cache_dir=CACHE_DIR, dataset_dir=SENTENCE_DATASET_DIR, progress=None, user_agent=None,
+                    **options):
+    """Write SWOT reports for uploaded TXT / HTML / PDF files into ``output_dir``.
+
+    ``ticker`` and ``filing_date`` apply to every file; EDGAR submissions
+    bring their own CIK, accession and filing date, and get their ticker from
+    the CIK table. ``options`` go to ``pipeline_settings``. Returns
+    ``(entries, failures)``.
+    """
+    from swot.ingest import ingest_uploads
+    from swot.tickers import load_ticker_table
+
+    progress = progress or (lambda *args: None)
+    ensure_dir(output_dir)
+    progress("filings", 0, len(paths), f"Reading {len(paths)} upload(s)")
+    user_agent = user_agent or os.environ.get("SEC_USER_AGENT", SEC_USER_AGENT)
+    # CIK -> ticker for every SEC filer, cached in cache_dir and refreshed weekly
+    try:
+        ciks = load_ticker_table(cache_dir, user_agent=user_agent).by_cik
+    except RuntimeError as e:
+        print("Warning:", e)
+        ciks = {}
+    settings = pipeline_settings([ticker] if ticker else [], output_dir, cache_dir, dataset_dir, ciks=ciks,
+                                 **options)
+    entries, failures = ingest_uploads(paths, settings, workers=workers, progress=progress, ticker=ticker,
+                                       filing_date=filing_date)
+    progress("done", 1, 1, "Analysis complete")
+    print(f"Processed {len(entries)} upload(s), {len(failures)} failed. Reports saved to", output_dir)
+    return entries, failures
+
+
+def reclassify(tickers=TICKERS, output_dir=OUTPUT_DIR, workers=WORKERS, cache_dir=CACHE_DIR,
+               dataset_dir=SENTENCE_DATASET_DIR, **options):
+    """Re-label cached sentences with the current keywords / classifier / length limits; no download or parse."""
+    from swot.pipeline import rerun_from_cache
+
+    settings = pipeline_settings(tickers, output_dir, cache_dir, dataset_dir, **options)
+    rerun_from_cache(settings, workers=workers)
+    print("Reclassified from stage cache. Reports saved to", output_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download filings and write SWOT reports.")
+    parser.add_argument("tickers", nargs="*", help=f"default: {' '.join(TICKERS)}")
+    parser.add_argument("--upload", nargs="+", metavar="FILE", help="analyze TXT / HTML / PDF files instead")
+    parser.add_argument("--ticker", help="ticker of the uploaded files (EDGAR submissions carry their CIK)")
+    parser.add_argument("--forms", default=",".join(FORMS))
+    parser.add_argument("--start", default=DATE_RANGE[0])
+    parser.add_argument("--end", default=DATE_RANGE[1])
+    parser.add_argument("--workers", type=int, help=f"default: {WORKERS}, {UPLOAD_WORKERS} for uploads")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--reclassify", action="store_true", help="rebuild reports from the stage cache only")
+    args = parser.parse_args(argv)
+    if args.upload:
+        if args.tickers:
+            parser.error("give the ticker of uploaded files with --ticker")
+        analyze_uploads(args.upload, args.ticker, output_dir=args.output_dir, workers=args.workers or UPLOAD_WORKERS)
+        return
+    if args.ticker:
+        parser.error("--ticker only applies to --upload")
+    tickers, workers = args.tickers or TICKERS, args.workers or WORKERS
+    if args.reclassify:
+        reclassify(tickers, args.output_dir, workers)
+    else:
+        analyze_portfolio(tickers, args.forms.split(","), (args.start, args.end), output_dir=args.output_dir,
+                          workers=workers)
+
+
+if __name__ == "__main__":
+    main()
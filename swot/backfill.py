@@ -0,0 +1,622 @@
+"""Universe-wide, multi-form backfill spread over processes and machines.
+
+A backfill is a directory on a filesystem every node can reach (the queue):
+
+    config.json             pipeline and download settings shared by every worker
+    units/<unit>.json       one (ticker, form, date range) work unit each
+    leases/<unit>.lease     held by the worker processing the unit; expires unless renewed
+    done/<unit>.json        the catalog entries the unit produced
+    failed/<unit>.json      attempts so far and the last error
+    merged/<unit>           the unit's entries are in the output catalog
+
+``plan`` expands tickers (or the whole SEC universe) x forms x date range into
+units, with CIKs from the locally cached ticker table (``swot.tickers``).
+Workers (``run_worker``, any number per node) claim a unit by hard-linking a
+lease file into ``leases/``, which succeeds for exactly one of them, also on
+NFS. The lease is renewed in the background while the unit runs; a lease
+that has expired belongs to a stalled or dead worker and the next worker to
+claim the unit breaks it, which counts as a failed attempt. Units that fail
+``max_attempts`` times are left alone and show up in ``status``. Lease expiry
+compares wall clocks, so nodes need roughly synchronized clocks (NTP);
+leases last minutes, not seconds.
+
+Each worker downloads its units' submissions into ``<portfolio_dir>/<cik>/``
+and runs the ordinary incremental pipeline into its own work directory, so
+no SQLite database is ever shared between nodes. ``merge_results`` then
+copies the finished units' CSVs and reports into one output directory and
+updates its catalog, key themes, evidence index and sentence store. Merging
+holds a lease of its own, so only one merge runs at a time; run it where the
+dashboard reads ``output_dir``.
+
+Work is at least once: a worker that loses its lease still records its
+result, and processing a filing twice writes the same files.
+
+Near-duplicate filtering (``dedup``) is not reconciled by the merge. Each
+work directory has its own near-duplicate index, so a sentence group counts
+as boilerplate only once ``boilerplate_tickers`` companies handled by the
+same worker contain it, and a filing diff compares against the previous
+filing of the ticker in that work directory only. A sharded backfill with
+``dedup`` therefore keeps boilerplate that a single run over the same
+filings drops, and a ticker whose units ran on different workers gets no
+diff, or one against an older filing, at the unit boundaries. The merge
+cannot recount the groups, because the CSVs it copies no longer hold what
+each worker dropped. Labels do not differ: the label cache is keyed by
+sentence and rules version, not by work directory.
+
+Run from the repository root, e.g. with four workers on this machine:
+
+    python -m swot.backfill plan --queue backfill --tickers AAPL,MSFT --forms 10-K,10-Q \\
+        --start 2020-01-01 --end 2024-12-31 --keywords keywords.json --user-agent "Name email"
+    python -m swot.backfill run --queue backfill --work-dir backfill_work --workers 4 --output-dir sec_swot_output
+    python -m swot.backfill status --queue backfill
+
+On other nodes sharing the queue, ``python -m swot.backfill work --queue ...``
+runs one worker; ``merge`` folds finished units into the output directory.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from swot.catalog import open_catalog
+from swot.manifest import Manifest, document_hash, merge_index, write_json_atomic
+from swot.pipeline import (index_evidence, make_settings, refresh_key_themes, rules_version, run_incremental,
+                           store_sentences)
+from swot.text import MAX_SENTENCE_LENGTH, MIN_SENTENCE_LENGTH
+from swot.themes import label_term_counts, open_theme_index
+from swot.tickers import load_ticker_table
+
+LEASE_SECONDS = 900
+MAX_ATTEMPTS = 3
+MERGE_LEASE = "_merge"
+PENDING, LEASED, STALLED, DONE, FAILED = "pending", "leased", "stalled", "done", "failed"
+
+
+def unit_id(ticker, form, start=None, end=None):
+    form = re.sub(r"[^A-Za-z0-9]+", "-", form).strip("-")
+    return f"{ticker.upper()}_{form}_{start or 'any'}_{end or 'any'}"
+
+
+def expand_units(tickers, forms, date_range, table, years_per_unit=None):
+    """Work units for every ticker x form x date slice; tickers without a CIK are skipped.
+
+    ``years_per_unit`` splits the date range into slices of that many calendar
+    years; by default each unit covers the whole range, which keeps a
+    ticker's filings together for filing diffs.
+    """
+    start, end = date_range or (None, None)
+    slices = [(start, end)]
+    if years_per_unit and start and end:
+        first, last = int(start[:4]), int(end[:4])
+        slices = [(max(start, f"{y}-01-01"), min(end, f"{min(y + years_per_unit - 1, last)}-12-31"))
+                  for y in range(first, last + 1, years_per_unit)]
+    units = []
+    for cik, ticker in table.resolve(tickers).items():
+        for form in forms:
+            for lo, hi in slices:
+                units.append({"id": unit_id(ticker, form, lo, hi), "ticker": ticker, "cik": cik, "form": form,
+                              "start": lo, "end": hi})
+    return units
+
+
+class Lease:
+    """A claim on one unit (or on merging) until ``expires_at``; renewed by ``keep_alive``."""
+
+    def __init__(self, queue, name, worker, token, expires_at):
+        self.queue = queue
+        self.name = name
+        self.worker = worker
+        self.token = token
+        self.expires_at = expires_at
+        self.lost = False
+
+    @property
+    def path(self):
+        return self.queue.lease_path(self.name)
+
+    def renew(self):
+        """Push the expiry out by another lease period; False if another worker took the lease over."""
+        if self.queue.read_lease(self.name).get("token") != self.token:
+            self.lost = True
+            return False
+        self.expires_at = time.time() + self.queue.lease_seconds
+        self.queue.write_lease(self.path, self._record())
+        return True
+
+    def release(self):
+        if self.queue.read_lease(self.name).get("token") == self.token:
+            self.path.unlink(missing_ok=True)
+
+    def _record(self):
+        return {"name": self.name, "worker": self.worker, "host": socket.gethostname(), "pid": os.getpid(),
+                "token": self.token, "expires_at": self.expires_at}
+
+    @contextmanager
+    def keep_alive(self):
+        """Renew the lease every third of its period until the block exits."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.queue.lease_seconds / 3):
+                if not self.renew():
+                    print(f"Warning: lease on {self.name} was taken over by another worker")
+                    return
+
+        thread = threading.Thread(target=beat, name=f"lease-{self.name}", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+
+class WorkQueue:
+    """Filesystem work queue of backfill units at ``root``."""
+
+    def __init__(self, root, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.root = Path(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for name in ("units", "leases", "done", "failed", "merged"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    # ---------------- setup ----------------
+
+    @property
+    def config(self):
+        with open(self.root / "config.json", "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def set_config(self, config):
+        write_json_atomic(self.root / "config.json", config, indent=2, ensure_ascii=False)
+
+    def add(self, units):
+        """Add ``units`` not yet in the queue; returns how many were new."""
+        added = 0
+        for unit in units:
+            path = self.root / "units" / f"{unit['id']}.json"
+            if not path.exists():
+                write_json_atomic(path, unit)
+                added += 1
+        return added
+
+    def unit(self, name):
+        with open(self.root / "units" / f"{name}.json", "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _names(self, sub, suffix):
+        return {p.name[:len(p.name) - len(suffix)] for p in (self.root / sub).iterdir()
+                if p.name.endswith(suffix) and not p.name.startswith(".")}
+
+    # ---------------- leases ----------------
+
+    def lease_path(self, name):
+        return self.root / "leases" / f"{name}.lease"
+
+    def read_lease(self, name):
+        try:
+            with open(self.lease_path(name), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_lease(self, path, record):
+        tmp = path.with_name(f".{path.name}.{record['token']}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(record, fh)
+        os.replace(tmp, path)
+
+    def acquire(self, name, worker):
+        """A ``Lease`` on ``name``, breaking an expired one; None if someone else holds it."""
+        path = self.lease_path(name)
+        lease = Lease(self, name, worker, uuid.uuid4().hex, time.time() + self.lease_seconds)
+        tmp = path.with_name(f".{path.name}.{lease.token}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(lease._record(), fh)
+        try:
+            for _ in range(2):
+                try:
+                    # link() fails if the lease exists, atomically, on local filesystems and NFS alike
+                    os.link(tmp, path)
+                    return lease
+                except FileExistsError:
+                    held = self.read_lease(name)
+                    if not held or held.get("expires_at", 0) > time.time():
+                        return None
+                    if not self._break(name, held):
+                        return None
+            return None
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def _break(self, name, held):
+        """Move the expired lease ``held`` aside; False if it changed hands in the meantime."""
+        path = self.lease_path(name)
+        broken = path.with_name(f".{path.name}.{uuid.uuid4().hex}.broken")
+        try:
+            os.rename(path, broken)
+        except FileNotFoundError:
+            return True  # released or broken by someone else; try to link again
+        try:
+            with open(broken, "r", encoding="utf-8") as fh:
+                moved = json.load(fh)
+        except ValueError:
+            moved = {}
+        if moved.get("token") != held.get("token"):
+            # a fresh lease was linked after we read the expired one: put it back
+            try:
+                os.link(broken, path)
+            except FileExistsError:
+                pass
+            broken.unlink(missing_ok=True)
+            return False
+        broken.unlink(missing_ok=True)
+        if name != MERGE_LEASE:
+            print(f"Lease on {name} held by {held.get('worker')} expired; retrying the unit")
+            self._record_failure(name, f"lease held by {held.get('worker')} expired", held.get("worker"))
+        return True
+
+    # ---------------- units ----------------
+
+    def _record_failure(self, name, error, worker):
+        path = self.root / "failed" / f"{name}.json"
+        attempts = 0
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as fh:
+                attempts = json.load(fh).get("attempts", 0)
+        write_json_atomic(path, {"attempts": attempts + 1, "error": error, "worker": worker,
+                                 "at": time.strftime("%Y-%m-%dT%H:%M:%S%z")})
+
+    def attempts(self, name):
+        path = self.root / "failed" / f"{name}.json"
+        if not path.exists():
+            return 0
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh).get("attempts", 0)
+
+    def claim(self, worker):
+        """Lease a unit that is neither done, given up on, nor validly leased; None if there is none."""
+        done = self._names("done", ".json")
+        leased = self._names("leases", ".lease")
+        failed = self._names("failed", ".json")
+        now = time.time()
+        candidates = []
+        for name in self._names("units", ".json") - done:
+            if name in failed and self.attempts(name) >= self.max_attempts:
+                continue
+            if name in leased and self.read_lease(name).get("expires_at", 0) > now:
+                continue
+            candidates.append(name)
+        # workers start at different units, so they rarely race for the same lease
+        random.shuffle(candidates)
+        for name in candidates:
+            lease = self.acquire(name, worker)
+            if lease is not None:
+                if (self.root / "done" / f"{name}.json").exists():
+                    lease.release()  # finished while we were looking
+                    continue
+                if self.attempts(name) >= self.max_attempts:
+                    lease.release()  # the lease we broke was the last attempt
+                    continue
+                return lease
+        return None
+
+    def complete(self, lease, result):
+        if lease.lost:
+            print(f"Warning: {lease.name} finished after its lease expired; recording the result anyway")
+        write_json_atomic(self.root / "done" / f"{lease.name}.json",
+                          {**result, "worker": lease.worker, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+                          ensure_ascii=False)
+        lease.release()
+
+    def fail(self, lease, error):
+        self._record_failure(lease.name, error, lease.worker)
+        lease.release()
+
+    def states(self):
+        """``{unit: state}`` with state one of pending, leased, stalled, done or failed."""
+        done = self._names("done", ".json")
+        leased = self._names("leases", ".lease")
+        failed = self._names("failed", ".json")
+        now = time.time()
+        states = {}
+        for name in self._names("units", ".json"):
+            if name in done:
+                states[name] = DONE
+            elif name in leased and self.read_lease(name):
+                states[name] = LEASED if self.read_lease(name).get("expires_at", 0) > now else STALLED
+            elif name in failed and self.attempts(name) >= self.max_attempts:
+                states[name] = FAILED
+            else:
+                states[name] = PENDING
+        return states
+
+    def finished(self):
+        """Whether every unit is done or has used up its attempts."""
+        return all(state in (DONE, FAILED) for state in self.states().values())
+
+
+# ---------------- workers ----------------
+
+def _nodash(accession):
+    return re.sub(r"\D", "", str(accession))
+
+
+def process_unit(unit, config, work_dir, cache_dir=None, filing_workers=1):
+    """Download and analyze one unit's filings into ``work_dir``; returns ``{"entries": [...]}``.
+
+    Raises when a submission cannot be downloaded or a filing fails, so the
+    unit is retried; filings that succeeded are skipped by the manifest then.
+    """
+    from swot.downloader import download_submissions
+    try:
+        from datamule import Portfolio
+    except Exception:
+        raise RuntimeError("datamule is required. Install with: pip install datamule")
+
+    # entries record output paths under work_dir; absolute ones resolve from wherever the merge runs
+    work_dir = Path(work_dir).resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    portfolio_dir = Path(config["portfolio_dir"]) / unit["cik"]
+    date_range = (unit["start"], unit["end"]) if unit.get("start") and unit.get("end") else None
+    summary = download_submissions(portfolio_dir, [unit["ticker"]], forms=[unit["form"]], date_range=date_range,
+                                   user_agent=config["user_agent"],
+                                   requests_per_second=config.get("requests_per_second", 10),
+                                   ciks={unit["ticker"]: int(unit["cik"])})
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} submission(s) failed to download")
+    accessions = {_nodash(a) for a in summary["downloaded"] + summary["skipped"]}
+    if not accessions:
+        return {"entries": []}
+
+    port = Portfolio(str(portfolio_dir))
+    try:
+        port.process_submissions(lambda s: None)
+    except Exception:
+        # process_submissions may require callback; ignore if fails
+        pass
+    # the portfolio directory holds every form and year of this CIK; keep the unit's own filings
+    docs = [doc for doc in port.document_type(unit["form"])
+            if getattr(doc, "accession", None) is None or _nodash(doc.accession) in accessions]
+
+    settings = make_settings(work_dir, config["keywords"], [unit["ticker"]],
+                             config.get("min_len", MIN_SENTENCE_LENGTH), config.get("max_len", MAX_SENTENCE_LENGTH),
+                             labels=config.get("labels"), cache_dir=cache_dir, dataset_dir=config.get("dataset_dir"),
+                             classifier=config.get("classifier"), dedup=config.get("dedup"),
+                             sections=config.get("sections"), ciks={unit["cik"]: unit["ticker"]})
+    hashes = [document_hash(doc) for doc in docs]
+    _, failures = run_incremental(docs, settings, workers=filing_workers, hashes=hashes)
+    if failures:
+        raise RuntimeError(f"{len(failures)} filing(s) failed: {failures[0][1]}")
+    # the unit's entries, including filings an earlier attempt already processed
+    manifest, version = Manifest(work_dir), rules_version(settings)
+    records = [manifest.lookup(h, version) for h in hashes]
+    return {"entries": [rec["entry"] for rec in records if rec and rec.get("entry")]}
+
+
+def run_worker(queue_dir, work_dir, cache_dir=None, worker_id=None, filing_workers=1, lease_seconds=LEASE_SECONDS,
+               max_attempts=MAX_ATTEMPTS, poll_seconds=None, process=process_unit):
+    """Claim and process units until every unit is done or given up on; returns ``{state: units}`` handled.
+
+    While other workers hold the remaining units this worker polls, so it
+    picks them up if their leases expire. ``process(unit, config, work_dir,
+    cache_dir, filing_workers)`` does the work.
+    """
+    queue = WorkQueue(queue_dir, lease_seconds, max_attempts)
+    work_dir = Path(work_dir).resolve()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    poll_seconds = poll_seconds or min(30.0, lease_seconds / 4)
+    config = queue.config
+    handled = {DONE: 0, FAILED: 0}
+    while True:
+        lease = queue.claim(worker_id)
+        if lease is None:
+            if queue.finished():
+                return handled
+            time.sleep(poll_seconds)
+            continue
+        unit = queue.unit(lease.name)
+        print(f"[{worker_id}] {lease.name}: {unit['ticker']} {unit['form']} {unit.get('start')}..{unit.get('end')}")
+        try:
+            with lease.keep_alive():
+                result = process(unit, config, work_dir, cache_dir, filing_workers)
+        except Exception as e:
+            print(f"Warning: [{worker_id}] {lease.name} failed: {type(e).__name__}: {e}")
+            queue.fail(lease, f"{type(e).__name__}: {e}")
+            handled[FAILED] += 1
+            continue
+        queue.complete(lease, result)
+        handled[DONE] += 1
+
+
+def _copy_into(path, output_dir):
+    """``path`` copied (atomically) into ``output_dir`` unless it is already there."""
+    src = Path(path)
+    dest = Path(output_dir) / src.name
+    if src.resolve() != dest.resolve():
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    return str(dest)
+
+
+def merge_results(queue_dir, output_dir, lease_seconds=LEASE_SECONDS):
+    """Fold every finished, not yet merged unit into ``output_dir``; returns the filings merged.
+
+    CSVs, reports and diffs are copied into ``output_dir``. Key themes are
+    re-scored against the merged corpus, so they match what a single run over
+    all filings would produce. A unit whose output files cannot be found is
+    left unmerged and reported, so a later merge picks it up once the files
+    are reachable. Returns None if another merge is running.
+    """
+    queue = WorkQueue(queue_dir, lease_seconds)
+    lease = queue.acquire(MERGE_LEASE, f"merge-{socket.gethostname()}-{os.getpid()}")
+    if lease is None:
+        print("Another merge is running; try again when it has finished.")
+        return None
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        with lease.keep_alive():
+            names, missing = [], {}
+            by_accession = {}
+            for name in sorted(queue._names("done", ".json") - queue._names("merged", "")):
+                with open(queue.root / "done" / f"{name}.json", "r", encoding="utf-8") as fh:
+                    unit_entries = json.load(fh).get("entries", [])
+                lost = [str(e["accession"]) for e in unit_entries
+                        if not e.get("csv") or any(e.get(key) and not Path(e[key]).exists()
+                                                   for key in ("csv", "json", "diff"))]
+                if lost:
+                    missing[name] = lost
+                    continue
+                names.append(name)
+                for entry in unit_entries:
+                    by_accession[str(entry["accession"])] = entry
+            entries = []
+            for entry in by_accession.values():
+                entry = dict(entry)
+                for key in ("csv", "json", "diff"):
+                    if entry.get(key):
+                        entry[key] = _copy_into(entry[key], output_dir)
+                entries.append(entry)
+
+            with open_theme_index(output_dir) as theme_index:
+                for e in entries:
+                    records = pd.read_csv(e["csv"], usecols=["sentence", "label"], keep_default_na=False)
+                    theme_index.add_filing(e["accession"], label_term_counts(records.to_dict("records")))
+            refresh_key_themes(output_dir, entries)
+            index_evidence(output_dir, entries)
+            store_sentences(output_dir, entries)
+            with open_catalog(output_dir) as catalog:
+                catalog.upsert(entries)
+            merge_index(output_dir, entries)
+            for name in names:
+                (queue.root / "merged" / name).touch()
+    finally:
+        lease.release()
+    print(f"Merged {len(entries)} filing(s) from {len(names)} unit(s) into {output_dir}")
+    for name, accessions in missing.items():
+        print(f"Warning: {name} not merged; output of {len(accessions)} filing(s) is missing, e.g. {accessions[0]}")
+    return len(entries)
+
+
+def status(queue_dir):
+    """``{state: count}`` over the queue's units."""
+    counts = {state: 0 for state in (PENDING, LEASED, STALLED, DONE, FAILED)}
+    for state in WorkQueue(queue_dir).states().values():
+        counts[state] += 1
+    return counts
+
+
+def plan(queue_dir, tickers, forms, date_range, keywords, user_agent, portfolio_dir, table_dir=None,
+         years_per_unit=None, requests_per_second=10, **pipeline_options):
+    """Write the queue's config and add a unit per ticker x form x date slice; returns units added.
+
+    ``tickers`` may be ``"all"`` for every company in SEC's ticker table.
+    ``requests_per_second`` applies to each worker process, so divide SEC's
+    limit of 10 by the number of workers across all nodes. ``pipeline_options``
+    are ``make_settings`` keywords (``min_len``, ``max_len``, ``labels``,
+    ``dataset_dir``, ``classifier``, ``dedup``, ``sections``).
+    """
+    queue = WorkQueue(queue_dir)
+    table = load_ticker_table(table_dir or queue_dir, user_agent=user_agent)
+    if tickers == "all":
+        tickers = table.tickers()
+    queue.set_config({"keywords": keywords, "user_agent": user_agent, "portfolio_dir": str(portfolio_dir),
+                      "requests_per_second": requests_per_second, **pipeline_options})
+    return queue.add(expand_units(tickers, forms, date_range, table, years_per_unit))
+
+
+def run_local(queue_dir, work_dir, workers=2, cache_dir=None, output_dir=None, filing_workers=1,
+              lease_seconds=LEASE_SECONDS, process=process_unit):
+    """Run ``workers`` worker processes on this machine, then merge into ``output_dir`` if given."""
+    host = socket.gethostname()
+    procs = [multiprocessing.Process(target=run_worker, name=f"backfill-{i}",
+                                     args=(queue_dir, Path(work_dir) / f"{host}-{i}", cache_dir, f"{host}-{i}",
+                                           filing_workers, lease_seconds),
+                                     kwargs={"process": process})
+             for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    if output_dir:
+        merge_results(queue_dir, output_dir, lease_seconds)
+    return status(queue_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m swot.backfill", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan", help="create or extend a backfill queue")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--tickers", required=True, help="comma-separated, or 'all' for SEC's whole ticker table")
+    p.add_argument("--forms", default="10-K")
+    p.add_argument("--start")
+    p.add_argument("--end")
+    p.add_argument("--years-per-unit", type=int)
+    p.add_argument("--keywords", required=True, help="JSON file of {label: [keywords]}")
+    p.add_argument("--user-agent", default=os.environ.get("SEC_USER_AGENT"))
+    p.add_argument("--portfolio-dir", default="sec_portfolio")
+    p.add_argument("--requests-per-second", type=float, default=10, help="per worker process")
+    p.add_argument("--dataset-dir", help="shared Parquet sentence dataset")
+    p.add_argument("--sections", help="comma-separated 10-K Items, e.g. 1,1A,7,7A")
+
+    for name, help_text in (("work", "run one worker"), ("run", "run several workers here, then merge")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--queue", required=True)
+        p.add_argument("--work-dir", required=True, help="pipeline output of this node's workers")
+        p.add_argument("--cache-dir", help="stage and label cache shared by this node's workers")
+        p.add_argument("--filing-workers", type=int, default=1, help="process pool size per worker")
+        p.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+        if name == "work":
+            p.add_argument("--worker-id")
+        else:
+            p.add_argument("--workers", type=int, default=2)
+            p.add_argument("--output-dir")
+
+    p = sub.add_parser("merge", help="fold finished units into an output directory")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--output-dir", required=True)
+
+    p = sub.add_parser("status", help="count units by state")
+    p.add_argument("--queue", required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == "plan":
+        with open(args.keywords, "r", encoding="utf-8") as fh:
+            keywords = json.load(fh)
+        tickers = "all" if args.tickers == "all" else [t.strip() for t in args.tickers.split(",") if t.strip()]
+        options = {k: v for k, v in (("dataset_dir", args.dataset_dir),
+                                     ("sections", args.sections and args.sections.split(","))) if v}
+        added = plan(args.queue, tickers, args.forms.split(","), (args.start, args.end) if args.start else None,
+                     keywords, args.user_agent, args.portfolio_dir, years_per_unit=args.years_per_unit,
+                     requests_per_second=args.requests_per_second, **options)
+        print(f"Added {added} unit(s) to {args.queue}")
+    elif args.command == "work":
+        worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        run_worker(args.queue, Path(args.work_dir) / worker_id, args.cache_dir, worker_id,
+                   args.filing_workers, args.lease_seconds)
+    elif args.command == "run":
+        run_local(args.queue, args.work_dir, args.workers, args.cache_dir, args.output_dir,
+                  args.filing_workers, args.lease_seconds)
+    elif args.command == "merge":
+        merge_results(args.queue, args.output_dir)
+    print(json.dumps(status(args.queue)))
+
+
+if __name__ == "__main__":
+    main()
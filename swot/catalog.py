@@ -0,0 +1,269 @@
+"""SQLite catalog of generated reports.
+
+One row per accession with the report metadata and output paths, indexed on
+ticker, CIK and filing date. The database runs in WAL mode so the dashboard
+can read while ``analyze_portfolio`` (or several of them) write.
+``open_catalog`` imports an existing ``index.json`` the first time it sees
+an output directory.
+
+``label_rollups`` is a materialized rollup with one row per filing and SWOT
+label: sentence count and share, mean score, scored key themes and evidence
+IDs (``<accession>:<row>``, the row of the sentence in the filing's CSV). It
+is rewritten per filing whenever the pipeline (re)writes a report, so the
+trend and peer views never open report files.
+"""
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+from swot.db import chunks, connect
+
+CATALOG_NAME = "catalog.sqlite3"
+
+FIELDS = ("accession", "ticker", "cik", "filing_date", "csv", "json")
+ROLLUP_FIELDS = ("accession", "label", "ticker", "filing_date", "count", "share", "mean_score", "themes", "evidence")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    accession   TEXT PRIMARY KEY,
+    ticker      TEXT,
+    cik         TEXT,
+    filing_date TEXT,
+    csv         TEXT,
+    json        TEXT,
+    extra       TEXT,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_ticker_date ON reports (ticker, filing_date);
+CREATE INDEX IF NOT EXISTS reports_cik ON reports (cik);
+CREATE INDEX IF NOT EXISTS reports_filing_date ON reports (filing_date);
+CREATE TABLE IF NOT EXISTS label_rollups (
+    accession   TEXT NOT NULL,
+    label       TEXT NOT NULL,
+    ticker      TEXT,
+    filing_date TEXT,
+    count       INTEGER NOT NULL,
+    share       REAL,
+    mean_score  REAL,
+    themes      TEXT,
+    evidence    TEXT,
+    PRIMARY KEY (accession, label)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS label_rollups_ticker_date ON label_rollups (ticker, filing_date);
+CREATE INDEX IF NOT EXISTS label_rollups_label_date ON label_rollups (label, filing_date);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Catalog:
+    """Thin wrapper around a SQLite connection; use as a context manager."""
+
+    def __init__(self, path, timeout=30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = connect(self.path, timeout, autocommit=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- writes ----------------
+
+    def upsert(self, entries):
+        """Insert or replace index entries (dicts as written to ``index.json``)."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = []
+        for e in entries:
+            if not e.get("accession"):
+                continue
+            extra = {k: v for k, v in e.items() if k not in FIELDS}
+            rows.append((
+                str(e["accession"]), e.get("ticker"),
+                None if e.get("cik") is None else str(e["cik"]),
+                e.get("filing_date"), e.get("csv"), e.get("json"),
+                json.dumps(extra, ensure_ascii=False) if extra else None, now,
+            ))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO reports (accession, ticker, cik, filing_date, csv, json, extra, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(accession) DO UPDATE SET ticker=excluded.ticker, cik=excluded.cik, "
+                "filing_date=excluded.filing_date, csv=excluded.csv, json=excluded.json, "
+                "extra=excluded.extra, updated_at=excluded.updated_at",
+                rows,
+            )
+        return len(rows)
+
+    def upsert_rollups(self, rows):
+        """Replace the rollup rows of every accession in ``rows``.
+
+        ``themes`` is a list of ``[term, score]`` pairs and ``evidence`` a list
+        of evidence IDs. A filing's labels are replaced together, so a label
+        that no longer occurs does not keep a stale row.
+        """
+        rows = [r for r in rows if r.get("accession")]
+        accessions = sorted({str(r["accession"]) for r in rows})
+        values = [(
+            str(r["accession"]), r["label"], r.get("ticker"), r.get("filing_date"), int(r["count"]),
+            r.get("share"), r.get("mean_score"),
+            json.dumps(r.get("themes") or [], ensure_ascii=False), json.dumps(r.get("evidence") or []),
+        ) for r in rows]
+        with self.conn:
+            for chunk in chunks(accessions):
+                self.conn.execute(f"DELETE FROM label_rollups WHERE accession IN ({','.join('?' * len(chunk))})",
+                                  chunk)
+            self.conn.executemany(f"INSERT INTO label_rollups ({', '.join(ROLLUP_FIELDS)}) "
+                                  f"VALUES ({', '.join('?' * len(ROLLUP_FIELDS))})", values)
+        return len(values)
+
+    def import_index_json(self, index_file):
+        """Load an ``index.json`` list into the catalog; returns the number of rows."""
+        with open(index_file, 'r', encoding='utf-8') as fh:
+            return self.upsert(json.load(fh))
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---------------- queries ----------------
+
+    @staticmethod
+    def _where(ticker=None, cik=None, start_date=None, end_date=None):
+        clauses, params = [], []
+        if ticker:
+            clauses.append("ticker = ?")
+            params.append(ticker)
+        if cik:
+            clauses.append("cik = ?")
+            params.append(str(cik))
+        if start_date:
+            clauses.append("filing_date >= ?")
+            params.append(str(start_date))
+        if end_date:
+            clauses.append("filing_date <= ?")
+            params.append(str(end_date))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @staticmethod
+    def _entry(row):
+        entry = {k: row[k] for k in FIELDS}
+        if row["extra"]:
+            entry.update(json.loads(row["extra"]))
+        return entry
+
+    def query(self, ticker=None, cik=None, start_date=None, end_date=None, limit=50, offset=0):
+        """One page of reports, newest filing first."""
+        where, params = self._where(ticker, cik, start_date, end_date)
+        rows = self.conn.execute(
+            f"SELECT * FROM reports{where} ORDER BY filing_date DESC, accession LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset)),
+        )
+        return [self._entry(r) for r in rows]
+
+    def count(self, ticker=None, cik=None, start_date=None, end_date=None):
+        where, params = self._where(ticker, cik, start_date, end_date)
+        return self.conn.execute(f"SELECT COUNT(*) FROM reports{where}", params).fetchone()[0]
+
+    def get(self, accession):
+        row = self.conn.execute("SELECT * FROM reports WHERE accession = ?", (str(accession),)).fetchone()
+        return self._entry(row) if row else None
+
+    def fingerprint(self):
+        """Changes whenever a report is added or rewritten; part of export cache keys."""
+        row = self.conn.execute("SELECT COUNT(*), MAX(updated_at) FROM reports").fetchone()
+        return f"{row[0]}:{row[1]}"
+
+    def tickers(self):
+        rows = self.conn.execute("SELECT DISTINCT ticker FROM reports WHERE ticker IS NOT NULL ORDER BY ticker")
+        return [r[0] for r in rows]
+
+    def date_bounds(self):
+        """``(earliest, latest)`` filing date in the catalog, or ``(None, None)``."""
+        row = self.conn.execute("SELECT MIN(filing_date), MAX(filing_date) FROM reports").fetchone()
+        return row[0], row[1]
+
+    # ---------------- rollups ----------------
+
+    @staticmethod
+    def _rollup(row):
+        rollup = {k: row[k] for k in ROLLUP_FIELDS}
+        rollup["themes"] = json.loads(rollup["themes"]) if rollup["themes"] else []
+        rollup["evidence"] = json.loads(rollup["evidence"]) if rollup["evidence"] else []
+        return rollup
+
+    @staticmethod
+    def _rollup_where(tickers=None, labels=None, start_date=None, end_date=None, prefix=""):
+        clauses, params = [], []
+        for column, values in (("ticker", tickers), ("label", labels)):
+            if values:
+                values = [values] if isinstance(values, str) else list(values)
+                clauses.append(f"{prefix}{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if start_date:
+            clauses.append(f"{prefix}filing_date >= ?")
+            params.append(str(start_date))
+        if end_date:
+            clauses.append(f"{prefix}filing_date <= ?")
+            params.append(str(end_date))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def rolled_up(self, accessions):
+        """The subset of ``accessions`` that already have rollup rows."""
+        accessions = [str(a) for a in accessions]
+        found = set()
+        for chunk in chunks(accessions):
+            rows = self.conn.execute(
+                f"SELECT DISTINCT accession FROM label_rollups WHERE accession IN ({','.join('?' * len(chunk))})",
+                chunk)
+            found.update(r[0] for r in rows)
+        return found
+
+    def label_trends(self, tickers=None, labels=None, start_date=None, end_date=None):
+        """Rollup rows per filing and label, oldest filing first; for trends over time."""
+        where, params = self._rollup_where(tickers, labels, start_date, end_date)
+        rows = self.conn.execute(f"SELECT * FROM label_rollups{where} ORDER BY ticker, filing_date, label", params)
+        return [self._rollup(r) for r in rows]
+
+    def peer_snapshot(self, tickers=None, labels=None, start_date=None, end_date=None):
+        """Rollup rows of each ticker's latest filing in the date range; for peer comparison."""
+        where, params = self._rollup_where(tickers, None, start_date, end_date)
+        label_where, label_params = self._rollup_where(None, labels, prefix="r.")
+        label_where = label_where.replace(" WHERE ", " AND ", 1)
+        rows = self.conn.execute(
+            "WITH filings AS (SELECT DISTINCT ticker, filing_date, accession FROM label_rollups"
+            f"{where}), "
+            "latest AS (SELECT ticker, accession, "
+            "ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY filing_date DESC, accession DESC) AS n FROM filings) "
+            "SELECT r.* FROM label_rollups r JOIN latest l ON l.accession = r.accession "
+            f"WHERE l.n = 1{label_where} ORDER BY r.ticker, r.label",
+            (*params, *label_params),
+        )
+        return [self._rollup(r) for r in rows]
+
+
+def open_catalog(output_dir):
+    """Open ``<output_dir>/catalog.sqlite3``, importing ``index.json`` once if present."""
+    catalog = Catalog(Path(output_dir) / CATALOG_NAME)
+    index_file = Path(output_dir) / "index.json"
+    if catalog.get_meta("index_json_imported") is None:
+        if index_file.exists():
+            n = catalog.import_index_json(index_file)
+            print(f"Imported {n} report(s) from {index_file} into the catalog.")
+        catalog.set_meta("index_json_imported", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    return catalog
@@ -0,0 +1,226 @@
+"""Batched zero-shot (NLI) sentence classifier for CPU inference.
+
+Each sentence is paired with one hypothesis per label ("This text describes a
+company strength.", ...) and scored by a local NLI checkpoint; the entailment
+logits are softmaxed across labels, so every sentence gets a probability per
+label instead of the keyword matcher's 1.0/0.0.
+
+Throughput comes from:
+
+* length bucketing: sentences are sorted by token length before batching, so
+  a batch is padded to roughly its own length instead of the longest sentence
+* dynamic batching: a batch grows until ``batch_tokens`` padded tokens or
+  ``max_batch`` pairs, so short sentences run in large batches and long ones
+  in small batches
+* int8 inference: ``quantize_dynamic`` on the torch model's Linear layers, or a
+  dynamically quantized ONNX graph run by ONNX Runtime
+* a bounded thread pool of ``workers`` batches in flight, each using
+  ``threads // workers`` intra-op threads
+
+Models are loaded with ``local_files_only`` so nothing is fetched over the
+network. transformers plus torch (``backend="torch"``) or onnxruntime
+(``backend="onnx"``) are optional and only imported when a classifier is
+created, so importing this module stays cheap; ``available()`` reports whether
+a backend can be used.
+"""
+import importlib
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx")
+_BACKEND_MODULES = {"torch": "torch", "onnx": "onnxruntime"}
+DEFAULT_HYPOTHESIS = "This text describes a company {}."
+ONNX_NAME = "model.onnx"
+ONNX_QUANTIZED_NAME = "model_quantized.onnx"
+
+
+def available(backend="torch"):
+    return all(importlib.util.find_spec(name) is not None
+               for name in ("transformers", _BACKEND_MODULES.get(backend, backend)))
+
+
+def _require(backend):
+    """Import and return ``(transformers, backend module)``."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown classifier backend {backend!r}; expected one of {BACKENDS}")
+    if not available(backend):
+        extra = _BACKEND_MODULES[backend]
+        raise RuntimeError(f"transformers and {extra} are required for the zero-shot classifier. "
+                           f"Install with: pip install transformers {extra}")
+    return importlib.import_module("transformers"), importlib.import_module(_BACKEND_MODULES[backend])
+
+
+def _entailment_index(config):
+    for name, idx in config.label2id.items():
+        if name.lower().startswith("entail"):
+            return int(idx)
+    raise ValueError(f"model has no entailment label: {sorted(config.label2id)}")
+
+
+def _softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def length_buckets(lengths, pairs_per_item, extra_tokens, batch_tokens, max_batch):
+    """Split item indices into batches of similar length.
+
+    ``lengths`` are the token lengths of the items; each item expands to
+    ``pairs_per_item`` rows of ``length + extra_tokens`` tokens. A batch is
+    closed when its padded size would exceed ``batch_tokens`` or it would
+    hold more than ``max_batch`` rows. Items too long for any batch get one
+    of their own.
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    batches, batch, longest = [], [], 0
+    for i in order.tolist():
+        padded = max(longest, lengths[i] + extra_tokens)
+        rows = (len(batch) + 1) * pairs_per_item
+        if batch and (rows * padded > batch_tokens or rows > max_batch):
+            batches.append(batch)
+            batch, padded = [], lengths[i] + extra_tokens
+        batch.append(i)
+        longest = padded
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class ZeroShotClassifier:
+    """Per-label probabilities for sentences from a local NLI checkpoint; use as a context manager.
+
+    ``model_path`` is a directory with the tokenizer, config and either the
+    torch weights or ``model.onnx`` (``model_quantized.onnx`` is written next
+    to it on first use when ``quantize`` is set).
+    """
+
+    def __init__(self, model_path, labels, hypothesis_template=DEFAULT_HYPOTHESIS, backend="torch",
+                 quantize=True, batch_tokens=8192, max_batch=64, max_length=256, threads=None, workers=2):
+        self._transformers, self._backend = _require(backend)
+        self.model_path = Path(model_path)
+        self.labels = list(labels)
+        self.backend = backend
+        self.batch_tokens = batch_tokens
+        self.max_batch = max_batch
+        self.max_length = max_length
+        self.workers = max(1, workers)
+        threads = threads or os.cpu_count() or 1
+        self.intra_threads = max(1, threads // self.workers)
+
+        transformers = self._transformers
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(str(self.model_path), local_files_only=True)
+        self.entailment = _entailment_index(
+            transformers.AutoConfig.from_pretrained(str(self.model_path), local_files_only=True))
+        self.hypotheses = [hypothesis_template.format(label.lower()) for label in self.labels]
+        # [CLS] sentence [SEP] [SEP] hypothesis [SEP]; the longest hypothesis bounds every pair
+        self._pair_tokens = max(len(self.tokenizer.encode(h, add_special_tokens=False)) for h in self.hypotheses) + 4
+
+        if backend == "onnx":
+            self._session = self._load_onnx(quantize)
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            self._run = self._run_onnx
+        else:
+            self._model = self._load_torch(quantize)
+            self._run = self._run_torch
+
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="zero-shot")
+        self._lock = threading.Lock()
+        self.sentences = 0
+        self.seconds = 0.0
+
+    # ---------------- backends ----------------
+
+    def _load_torch(self, quantize):
+        torch = self._backend
+        torch.set_num_threads(self.intra_threads)
+        model = self._transformers.AutoModelForSequenceClassification.from_pretrained(
+            str(self.model_path), local_files_only=True)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def _load_onnx(self, quantize):
+        ort = self._backend
+        path = self.model_path / ONNX_NAME
+        if quantize:
+            quantized = self.model_path / ONNX_QUANTIZED_NAME
+            if not quantized.exists() and path.exists():
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                tmp = quantized.with_suffix(".tmp")
+                quantize_dynamic(str(path), str(tmp), weight_type=QuantType.QInt8)
+                os.replace(tmp, quantized)
+            if quantized.exists():
+                path = quantized
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found; export the checkpoint to ONNX first")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    def _encode(self, sentences, return_tensors):
+        premises = [s for s in sentences for _ in self.hypotheses]
+        hypotheses = self.hypotheses * len(sentences)
+        return self.tokenizer(premises, hypotheses, padding="longest", truncation="only_first",
+                              max_length=self.max_length, return_tensors=return_tensors)
+
+    def _run_torch(self, sentences):
+        inputs = self._encode(sentences, "pt")
+        with self._backend.inference_mode():
+            logits = self._model(**inputs).logits
+        return logits[:, self.entailment].float().numpy()
+
+    def _run_onnx(self, sentences):
+        inputs = self._encode(sentences, "np")
+        feed = {k: v.astype(np.int64) for k, v in inputs.items() if k in self._input_names}
+        logits = self._session.run(None, feed)[0]
+        return logits[:, self.entailment].astype(np.float32)
+
+    # ---------------- classification ----------------
+
+    def batches(self, sentences):
+        """Length-bucketed batches of sentence indices, in the order they will be run."""
+        lengths = [len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False, truncation=True,
+                                                      max_length=self.max_length)["input_ids"]]
+        return length_buckets(lengths, len(self.labels), self._pair_tokens, self.batch_tokens, self.max_batch)
+
+    def classify(self, sentences):
+        """``(len(sentences), len(labels))`` array of label probabilities; rows sum to 1."""
+        sentences = list(sentences)
+        probs = np.zeros((len(sentences), len(self.labels)), dtype=np.float32)
+        if not sentences:
+            return probs
+        start = time.perf_counter()
+        futures = [(batch, self._pool.submit(self._run, [sentences[i] for i in batch]))
+                   for batch in self.batches(sentences)]
+        for batch, fut in futures:
+            probs[batch] = _softmax(fut.result().reshape(len(batch), len(self.labels)))
+        with self._lock:
+            self.sentences += len(sentences)
+            self.seconds += time.perf_counter() - start
+        return probs
+
+    def throughput(self):
+        """Sentences classified so far, wall-clock seconds spent and sentences/second."""
+        with self._lock:
+            rate = self.sentences / self.seconds if self.seconds else 0.0
+            return {"sentences": self.sentences, "seconds": self.seconds, "sentences_per_second": rate}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,146 @@
+"""Consolidated, partitioned Parquet dataset of labelled sentences.
+
+Every processed filing appends one Parquet file to a single dataset laid out
+as ``<dataset_dir>/ticker=<TICKER>/year=<YYYY>/<accession>-0.parquet``.
+Readers go through ``pyarrow.dataset`` so only the requested columns are read
+and partitions (ticker, year) and row filters are pushed down instead of
+loading every per-filing CSV.
+
+pyarrow is optional; ``available()`` reports whether it is installed.
+"""
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional dependency
+    pa = ds = None
+
+COLUMNS = ["ticker", "cik", "accession", "filing_date", "part_id", "section", "sentence", "label", "score"]
+PARTITIONS = ["ticker", "year"]
+
+
+def available():
+    return pa is not None
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the sentence dataset. Install with: pip install pyarrow")
+
+
+def _schema():
+    return pa.schema([
+        ("cik", pa.string()),
+        ("accession", pa.string()),
+        ("filing_date", pa.string()),
+        ("part_id", pa.string()),
+        ("section", pa.string()),
+        ("sentence", pa.string()),
+        ("label", pa.string()),
+        ("score", pa.float32()),
+        ("ticker", pa.string()),
+        ("year", pa.string()),
+    ])
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("ticker", pa.string()), ("year", pa.string())]), flavor="hive")
+
+
+def write_filing(dataset_dir, meta, records):
+    """Write one filing's labelled ``records`` into the dataset.
+
+    The file name is derived from the accession, so re-processing a filing
+    replaces its file instead of appending duplicates; files it left in
+    another partition (its ticker or year changed) are deleted. Returns the
+    paths of the files written.
+    """
+    _require()
+    for old in filing_paths(dataset_dir, meta.get("accession") or "unknown"):
+        old.unlink(missing_ok=True)
+    n = len(records)
+    year = str(meta.get("filing_date") or "")[:4] or "unknown"
+
+    def const(value):
+        return [None if value is None else str(value)] * n
+
+    table = pa.table({
+        "cik": const(meta.get("cik")),
+        "accession": const(meta.get("accession")),
+        "filing_date": const(meta.get("filing_date")),
+        "part_id": [r.get("part_id") for r in records],
+        "section": [r.get("section") for r in records],
+        "sentence": [r["sentence"] for r in records],
+        "label": [r["label"] for r in records],
+        "score": [r["score"] for r in records],
+        "ticker": const(meta.get("ticker") or "UNKNOWN"),
+        "year": [year] * n,
+    }, schema=_schema())
+    paths = []
+    ds.write_dataset(
+        table, str(dataset_dir), format="parquet", partitioning=_partitioning(),
+        basename_template=f"{meta.get('accession') or 'unknown'}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda written: paths.append(written.path),
+    )
+    return paths
+
+
+def filing_paths(dataset_dir, accession):
+    """The dataset files holding ``accession``, in whichever partition they were written."""
+    return sorted(Path(dataset_dir).glob(f"ticker=*/year=*/{accession}-*.parquet"))
+
+
+def open_dataset(dataset_dir):
+    _require()
+    # the explicit schema reads files written before a column existed as nulls
+    return ds.dataset(str(dataset_dir), schema=_schema(), format="parquet", partitioning=_partitioning())
+
+
+def sentence_filter(tickers=None, years=None, accessions=None, labels=None, start_date=None, end_date=None,
+                    sections=None):
+    """Build a pushdown filter expression; ``None`` arguments are not filtered on.
+
+    ``start_date`` and ``end_date`` bound ``filing_date`` (inclusive ISO dates);
+    when ``years`` is not given they also prune the year partitions.
+    """
+    _require()
+    if years is None and start_date and end_date:
+        years = range(int(str(start_date)[:4]), int(str(end_date)[:4]) + 1)
+    expr = None
+    for column, values in (("ticker", tickers), ("year", years), ("accession", accessions), ("label", labels),
+                           ("section", sections)):
+        if values is None:
+            continue
+        if isinstance(values, (str, int)):
+            values = [values]
+        clause = ds.field(column).isin([str(v) for v in values])
+        expr = clause if expr is None else expr & clause
+    for clause in ((ds.field("filing_date") >= str(start_date)) if start_date else None,
+                   (ds.field("filing_date") <= str(end_date)) if end_date else None):
+        if clause is not None:
+            expr = clause if expr is None else expr & clause
+    return expr
+
+
+def scan_sentences(dataset_dir, columns=None, batch_size=64_000, **filters):
+    """Yield ``pyarrow.RecordBatch`` chunks of the matching rows and columns."""
+    if not Path(dataset_dir).exists():
+        return
+    scanner = open_dataset(dataset_dir).scanner(
+        columns=columns, filter=sentence_filter(**filters), batch_size=batch_size)
+    yield from scanner.to_batches()
+
+
+def read_sentences(dataset_dir, columns=None, **filters):
+    """Matching rows as a pandas DataFrame (empty if the dataset does not exist yet).
+
+    ``filters`` are the keyword arguments of ``sentence_filter``.
+    """
+    _require()
+    if not Path(dataset_dir).exists():
+        import pandas as pd
+        return pd.DataFrame(columns=columns or COLUMNS)
+    table = open_dataset(dataset_dir).to_table(columns=columns, filter=sentence_filter(**filters))
+    return table.to_pandas()
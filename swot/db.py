@@ -0,0 +1,42 @@
+"""SQLite connection setup shared by the catalog, caches and indexes.
+
+Every database runs in WAL mode with ``synchronous=NORMAL`` so the dashboard
+and pool workers read while another process writes. The pipeline's indexes
+open their connections in autocommit mode and group each write in
+``write_txn``, which takes the write lock up front (``BEGIN IMMEDIATE``) so
+concurrent writers queue instead of interleaving.
+"""
+import sqlite3
+from contextlib import contextmanager
+
+# SQLite's default limit on host parameters per statement is 999
+CHUNK = 900
+
+
+def connect(path, timeout=60.0, autocommit=True):
+    """WAL-mode connection to ``path`` that waits up to ``timeout`` seconds for locks."""
+    options = {"isolation_level": None} if autocommit else {}
+    conn = sqlite3.connect(str(path), timeout=timeout, **options)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+@contextmanager
+def write_txn(conn):
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` on an autocommit connection, rolled back on any exception."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def chunks(items, size=CHUNK):
+    """``items`` in lists of at most ``size``, for ``IN (?, ...)`` queries."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -0,0 +1,251 @@
+"""Concurrent, rate-limited EDGAR submission downloader.
+
+Fills a datamule Portfolio directory the same way ``Portfolio.download_submissions``
+does with the SEC provider: one ``<accession without dashes>.tar`` per
+submission, written by datamule's SGML-to-tar writer, so ``Portfolio`` loads the
+result unchanged.
+
+* one pooled ``aiohttp`` session for all requests
+* a token bucket shared by every request keeps us under SEC's 10 requests/s
+* 429/5xx responses and connection errors are retried with exponential
+  backoff (``Retry-After`` is honoured)
+* submission bodies are streamed to ``.<accession>.sgml.part`` and resumed with
+  an HTTP Range request after an interruption
+* submissions whose tar already exists are skipped (deduplicated by accession)
+
+All base URLs are parameters so the downloader can run against a local
+stand-in server (see ``benchmarks/bench_downloader.py`` and ``tests/test_downloader.py``).
+"""
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+
+import aiohttp
+
+SEC_WWW = "https://www.sec.gov"
+SEC_DATA = "https://data.sec.gov"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DownloadError(Exception):
+    pass
+
+
+class _Retry(Exception):
+    """Transient HTTP status; ``retry_after`` is the server's hint in seconds, if any."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _accession_nodash(accession):
+    return str(accession).replace('-', '')
+
+
+def _accession_dashed(accession):
+    a = _accession_nodash(accession)
+    return f"{a[:10]}-{a[10:12]}-{a[12:]}" if len(a) == 18 else str(accession)
+
+
+class EdgarDownloader:
+    """Download the submissions of ``tickers`` into ``portfolio_dir``."""
+
+    def __init__(self, portfolio_dir, user_agent, requests_per_second=10, max_connections=8,
+                 max_retries=5, backoff=0.5, timeout=60, www_base=SEC_WWW, data_base=SEC_DATA,
+                 keep_document_types=None):
+        self.portfolio_dir = Path(portfolio_dir)
+        self.user_agent = user_agent
+        self.requests_per_second = requests_per_second
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.www_base = www_base.rstrip('/')
+        self.data_base = data_base.rstrip('/')
+        self.keep_document_types = keep_document_types or []
+        self.stats = {"requests": 0, "retries": 0, "resumed": 0, "bytes": 0}
+
+    # ---------------- HTTP ----------------
+
+    async def _get(self, session, bucket, url, dest=None):
+        """GET ``url`` with rate limiting and retries; bytes, or ``dest`` if streaming to a file."""
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            offset = dest.stat().st_size if dest is not None and dest.exists() else 0
+            headers = {}
+            if dest is not None:
+                # byte offsets of a partial file only line up with an unencoded body
+                headers["Accept-Encoding"] = "identity"
+                if offset:
+                    headers["Range"] = f"bytes={offset}-"
+            try:
+                self.stats["requests"] += 1
+                async with session.get(url, headers=headers) as resp:
+                    if resp.status in RETRY_STATUSES:
+                        raise _Retry(f"HTTP {resp.status}", resp.headers.get("Retry-After"))
+                    if resp.status == 416 and offset:
+                        # the partial file is already complete
+                        return dest
+                    if resp.status >= 400:
+                        raise DownloadError(f"HTTP {resp.status} for {url}")
+                    if dest is None:
+                        body = await resp.read()
+                        self.stats["bytes"] += len(body)
+                        return body
+                    if resp.status == 206:
+                        self.stats["resumed"] += 1
+                    with open(dest, 'ab' if resp.status == 206 else 'wb') as fh:
+                        async for chunk in resp.content.iter_chunked(1 << 16):
+                            fh.write(chunk)
+                            self.stats["bytes"] += len(chunk)
+                    return dest
+            except (_Retry, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise DownloadError(f"{url}: {type(e).__name__}: {e}") from e
+                self.stats["retries"] += 1
+                try:
+                    delay = float(e.retry_after)
+                except (AttributeError, TypeError, ValueError):
+                    delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                await asyncio.sleep(delay)
+
+    async def _get_json(self, session, bucket, url):
+        return json.loads(await self._get(session, bucket, url))
+
+    # ---------------- discovery ----------------
+
+    async def resolve_ciks(self, session, bucket, tickers):
+        """``{ticker: cik}`` from SEC's company_tickers.json."""
+        data = await self._get_json(session, bucket, f"{self.www_base}/files/company_tickers.json")
+        table = {row["ticker"].upper(): int(row["cik_str"]) for row in data.values()}
+        missing = [t for t in tickers if t.upper() not in table]
+        if missing:
+            print("Warning: no CIK found for", ", ".join(missing))
+        return {t: table[t.upper()] for t in tickers if t.upper() in table}
+
+    async def list_filings(self, session, bucket, cik, forms=None, date_range=None):
+        """Filings of ``cik`` matching ``forms`` and ``(start, end)`` filing dates."""
+        start, end = date_range or (None, None)
+        data = await self._get_json(session, bucket, f"{self.data_base}/submissions/CIK{int(cik):010d}.json")
+        pages = [data["filings"]["recent"]]
+        for extra in data["filings"].get("files", []):
+            # older filings live in extra pages; fetch only those overlapping the range
+            if start and extra.get("filingTo") and extra["filingTo"] < start:
+                continue
+            if end and extra.get("filingFrom") and extra["filingFrom"] > end:
+                continue
+            pages.append(await self._get_json(session, bucket, f"{self.data_base}/submissions/{extra['name']}"))
+
+        filings = []
+        for page in pages:
+            for accession, filing_date, form in zip(page["accessionNumber"], page["filingDate"], page["form"]):
+                if forms and form not in forms:
+                    continue
+                if (start and filing_date < start) or (end and filing_date > end):
+                    continue
+                filings.append({"cik": int(cik), "accession": accession, "filing_date": filing_date, "form": form})
+        return filings
+
+    # ---------------- submissions ----------------
+
+    def tar_path(self, accession):
+        return self.portfolio_dir / f"{_accession_nodash(accession)}.tar"
+
+    def _write_tar(self, part, tar):
+        # same writer datamule's own SEC downloader uses
+        from datamule.sec.submissions.downloader import write_sgml_file_to_tar
+        tmp = tar.with_name(f".{tar.name}.tmp")
+        write_sgml_file_to_tar(str(tmp), input_path=str(part), filter_document_types=self.keep_document_types)
+        tmp.replace(tar)
+        part.unlink()
+
+    async def download_submission(self, session, bucket, filing):
+        """Fetch one submission; returns ``"downloaded"`` or ``"skipped"``."""
+        tar = self.tar_path(filing["accession"])
+        if tar.exists():
+            return "skipped"
+        part = self.portfolio_dir / f".{_accession_nodash(filing['accession'])}.sgml.part"
+        url = f"{self.www_base}/Archives/edgar/data/{filing['cik']}/{_accession_dashed(filing['accession'])}.txt"
+        await self._get(session, bucket, url, dest=part)
+        await asyncio.to_thread(self._write_tar, part, tar)
+        return "downloaded"
+
+    async def run(self, tickers=None, forms=None, date_range=None, filings=None, progress=None, ciks=None):
+        """Download every matching submission; returns a summary dict.
+
+        Pass ``filings`` (dicts with ``cik`` and ``accession``) to skip discovery,
+        or ``ciks`` (``{ticker: cik}``, e.g. from ``swot.tickers``) to skip the
+        company_tickers.json lookup.
+        """
+        self.portfolio_dir.mkdir(parents=True, exist_ok=True)
+        bucket = TokenBucket(self.requests_per_second)
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        headers = {"User-Agent": self.user_agent}
+        summary = {"downloaded": [], "skipped": [], "failed": []}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            if filings is None:
+                if ciks is None:
+                    ciks = await self.resolve_ciks(session, bucket, tickers or [])
+                listed = await asyncio.gather(*(self.list_filings(session, bucket, cik, forms, date_range)
+                                                for cik in ciks.values()))
+                filings = [f for group in listed for f in group]
+
+            # the same accession can be listed under several filers
+            unique = list({_accession_nodash(f["accession"]): f for f in filings}.values())
+            sem = asyncio.Semaphore(self.max_connections)
+            done = 0
+
+            async def one(filing):
+                nonlocal done
+                async with sem:
+                    try:
+                        outcome = await self.download_submission(session, bucket, filing)
+                    except Exception as e:
+                        outcome = "failed"
+                        print(f"Warning: download of {filing['accession']} failed: {e}")
+                done += 1
+                summary[outcome].append(filing["accession"])
+                if progress:
+                    progress("download", done, len(unique), f"{done}/{len(unique)} submissions")
+
+            await asyncio.gather(*(one(f) for f in unique))
+
+        summary["stats"] = dict(self.stats)
+        return summary
+
+
+def download_submissions(portfolio_dir, tickers, forms=None, date_range=None, user_agent=None,
+                         progress=None, ciks=None, **kwargs):
+    """Blocking wrapper around ``EdgarDownloader.run``."""
+    if not user_agent:
+        raise ValueError("SEC requires a User-Agent with contact details, e.g. 'Name email@example.com'")
+    downloader = EdgarDownloader(portfolio_dir, user_agent, **kwargs)
+    return asyncio.run(downloader.run(tickers=tickers, forms=forms, date_range=date_range, progress=progress,
+                                      ciks=ciks))
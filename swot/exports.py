@@ -0,0 +1,263 @@
+"""Filtered, streamed and compressed exports of pipeline output.
+
+Exports are written chunk by chunk to ``<output_dir>/exports/`` and never
+held in memory as a whole: sentences are scanned in record batches from the
+Parquet sentence dataset when it exists (falling back to reading the
+per-filing CSVs in chunks), reports are copied one file at a time, and PDFs
+are laid out page by page. Every export is cached under a key built from its
+query and the catalog's fingerprint, so asking for the same export again
+returns the existing file until a report is added or rewritten.
+
+Compression is ``None``, ``"gzip"`` or ``"zstd"`` (needs the optional
+``zstandard`` package; see ``available_compressions``).
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from swot import columnar
+from swot.catalog import open_catalog
+from swot.pdf import TextPdf
+from swot.reportfile import read_report
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+EXPORTS_DIR = "exports"
+FORMATS = ("csv", "jsonl")
+COMPRESSIONS = (None, "gzip", "zstd")
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+MIME_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "pdf": "application/pdf",
+              "gzip": "application/gzip", "zstd": "application/zstd"}
+EXPORT_COLUMNS = ["ticker", "accession", "filing_date", "section", "sentence", "label", "score"]
+CHUNK_ROWS = 50_000
+MAX_CACHED = 50  # oldest exports beyond this many are deleted
+
+LABEL_COLORS = {"Strength": (0.22, 0.63, 0.41), "Weakness": (0.90, 0.24, 0.24),
+                "Opportunity": (0.26, 0.60, 0.88), "Threat": (0.93, 0.54, 0.21)}
+
+
+def available_compressions():
+    return [c for c in COMPRESSIONS if c != "zstd" or zstandard is not None]
+
+
+def mime_type(fmt, compression=None):
+    return MIME_TYPES[compression or fmt]
+
+
+def _open_compressed(path, compression):
+    if compression is None:
+        return open(path, "wb")
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required for zstd exports. Install with: pip install zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"))
+    raise ValueError(f"unknown compression {compression!r}; expected one of {COMPRESSIONS}")
+
+
+def _key(**query):
+    return hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+
+
+def _prune(exports_dir, keep=MAX_CACHED):
+    files = sorted((p for p in exports_dir.iterdir() if p.is_file() and not p.name.endswith(".tmp")),
+                   key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in files[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def _cached(output_dir, name, write, build=True):
+    """``<output_dir>/exports/<name>``, calling ``write(tmp_path)`` first if it does not exist.
+
+    Returns None when the export is not cached and ``build`` is false.
+    """
+    exports_dir = Path(output_dir) / EXPORTS_DIR
+    path = exports_dir / name
+    if path.exists():
+        return path
+    if not build:
+        return None
+    exports_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    _prune(exports_dir)
+    return path
+
+
+def _as_list(values):
+    if values is None:
+        return None
+    return [values] if isinstance(values, str) else sorted(str(v) for v in values)
+
+
+def iter_entries(output_dir, tickers=None, start_date=None, end_date=None, accessions=None, page_size=500):
+    """Catalog entries matching the filters, paged so the catalog is never read whole."""
+    with open_catalog(output_dir) as catalog:
+        if accessions is not None:
+            for accession in accessions:
+                entry = catalog.get(accession)
+                if entry:
+                    yield entry
+            return
+        for ticker in tickers or [None]:
+            offset = 0
+            while True:
+                page = catalog.query(ticker=ticker, start_date=start_date, end_date=end_date,
+                                     limit=page_size, offset=offset)
+                yield from page
+                if len(page) < page_size:
+                    break
+                offset += page_size
+
+
+def iter_sentence_chunks(output_dir, dataset_dir=None, tickers=None, labels=None, start_date=None, end_date=None,
+                         accessions=None, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of ``EXPORT_COLUMNS`` for the matching labelled sentences."""
+    if dataset_dir and columnar.available() and Path(dataset_dir).exists():
+        for batch in columnar.scan_sentences(dataset_dir, columns=EXPORT_COLUMNS, batch_size=chunk_rows,
+                                             tickers=tickers, labels=labels, accessions=accessions,
+                                             start_date=start_date, end_date=end_date):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+    import pandas as pd
+    for entry in iter_entries(output_dir, tickers, start_date, end_date, accessions):
+        if not entry.get("csv") or not Path(entry["csv"]).exists():
+            continue
+        for chunk in pd.read_csv(entry["csv"], chunksize=chunk_rows):
+            if labels is not None:
+                chunk = chunk[chunk["label"].isin(labels)]
+            if chunk.empty:
+                continue
+            chunk.insert(0, "filing_date", entry.get("filing_date"))
+            chunk.insert(0, "accession", entry["accession"])
+            chunk.insert(0, "ticker", entry.get("ticker"))
+            # CSVs written before sections were tracked have no section column
+            yield chunk.reindex(columns=EXPORT_COLUMNS)
+
+
+def export_sentences(output_dir, fmt="csv", compression="gzip", dataset_dir=None, tickers=None, labels=None,
+                     start_date=None, end_date=None, accessions=None, build=True):
+    """Path of a sentence export matching the filters, written first if not cached.
+
+    ``fmt`` is ``"csv"`` or ``"jsonl"``. With ``build=False`` returns None
+    instead of writing an export that is not cached yet.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {FORMATS}")
+    query = {"tickers": _as_list(tickers), "labels": _as_list(labels), "accessions": _as_list(accessions),
+             "start_date": start_date, "end_date": end_date}
+    with open_catalog(output_dir) as catalog:
+        fingerprint = catalog.fingerprint()
+    key = _key(kind="sentences", fmt=fmt, compression=compression, fingerprint=fingerprint,
+               dataset=bool(dataset_dir and columnar.available() and Path(dataset_dir).exists()), **query)
+
+    def write(path):
+        with _open_compressed(path, compression) as fh:
+            header = True
+            for chunk in iter_sentence_chunks(output_dir, dataset_dir, **query):
+                if fmt == "csv":
+                    fh.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+                else:
+                    fh.write(chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n")
+                             .encode("utf-8") + b"\n")
+                header = False
+            if header and fmt == "csv":
+                fh.write((",".join(EXPORT_COLUMNS) + "\n").encode("utf-8"))
+
+    return _cached(output_dir, f"sentences-{key}.{fmt}{SUFFIXES[compression]}", write, build)
+
+
+def export_reports(output_dir, compression="gzip", tickers=None, start_date=None, end_date=None, accessions=None,
+                   build=True):
+    """Path of a JSON Lines export with one ``{"meta", "report"}`` object per matching filing."""
+    query = {"tickers": _as_list(tickers), "accessions": _as_list(accessions),
+             "start_date": start_date, "end_date": end_date}
+    with open_catalog(output_dir) as catalog:
+        fingerprint = catalog.fingerprint()
+    key = _key(kind="reports", compression=compression, fingerprint=fingerprint, **query)
+
+    def write(path):
+        with _open_compressed(path, compression) as fh:
+            for entry in iter_entries(output_dir, **query):
+                if not entry.get("json") or not Path(entry["json"]).exists():
+                    continue
+                fh.write(json.dumps(read_report(entry["json"]), ensure_ascii=False).encode("utf-8") + b"\n")
+
+    return _cached(output_dir, f"reports-{key}.jsonl{SUFFIXES[compression]}", write, build)
+
+
+def render_report_pdf(path, report_data, diff=None, labels=None):
+    """Lay out one SWOT report (and its filing diff, if any) as a PDF at ``path``."""
+    meta = report_data.get("meta", {})
+    report = report_data.get("report", {})
+    labels = labels or list(report)
+    title = f"{meta.get('ticker', 'UNKNOWN')} SWOT Analysis"
+    with TextPdf(path, title=title) as pdf:
+        pdf.text(title, size=20, font="bold", color=(0.17, 0.26, 0.40))
+        pdf.text(f"Accession {meta.get('accession')}  |  Filed {meta.get('filing_date') or 'N/A'}  |  "
+                 f"CIK {meta.get('cik') or 'N/A'}", size=10, color=(0.4, 0.4, 0.4))
+        pdf.space(8)
+        pdf.text("Summary", size=14, font="bold")
+        for lab in labels:
+            if lab in report:
+                pdf.text(f"{lab}: {report[lab].get('summary', report[lab].get('count', 0))}", indent=12)
+
+        for lab in labels:
+            section = report.get(lab)
+            if section is None:
+                continue
+            pdf.space(10)
+            pdf.text(lab, size=14, font="bold", color=LABEL_COLORS.get(lab, (0, 0, 0)))
+            details = f"{section.get('count', 0)} sentences"
+            if section.get("share") is not None:
+                details += f" ({section['share']:.0%} of labelled sentences)"
+            if section.get("mean_score") is not None:
+                details += f", mean score {section['mean_score']:.2f}"
+            pdf.text(details, color=(0.4, 0.4, 0.4))
+            if section.get("key_themes"):
+                pdf.text("Key themes: " + ", ".join(section["key_themes"]), font="bold")
+            for bullet in section.get("top_bullets", []):
+                pdf.space(2)
+                pdf.text(f"- {bullet}", indent=12)
+
+        if diff:
+            previous = diff.get("previous", {})
+            pdf.space(10)
+            pdf.text("Changes Since Last Filing", size=14, font="bold")
+            pdf.text(f"Compared with {previous.get('accession')} filed {previous.get('filing_date') or 'N/A'}: "
+                     + ", ".join(f"{diff['counts'][k]} {k}" for k in ("new", "removed", "changed")),
+                     color=(0.4, 0.4, 0.4))
+            for heading, sentences in (("New", diff.get("new", [])), ("Removed", diff.get("removed", []))):
+                if sentences:
+                    pdf.text(heading, font="bold")
+                    for sentence in sentences[:10]:
+                        pdf.text(f"- {sentence}", indent=12)
+
+
+def export_pdf(output_dir, entry, labels=None, build=True):
+    """Path of the PDF for one catalog ``entry``, rendered first if the report changed since."""
+    sources = [p for p in (entry.get("json"), entry.get("diff")) if p and Path(p).exists()]
+    if not entry.get("json") or entry["json"] not in sources:
+        raise FileNotFoundError(f"report for {entry.get('accession')} not found")
+    key = _key(kind="pdf", labels=_as_list(labels), sources=[(p, os.stat(p).st_mtime_ns) for p in sources])
+
+    def write(path):
+        report_data = read_report(entry["json"], parts=("counts", "themes", "evidence"))
+        diff = None
+        if entry.get("diff") in sources:
+            with open(entry["diff"], "r", encoding="utf-8") as fh:
+                diff = json.load(fh)
+        render_report_pdf(path, report_data, diff, labels)
+
+    return _cached(output_dir, f"report-{entry.get('ticker')}-{entry['accession']}-{key}.pdf", write, build)
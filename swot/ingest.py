@@ -0,0 +1,321 @@
+"""Stream uploaded filings (TXT, HTML, PDF) into the pipeline in bounded memory.
+
+An ``UploadedFiling`` wraps a file on disk and goes through
+``run_incremental`` like a datamule document. Its text is never held whole:
+
+- TXT is decoded block by block with an incremental decoder
+- HTML (and EDGAR ``.txt`` submissions, which are SGML around HTML or plain
+  text) is fed block by block to an incremental tokenizer (``html.parser``)
+  that keeps text and drops markup, ``<script>``/``<style>``/``<head>``, the
+  SEC header, inline XBRL headers and non-narrative documents of a
+  submission (graphics, ZIPs, spreadsheets, XBRL exhibits); plain text and
+  ``<pre>`` keep their line breaks
+- PDF text is extracted page by page with pypdf (optional) from an open
+  file, dropping pypdf's object cache every ``PDF_CACHE_PAGES`` pages; its
+  cross-reference table and page tree still grow slowly with the page count
+
+The text is re-cut into fragments of about ``FRAGMENT_CHARS`` at paragraph
+or line breaks, tagged with its 10-K Item by ``swot.sections.SectionSplitter``
+and spooled to a temporary file, because the pipeline needs the section
+spans before the first fragment. The fragments are then read back from the
+spool into the usual clean -> split -> classify -> report stages. Memory
+stays at a read block (``READ_BYTES``) and a fragment whatever the file
+size (plus pypdf's page tree for PDFs); downstream, the pipeline keeps only the
+labelled records.
+
+Metadata comes from the SEC header when the file has one (accession, CIK,
+filing date), otherwise from the caller; an upload without an accession
+number gets ``upload-<hash>``.
+"""
+import codecs
+import hashlib
+import importlib.util
+import json
+import re
+import tempfile
+from contextlib import nullcontext
+from datetime import date
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+
+from swot.manifest import file_hash
+from swot import sections as sections_module
+from swot.sections import SectionSplitter
+from swot.stages import code_version
+
+FORMATS = ("txt", "html", "pdf")
+READ_BYTES = 1 << 20
+FRAGMENT_CHARS = 1 << 16
+PDF_CACHE_PAGES = 20
+SNIFF_BYTES = 1 << 16
+
+# text inside these tags is never analysed
+SKIP_TAGS = {"script", "style", "head", "title", "sec-header", "ims-header", "ix:header", "xbrl"}
+# SGML tags of an EDGAR submission whose value is metadata, not text
+VALUE_TAGS = {"type", "sequence", "filename", "description"}
+BLOCK_TAGS = {"p", "div", "br", "hr", "tr", "li", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6",
+              "section", "article", "blockquote", "pre", "document", "text", "page", "center"}
+# documents of a submission that hold no narrative text
+SKIP_TYPES = ("GRAPHIC", "ZIP", "EXCEL", "PDF", "XML", "JSON", "EX-101", "XBRL")
+
+_MARKUP = re.compile(rb"<(?:!doctype|html|sec-document|document|\?xml)\b", re.I)
+_HEADER_FIELDS = {
+    "accession": re.compile(r"ACCESSION NUMBER:\s*([\d-]+)"),
+    "cik": re.compile(r"CENTRAL INDEX KEY:\s*(\d+)"),
+    "filing_date": re.compile(r"FILED AS OF DATE:\s*(\d{8})"),
+    "form": re.compile(r"CONFORMED SUBMISSION TYPE:\s*(\S+)"),
+    "company": re.compile(r"COMPANY CONFORMED NAME:\s*(.+?)\s*$", re.M),
+}
+
+
+def available_formats():
+    """The upload formats that can be read with the installed packages."""
+    return [fmt for fmt in FORMATS if fmt != "pdf" or importlib.util.find_spec("pypdf") is not None]
+
+
+def detect_format(path):
+    """``"pdf"``, ``"html"`` or ``"txt"`` from the file's first bytes (and its suffix)."""
+    with open(path, "rb") as fh:
+        head = fh.read(1024)
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if Path(path).suffix.lower() in (".htm", ".html", ".xhtml") or _MARKUP.search(head):
+        return "html"
+    return "txt"
+
+
+def sniff_metadata(path):
+    """Accession, CIK, filing date, form and company from an EDGAR SEC header, where present."""
+    with open(path, "rb") as fh:
+        head = fh.read(SNIFF_BYTES).decode("utf-8", "replace")
+    meta = {}
+    for field, pattern in _HEADER_FIELDS.items():
+        match = pattern.search(head)
+        if match:
+            meta[field] = match.group(1)
+    if "filing_date" in meta:
+        d = meta["filing_date"]
+        meta["filing_date"] = f"{d[:4]}-{d[4:6]}-{d[6:]}"
+    if "accession" in meta:
+        meta["accession"] = meta["accession"].replace("-", "")
+    if "cik" in meta:
+        meta["cik"] = str(int(meta["cik"]))
+    return meta
+
+
+def _decoded_blocks(path, encoding="utf-8"):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_BYTES), b""):
+            yield decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_txt(path):
+    """The text of a plain text file, one decoded block at a time."""
+    yield from _decoded_blocks(path)
+
+
+class _HtmlText(HTMLParser):
+    """Incremental HTML/SGML tokenizer collecting visible text in ``pieces``."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces = []
+        self._skip = 0
+        self._value = None
+        self._skip_document = False
+        self._pre = 0
+        # inside a submission's <TEXT>: None until its first content shows whether it is markup or plain text
+        self._plain = False
+
+    def _markup(self):
+        if self._plain is None:
+            self._plain = False
+
+    def handle_starttag(self, tag, attrs):
+        self._markup()
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in VALUE_TAGS:
+            self._value = tag
+        elif tag == "document":
+            self._skip_document = False
+        elif tag == "text":
+            self._plain = None
+        elif tag == "pre":
+            self._pre += 1
+        if tag in BLOCK_TAGS:
+            self.pieces.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag == "document":
+            self._skip_document = False
+        elif tag == "text":
+            self._plain = False
+        elif tag == "pre" and self._pre:
+            self._pre -= 1
+        if tag in BLOCK_TAGS:
+            self.pieces.append("\n")
+
+    def handle_decl(self, decl):
+        self._markup()
+
+    def handle_pi(self, data):
+        self._markup()
+
+    def handle_data(self, data):
+        if self._value is not None:
+            if self._value == "type":
+                doc_type = (data.split() or [""])[0].upper()
+                self._skip_document = doc_type.startswith(SKIP_TYPES)
+            self._value = None
+            return
+        if self._plain is None and data.strip():
+            self._plain = True
+        if not self._skip and not self._skip_document:
+            if self._plain or self._pre:
+                # plain text and <pre> lay out their lines themselves
+                self.pieces.append(re.sub(r"[^\S\n]+", " ", data.replace("\r\n", "\n")))
+            else:
+                # whitespace inside markup is layout; line breaks come from block tags
+                self.pieces.append(re.sub(r"\s+", " ", data))
+
+    def drain(self):
+        text = "".join(self.pieces)
+        self.pieces = []
+        return text
+
+
+def iter_html(path):
+    """The visible text of an HTML file or EDGAR submission, one fed block at a time."""
+    parser = _HtmlText()
+    for block in _decoded_blocks(path):
+        parser.feed(block)
+        yield parser.drain()
+    parser.close()
+    yield parser.drain()
+
+
+def iter_pdf(path):
+    """The text of a PDF, one page at a time; needs pypdf."""
+    if "pdf" not in available_formats():
+        raise RuntimeError("pypdf is required for PDF uploads. Install with: pip install pypdf")
+    from pypdf import PdfReader
+
+    # an open file, not a path: given a path pypdf reads the whole file into memory
+    with open(path, "rb") as fh:
+        reader = PdfReader(fh)
+        for i, page in enumerate(reader.pages):
+            yield (page.extract_text() or "") + "\n\n"
+            if (i + 1) % PDF_CACHE_PAGES == 0:
+                # resolved objects (content streams, fonts) are otherwise cached for the reader's lifetime
+                reader.resolved_objects.clear()
+
+
+READERS = {"txt": iter_txt, "html": iter_html, "pdf": iter_pdf}
+
+
+def _cut(text, start, size):
+    """End of the fragment of ``text`` that starts at ``start``."""
+    end = start + size
+    for sep in ("\n\n", "\n", ". ", " "):
+        at = text.rfind(sep, start + size // 2, end)
+        if at >= 0:
+            return at + len(sep)
+    return end
+
+
+def iter_fragments(pieces, size=FRAGMENT_CHARS):
+    """Re-cut a stream of text pieces into fragments of at most ``size`` characters.
+
+    A fragment ends at its last paragraph break, else line break, else
+    sentence end or space in its second half, so sentences are rarely cut;
+    text without any of those is cut at ``size``.
+    """
+    buf, n = [], 0
+    for piece in pieces:
+        if not piece:
+            continue
+        buf.append(piece)
+        n += len(piece)
+        if n < size:
+            continue
+        text, start = "".join(buf), 0
+        while len(text) - start >= size:
+            cut = _cut(text, start, size)
+            yield text[start:cut]
+            start = cut
+        buf, n = [text[start:]], len(text) - start
+    tail = "".join(buf)
+    if tail:
+        yield tail
+
+
+class UploadedFiling:
+    """An uploaded file processed like a datamule document; picklable, so it runs on the process pool.
+
+    ``content_hash`` covers the file's bytes and the extraction code, so
+    changing the readers re-extracts uploads instead of reusing cached text.
+    """
+
+    def __init__(self, path, ticker=None, filing_date=None, cik=None, accession=None, fmt=None):
+        self.path = str(path)
+        self.fmt = fmt or detect_format(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"unsupported upload format {self.fmt!r}; expected one of {', '.join(FORMATS)}")
+        header = sniff_metadata(path) if self.fmt != "pdf" else {}
+        self.content_hash = hashlib.sha256(
+            f"{file_hash(path)}:{_extraction_version()}".encode("utf-8")).hexdigest()
+        # the SEC header, where there is one, describes the file better than defaults for a whole batch
+        self.accession = header.get("accession") or accession or f"upload-{self.content_hash[:16]}"
+        self.cik = header.get("cik") or cik
+        self.ticker = ticker.upper() if ticker else None
+        self.filing_date = header.get("filing_date") or filing_date or date.today().isoformat()
+        self.form = header.get("form")
+
+    def __repr__(self):
+        return f"UploadedFiling({Path(self.path).name!r}, {self.fmt}, {self.accession})"
+
+    def metadata(self):
+        """The fields ``swot.pipeline.raw_metadata`` reads from a datamule document."""
+        return {"accession": self.accession, "cik": self.cik, "filing_date": self.filing_date, "ticker": self.ticker}
+
+    def iter_fragments(self, metrics=None):
+        """The pipeline's text stream: metadata with section spans, then ``["t", part_id, text, section]``."""
+        splitter = SectionSplitter()
+        part_id = Path(self.path).name
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            with metrics.stage("parse") if metrics is not None else nullcontext():
+                for text in iter_fragments(READERS[self.fmt](self.path)):
+                    for section, piece in splitter.split(text):
+                        spool.write(json.dumps([section, piece], ensure_ascii=False))
+                        spool.write("\n")
+            yield {**self.metadata(), "sections": splitter.finish()}
+            spool.seek(0)
+            for line in spool:
+                section, piece = json.loads(line)
+                yield ["t", part_id, piece, section]
+
+
+@lru_cache(maxsize=None)
+def _extraction_version():
+    return code_version(iter_txt, _HtmlText, iter_html, iter_pdf, _cut, iter_fragments, sections_module,
+                        UploadedFiling.iter_fragments)
+
+
+def ingest_uploads(paths, settings, workers=1, progress=None, **meta):
+    """Process uploaded files with ``settings`` into the output index; returns ``(entries, failures)``.
+
+    ``meta`` (``ticker``, ``filing_date``, ``cik``) applies to every file;
+    an SEC header's CIK and filing date take precedence. With ``workers > 1`` files are
+    processed concurrently on a process pool, each in bounded memory.
+    """
+    from swot.pipeline import run_incremental
+
+    docs = [UploadedFiling(path, **meta) for path in paths]
+    return run_incremental(docs, settings, workers=min(workers, len(docs)) or 1,
+                           hashes=[doc.content_hash for doc in docs], progress=progress)
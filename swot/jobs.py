@@ -0,0 +1,130 @@
+"""In-process background job queue for long-running pipeline calls.
+
+The dashboard keeps a single ``JobRunner`` per server process, so jobs keep
+running across Streamlit reruns and every session can poll them. Submitting
+the same parameters while an identical job is still queued or running returns
+that job instead of starting a second one.
+"""
+import itertools
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    """Status of one submitted call; updated by the worker thread."""
+
+    def __init__(self, job_id, key, params):
+        self.id = job_id
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.error = None
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def progress(self, stage, done=0, total=0, message=""):
+        """Progress callback handed to the pipeline: ``progress(stage, done, total, message)``."""
+        with self._lock:
+            self.stage = stage
+            self.done = done
+            self.total = total
+            self.message = message
+
+    @property
+    def fraction(self):
+        if self.status == DONE:
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id, "params": self.params, "status": self.status,
+                "stage": self.stage, "done": self.done, "total": self.total,
+                "message": self.message, "error": self.error,
+                "submitted_at": self.submitted_at, "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobRunner:
+    """Run ``target(**params, progress=job.progress)`` on a small thread pool."""
+
+    def __init__(self, target, max_workers=1, keep_finished=50):
+        self.target = target
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swot-job")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._active = {}
+
+    @staticmethod
+    def job_key(params):
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def submit(self, **params):
+        """Queue a job, or return the queued/running job with identical parameters."""
+        key = self.job_key(params)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            job = Job(next(self._ids), key, params)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            result = self.target(**job.params, progress=job.progress)
+            with job._lock:
+                job.result = result
+                # finished_at first: _prune sorts finished jobs by it
+                job.finished_at = time.time()
+                job.status = DONE
+        except Exception as e:
+            with job._lock:
+                job.error = f"{type(e).__name__}: {e}"
+                job.message = traceback.format_exc()
+                job.finished_at = time.time()
+                job.status = FAILED
+        finally:
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:-self.keep_finished or None]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All known jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.id, reverse=True)
@@ -0,0 +1,166 @@
+"""Content-addressed cache of sentence labels, shared across filings.
+
+Consecutive 10-Ks repeat most of their boilerplate, so a sentence is
+classified once per rule or model version and its result reused everywhere.
+Entries are keyed on a hash of the normalized sentence (lower case, collapsed
+whitespace) plus that version, and hold the label (None for sentences no
+rule matched), the score and the match details.
+
+Two tiers:
+
+* an in-process LRU (``memory_size`` entries) so repeats within a worker never
+  touch the disk
+* a SQLite database (``<cache_dir>/sentence_labels.sqlite3``, WAL mode so pool
+  workers share it) bounded to ``max_entries``; the least recently used rows
+  are evicted when it grows past that
+
+``stats()`` reports hits per tier and misses.
+"""
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from swot.db import chunks, connect, write_txn
+
+LABEL_CACHE_NAME = "sentence_labels.sqlite3"
+
+_SPACE = re.compile(r'\s+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    key     BLOB PRIMARY KEY,
+    label   TEXT,
+    score   REAL NOT NULL,
+    details TEXT,
+    used    INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS labels_used ON labels (used);
+CREATE TABLE IF NOT EXISTS label_cache_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO label_cache_meta (key, value) VALUES ('entries', 0);
+"""
+
+
+def normalize(sentence):
+    return _SPACE.sub(' ', sentence).strip().lower()
+
+
+def sentence_key(sentence, version):
+    """16-byte key of ``sentence`` under a rule / model ``version``."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(version).encode('utf-8'))
+    h.update(b'\0')
+    h.update(normalize(sentence).encode('utf-8'))
+    return h.digest()
+
+
+class LabelCache:
+    """Two-tier ``key -> {"label", "score", "details"}`` cache; use as a context manager."""
+
+    def __init__(self, path, max_entries=2_000_000, memory_size=100_000, timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+        # autocommit; writes go through write_txn so the entry count stays exact
+        self.conn = connect(self.path, timeout)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """``{key: value}`` for the cached ``keys``; disk hits are marked as recently used."""
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            value = self._memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                self._memory.move_to_end(key)
+                found[key] = value
+        self.memory_hits += len(found)
+
+        from_disk = []
+        for chunk in chunks(missing):
+            rows = self.conn.execute(
+                f"SELECT key, label, score, details FROM labels WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, label, score, details in rows:
+                value = {"label": label, "score": score, "details": json.loads(details) if details else None}
+                found[key] = value
+                from_disk.append(key)
+                self._remember(key, value)
+        self.disk_hits += len(from_disk)
+        self.misses += len(missing) - len(from_disk)
+
+        if from_disk:
+            now = int(time.time())
+            conn = self.conn
+            with write_txn(conn):
+                conn.executemany("UPDATE labels SET used = ? WHERE key = ?", [(now, k) for k in from_disk])
+        return found
+
+    def put_many(self, items):
+        """Store ``(key, value)`` pairs, then evict the least recently used rows beyond ``max_entries``."""
+        items = list(items)
+        if not items:
+            return
+        now = int(time.time())
+        for key, value in items:
+            self._remember(key, value)
+
+        conn = self.conn
+        with write_txn(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO labels (key, label, score, details, used) VALUES (?, ?, ?, ?, ?)",
+                [(key, v["label"], v["score"],
+                  None if v.get("details") is None else json.dumps(v["details"], ensure_ascii=False), now)
+                 for key, v in items],
+            )
+            added = conn.total_changes - before
+            conn.execute("UPDATE label_cache_meta SET value = value + ? WHERE key = 'entries'", (added,))
+            entries = conn.execute("SELECT value FROM label_cache_meta WHERE key = 'entries'").fetchone()[0]
+            if entries > self.max_entries:
+                # evict down to 90% so eviction runs once per batch of growth, not on every put
+                excess = entries - int(self.max_entries * 0.9)
+                before = conn.total_changes
+                conn.execute("DELETE FROM labels WHERE key IN (SELECT key FROM labels ORDER BY used LIMIT ?)",
+                             (excess,))
+                evicted = conn.total_changes - before
+                conn.execute("UPDATE label_cache_meta SET value = value - ? WHERE key = 'entries'", (evicted,))
+                self.evictions += evicted
+
+    def __len__(self):
+        return self.conn.execute("SELECT value FROM label_cache_meta WHERE key = 'entries'").fetchone()[0]
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+def open_label_cache(cache_dir, **kwargs):
+    return LabelCache(Path(cache_dir) / LABEL_CACHE_NAME, **kwargs)
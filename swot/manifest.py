@@ -0,0 +1,140 @@
+"""Run manifest: which filings were processed, from what input, with which rules.
+
+The manifest is an append-only JSON-lines journal in the output directory.
+Each completed filing appends one record as soon as it finishes, so an
+interrupted backfill resumes from the last finished filing. Later records for
+the same accession replace earlier ones when the journal is loaded.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.jsonl"
+INDEX_NAME = "index.json"
+
+
+def document_hash(doc):
+    """SHA-256 of a datamule document's raw content, or None if unavailable."""
+    content = getattr(doc, 'content', None)
+    if content is None:
+        path = getattr(doc, 'path', None)
+        if path and Path(path).is_file():
+            return file_hash(path)
+        return None
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of the file at ``path``, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_json_atomic(path, data, **kwargs):
+    """Write JSON to a temp file in the same directory, then rename over ``path``."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, **kwargs)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_index(output_dir):
+    index_file = Path(output_dir) / INDEX_NAME
+    if not index_file.exists():
+        return []
+    with open(index_file, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def merge_index(output_dir, entries):
+    """Merge ``entries`` into ``index.json`` by accession and write it atomically.
+
+    Existing entries keep their position; an entry for an accession that is
+    already present replaces it, new accessions are appended in order.
+    """
+    merged = load_index(output_dir)
+    position = {e.get('accession'): i for i, e in enumerate(merged)}
+    for entry in entries:
+        i = position.get(entry.get('accession'))
+        if i is None:
+            position[entry.get('accession')] = len(merged)
+            merged.append(entry)
+        else:
+            merged[i] = entry
+    write_json_atomic(Path(output_dir) / INDEX_NAME, merged, indent=2, ensure_ascii=False)
+    return merged
+
+
+class Manifest:
+    """Per-accession record of content hash, pipeline/rules version and outcome."""
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self.records = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # torn final line from an interrupted run
+                        continue
+                    self.records[rec.get('accession') or rec.get('content_hash')] = rec
+        self._by_hash = {rec['content_hash']: rec for rec in self.records.values() if rec.get('content_hash')}
+
+    def lookup(self, content_hash, version):
+        """Finished record for this exact input and version, or None."""
+        if content_hash is None:
+            return None
+        rec = self._by_hash.get(content_hash)
+        if rec is None or rec.get('version') != version or rec.get('status') not in ('done', 'empty'):
+            return None
+        entry = rec.get('entry')
+        if entry and not all(Path(entry[k]).exists() for k in ('csv', 'json') if entry.get(k)):
+            return None
+        return rec
+
+    def record(self, content_hash, version, result, accession=None):
+        """Append the outcome of one ``process_filing`` call to the journal."""
+        entry = result.get('entry')
+        if 'error' in result:
+            status = 'failed'
+        elif entry is None:
+            status = 'empty'
+        else:
+            status = 'done'
+        rec = {
+            "accession": (entry or {}).get('accession') or accession,
+            "content_hash": content_hash,
+            "version": version,
+            "status": status,
+            "entry": entry,
+        }
+        if status == 'failed':
+            rec["error"] = result['error']
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.records[rec['accession'] or content_hash] = rec
+        if content_hash:
+            self._by_hash[content_hash] = rec
+        return rec
@@ -0,0 +1,101 @@
+"""Compiled multi-pattern keyword matcher (Aho-Corasick) for weak labelling."""
+from collections import deque
+
+
+class KeywordMatcher:
+    """Match every keyword of every label in a single pass over a sentence.
+
+    Built once from a ``{label: [keyword, ...]}`` mapping such as ``KEYWORDS``.
+    Matching is case-insensitive substring matching, the same semantics as the
+    original ``kw in sentence.lower()`` loop, but the cost per sentence depends
+    only on the sentence length and the number of hits, not on how many
+    keywords are registered.
+    """
+
+    def __init__(self, keywords):
+        self.labels = list(keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for label_idx, label in enumerate(self.labels):
+            for kw in keywords[label]:
+                kw = kw.lower()
+                if kw:
+                    self._add(kw, label_idx)
+        self._alphabet = frozenset(ch for edges in self._goto for ch in edges)
+        self._build_failure_links()
+
+    def _add(self, kw, label_idx):
+        state = 0
+        for ch in kw:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        entry = (label_idx, kw)
+        if entry not in self._out[state]:
+            self._out[state].append(entry)
+
+    def _build_failure_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # inherit the outputs of the longest proper suffix
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+    def _scan(self, sentence):
+        goto, fail, out, alphabet = self._goto, self._fail, self._out, self._alphabet
+        state = 0
+        for i, ch in enumerate(sentence.lower()):
+            if ch not in alphabet:
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for label_idx, kw in out[state]:
+                yield label_idx, i + 1, kw
+
+    def iter_matches(self, sentence: str):
+        """Yield ``(label, start, end, keyword)`` for every keyword occurrence.
+
+        Offsets index into ``sentence.lower()``.
+        """
+        labels = self.labels
+        for label_idx, end, kw in self._scan(sentence):
+            yield labels[label_idx], end - len(kw), end, kw
+
+    def match(self, sentence: str):
+        """Return ``{label: {"hits": n, "matches": [(start, end, keyword), ...]}}``.
+
+        Labels keep the order of the keyword mapping; labels without hits are
+        omitted.
+        """
+        found = {}
+        for label, start, end, kw in self.iter_matches(sentence):
+            found.setdefault(label, []).append((start, end, kw))
+        return {
+            label: {"hits": len(found[label]), "matches": found[label]}
+            for label in self.labels if label in found
+        }
+
+    def first_label(self, sentence: str):
+        """Compatibility mode: the first label in mapping order with any hit, else None."""
+        best = None
+        for label_idx, _, _ in self._scan(sentence):
+            if best is None or label_idx < best:
+                best = label_idx
+                if best == 0:
+                    break
+        return self.labels[best] if best is not None else None
@@ -0,0 +1,213 @@
+"""Lightweight per-stage timers and counters for pipeline runs.
+
+``Metrics`` records, per named stage, wall time, CPU time, the number of
+times it was entered and the process's peak RSS when it last finished.
+Stages nest: time spent in an inner stage is not counted again in the outer
+one, so the stage times of a filing add up to its total. That also works for
+the pipeline's lazy streams: ``timed_iter`` charges the time spent producing
+each item to a stage, and whatever a downstream stage does with the item is
+charged to that stage instead.
+
+Counters (sentences in and out, bytes written, ...) are plain integers added
+with ``count``. ``to_dict()`` gives a JSON-serializable summary.
+
+Profiling is optional: ``profile="cprofile"`` runs the filing under cProfile
+and ``profile="tracemalloc"`` traces Python allocations; ``finish`` writes the
+result to ``<profile_dir>/<name>.prof`` or ``<name>.tracemalloc.txt``.
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILERS = ("cprofile", "tracemalloc")
+RUNS_NAME = "pipeline_runs.jsonl"
+
+
+def peak_rss_mib():
+    """High-water mark of this process's resident set size, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class _Frame:
+    __slots__ = ("name", "wall", "cpu", "child_wall", "child_cpu")
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+
+
+class Metrics:
+    """Stage timers and counters for one filing or one run."""
+
+    def __init__(self, profile=None, profile_dir=None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"unknown profiler {profile!r}; expected one of {PROFILERS}")
+        self.stages = {}
+        self.counters = {}
+        self.profile = profile
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self._stack = []
+        self._profiler = None
+        self._finished = False
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        if profile == "cprofile":
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == "tracemalloc":
+            import tracemalloc
+
+            tracemalloc.start(10)
+
+    def _enter(self, name):
+        self._stack.append(_Frame(name))
+
+    def _exit(self):
+        frame = self._stack.pop()
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+        if self._stack:
+            self._stack[-1].child_wall += wall
+            self._stack[-1].child_cpu += cpu
+        stage = self.stages.setdefault(frame.name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "peak_rss_mib": None})
+        stage["wall_s"] += wall - frame.child_wall
+        stage["cpu_s"] += cpu - frame.child_cpu
+        stage["calls"] += 1
+        stage["peak_rss_mib"] = peak_rss_mib()
+
+    @contextmanager
+    def stage(self, name):
+        self._enter(name)
+        try:
+            yield self
+        finally:
+            self._exit()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_bytes(self, *paths):
+        """Add the size of every existing file in ``paths`` to ``bytes_written``."""
+        for path in paths:
+            if path and Path(path).is_file():
+                self.count("bytes_written", Path(path).stat().st_size)
+
+    def merge(self, metrics):
+        """Add the stages and counters of another ``to_dict()`` summary."""
+        for name, stage in metrics.get("stages", {}).items():
+            own = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "peak_rss_mib": None})
+            own["wall_s"] += stage["wall_s"]
+            own["cpu_s"] += stage["cpu_s"]
+            own["calls"] += stage["calls"]
+            peaks = [p for p in (own["peak_rss_mib"], stage.get("peak_rss_mib")) if p is not None]
+            own["peak_rss_mib"] = max(peaks) if peaks else None
+        for name, n in metrics.get("counters", {}).items():
+            self.count(name, n)
+
+    def finish(self, name="filing"):
+        """Stop the profiler, if any, writing its output under ``profile_dir``; returns the output path."""
+        if self.profile is None or self._finished:
+            return None
+        out = None
+        if self.profile == "cprofile":
+            self._profiler.disable()
+            if self.profile_dir:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                out = self.profile_dir / f"{name}.prof"
+                self._profiler.dump_stats(str(out))
+        else:
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.counters["tracemalloc_peak_bytes"] = peak
+            if self.profile_dir:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                out = self.profile_dir / f"{name}.tracemalloc.txt"
+                with open(out, "w", encoding="utf-8") as fh:
+                    fh.write(f"peak traced memory: {peak / 2**20:.1f} MiB\n")
+                    for stat in snapshot.statistics("traceback")[:25]:
+                        fh.write(f"\n{stat}\n")
+                        fh.writelines(f"    {line}\n" for line in stat.traceback.format())
+        self._finished = True
+        return str(out) if out else None
+
+    def to_dict(self):
+        return {
+            "wall_s": time.perf_counter() - self._started,
+            "cpu_s": time.process_time() - self._started_cpu,
+            "peak_rss_mib": peak_rss_mib(),
+            "stages": {name: dict(stage) for name, stage in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def timed_iter(items, metrics, stage, counter=None):
+    """Yield from ``items``, charging the time to produce each item to ``stage``.
+
+    ``counter`` names a counter incremented per item. ``metrics`` may be None.
+    """
+    if metrics is None:
+        yield from items
+        return
+    it = iter(items)
+    try:
+        while True:
+            metrics._enter(stage)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                metrics._exit()
+            if counter:
+                metrics.count(counter)
+            yield item
+    finally:
+        # closing the wrapper closes the stream, e.g. so the stage cache discards a partial entry
+        if hasattr(it, "close"):
+            it.close()
+
+
+def record_run(output_dir, metrics, **fields):
+    """Append one run summary to ``<output_dir>/pipeline_runs.jsonl``."""
+    record = {"finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"), **fields,
+              **metrics.to_dict()}
+    path = Path(output_dir) / RUNS_NAME
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+    return record
+
+
+def read_runs(output_dir, limit=20):
+    """The most recent run summaries, newest first."""
+    path = Path(output_dir) / RUNS_NAME
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as fh:
+        lines = fh.readlines()[-limit:]
+    runs = []
+    for line in reversed(lines):
+        try:
+            runs.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue  # partially written line from an interrupted run
+    return runs
@@ -0,0 +1,405 @@
+"""MinHash/LSH index of sentence clusters across every processed filing.
+
+Each sentence is reduced to a MinHash signature over its word 3-gram shingles
+(``NUM_PERM`` 32-bit hashes). Signatures are split into ``BANDS`` bands; two
+sentences whose signatures agree on a whole band land in the same LSH bucket,
+so near-duplicates are found with a handful of indexed bucket lookups instead
+of comparing against every sentence in the corpus. Candidates join a cluster
+when their estimated Jaccard similarity reaches ``threshold``.
+
+The index lives in SQLite (``<output_dir>/near_duplicates.sqlite3``, WAL mode
+so pool workers can add filings concurrently):
+
+* ``clusters``: one row per group of near-identical sentences with its first
+  sentence, signature and the number of distinct tickers it appears in
+* ``bands``: LSH buckets -> cluster
+* ``cluster_tickers``: per (cluster, ticker) filing counts behind ``n_tickers``
+* ``filings``: each filing's packed, sorted cluster ids, so a re-processed
+  filing can be taken back out and consecutive filings can be diffed, and
+  the ids it dropped as boilerplate
+
+A cluster that appears in ``boilerplate_tickers`` or more companies is
+boilerplate (cover page questions, legal notices) and is dropped before
+classification, as are repeats of a cluster within one filing. A filing only
+sees the companies processed before it, so the first filings to contain a
+cluster keep it; ``stale_filings`` finds them once the cluster has become
+boilerplate, and ``run_incremental`` re-runs them at the end of every run.
+With fewer than ``boilerplate_tickers`` companies in the corpus (a single
+ticker portfolio) nothing is boilerplate; only repeats are dropped. ``diff``
+compares a filing with the previous filing of the same ticker: clusters only
+in the new filing are new, clusters only in the old one removed, and a
+new/removed pair that still shares ``change_threshold`` of its shingles is
+reported as changed.
+"""
+import hashlib
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from swot.db import chunks, connect, write_txn
+
+NEAR_DUP_NAME = "near_duplicates.sqlite3"
+NUM_PERM = 64
+BANDS = 8
+SHINGLE = 3
+# finer banding of the same signature, used only to pair changed sentences in diffs
+CHANGE_BANDS = 16
+
+_WORD = re.compile(r'[a-z0-9]+')
+_PRIME = np.uint64((1 << 61) - 1)
+_MASK = np.uint64(0xFFFFFFFF)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    cluster_id INTEGER PRIMARY KEY,
+    text       TEXT NOT NULL,
+    signature  BLOB NOT NULL,
+    n_tickers  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band       INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, cluster_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cluster_tickers (
+    cluster_id INTEGER NOT NULL,
+    ticker     TEXT NOT NULL,
+    filings    INTEGER NOT NULL,
+    PRIMARY KEY (cluster_id, ticker)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS filings (
+    seq         INTEGER PRIMARY KEY,
+    accession   TEXT NOT NULL UNIQUE,
+    ticker      TEXT,
+    filing_date TEXT,
+    clusters    BLOB,
+    boilerplate BLOB
+);
+CREATE INDEX IF NOT EXISTS filings_ticker_date ON filings (ticker, filing_date);
+CREATE INDEX IF NOT EXISTS clusters_n_tickers ON clusters (n_tickers);
+"""
+
+
+def _permutations(num_perm, seed=1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+_A, _B = _permutations(NUM_PERM)
+
+
+def shingles(sentence, size=SHINGLE):
+    """crc32 hashes of the word ``size``-grams of a sentence (the whole sentence if shorter)."""
+    words = _WORD.findall(sentence.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode('utf-8'))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+def signature(sentence):
+    """``NUM_PERM`` uint32 MinHash values of a sentence's shingles."""
+    h = np.fromiter(shingles(sentence), dtype=np.uint64)
+    # (a*h + b) fits in 64 bits for 32-bit a, b and h
+    return (((np.outer(h, _A) + _B) % _PRIME) & _MASK).min(axis=0).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def band_buckets(sig, bands=BANDS):
+    """One signed 64-bit bucket id per band of ``sig``."""
+    rows = len(sig) // bands
+    return [int.from_bytes(hashlib.blake2b(sig[i * rows:(i + 1) * rows].tobytes(), digest_size=8).digest(),
+                           'little', signed=True)
+            for i in range(bands)]
+
+
+def _pack(ids):
+    return zlib.compress(np.diff(np.asarray(sorted(ids), dtype=np.int64), prepend=0).astype(np.uint32).tobytes())
+
+
+def _unpack(blob):
+    if not blob:
+        return []
+    return np.cumsum(np.frombuffer(zlib.decompress(blob), dtype=np.uint32).astype(np.int64)).tolist()
+
+
+class NearDuplicateIndex:
+    """Sentence clusters, LSH buckets and per-filing cluster sets; use as a context manager."""
+
+    def __init__(self, path, threshold=0.8, change_threshold=0.5, timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.change_threshold = change_threshold
+        # autocommit; writes go through write_txn so cluster assignment never interleaves
+        self.conn = connect(self.path, timeout)
+        self.conn.executescript(_SCHEMA)
+        if "boilerplate" not in self._filing_columns():
+            with write_txn(self.conn):
+                # indexes created before boilerplate clusters were recorded; another worker may have added it
+                if "boilerplate" not in self._filing_columns():
+                    self.conn.execute("ALTER TABLE filings ADD COLUMN boilerplate BLOB")
+
+    def _filing_columns(self):
+        return {row[1] for row in self.conn.execute("PRAGMA table_info(filings)")}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- clustering ----------------
+
+    def _signatures(self, cluster_ids):
+        sigs = {}
+        for chunk in chunks(cluster_ids):
+            rows = self.conn.execute(
+                f"SELECT cluster_id, signature FROM clusters WHERE cluster_id IN ({','.join('?' * len(chunk))})",
+                chunk)
+            sigs.update((cid, np.frombuffer(blob, dtype=np.uint32)) for cid, blob in rows)
+        return sigs
+
+    def _candidates(self, buckets):
+        """``{(band, bucket): [cluster_id, ...]}`` for the given band buckets."""
+        by_band = {}
+        for band, bucket in buckets:
+            by_band.setdefault(band, set()).add(bucket)
+        found = {}
+        for band, values in by_band.items():
+            for chunk in chunks(values):
+                rows = self.conn.execute(
+                    f"SELECT bucket, cluster_id FROM bands WHERE band = ? AND bucket IN ({','.join('?' * len(chunk))})",
+                    (band, *chunk))
+                for bucket, cid in rows:
+                    found.setdefault((band, bucket), []).append(cid)
+        return found
+
+    def assign(self, sentences):
+        """Cluster id and boilerplate ticker count for each sentence, creating clusters as needed.
+
+        Returns ``[(cluster_id, n_tickers), ...]`` in input order.
+        """
+        sigs = [signature(s) for s in sentences]
+        buckets = [band_buckets(sig) for sig in sigs]
+        conn = self.conn
+        with write_txn(conn):
+            found = self._candidates({(b, k) for bs in buckets for b, k in enumerate(bs)})
+            known = self._signatures({cid for cids in found.values() for cid in cids})
+            assigned = []
+            for sent, sig, bs in zip(sentences, sigs, buckets):
+                best, best_sim = None, self.threshold
+                for cid in {cid for b, k in enumerate(bs) for cid in found.get((b, k), ())}:
+                    sim = similarity(sig, known[cid])
+                    if sim >= best_sim:
+                        best, best_sim = cid, sim
+                if best is None:
+                    best = conn.execute("INSERT INTO clusters (text, signature) VALUES (?, ?)",
+                                        (sent, sig.tobytes())).lastrowid
+                    conn.executemany("INSERT OR IGNORE INTO bands (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                                     [(b, k, best) for b, k in enumerate(bs)])
+                    # later sentences of this batch can match the new cluster
+                    known[best] = sig
+                    for b, k in enumerate(bs):
+                        found.setdefault((b, k), []).append(best)
+                assigned.append(best)
+        n_tickers = self._ticker_counts(set(assigned))
+        return [(cid, n_tickers.get(cid, 0)) for cid in assigned]
+
+    def _ticker_counts(self, cluster_ids):
+        counts = {}
+        for chunk in chunks(cluster_ids):
+            rows = self.conn.execute(
+                f"SELECT cluster_id, n_tickers FROM clusters WHERE cluster_id IN ({','.join('?' * len(chunk))})",
+                chunk)
+            counts.update(rows)
+        return counts
+
+    def scan(self, accession, ticker, filing_date=None, boilerplate_tickers=5, batch_size=1024):
+        return FilingScan(self, accession, ticker, filing_date, boilerplate_tickers, batch_size)
+
+    # ---------------- filings ----------------
+
+    def record_filing(self, accession, ticker, filing_date, cluster_ids, boilerplate=()):
+        """Add or replace one filing's set of clusters and update the per-cluster ticker counts.
+
+        ``boilerplate`` are the clusters among ``cluster_ids`` that the filing dropped as boilerplate.
+        """
+        accession = str(accession)
+        conn = self.conn
+        with write_txn(conn):
+            row = conn.execute("SELECT ticker, clusters FROM filings WHERE accession = ?", (accession,)).fetchone()
+            if row:
+                old_ticker, old = row[0], _unpack(row[1])
+                emptied = []
+                for cid in old:
+                    conn.execute("UPDATE cluster_tickers SET filings = filings - 1 WHERE cluster_id = ? AND ticker = ?",
+                                 (cid, old_ticker))
+                    cur = conn.execute("DELETE FROM cluster_tickers WHERE cluster_id = ? AND ticker = ? AND filings <= 0",
+                                       (cid, old_ticker))
+                    if cur.rowcount:
+                        emptied.append((cid,))
+                conn.executemany("UPDATE clusters SET n_tickers = n_tickers - 1 WHERE cluster_id = ?", emptied)
+                conn.execute("DELETE FROM filings WHERE accession = ?", (accession,))
+
+            added = []
+            for cid in cluster_ids:
+                cur = conn.execute("INSERT OR IGNORE INTO cluster_tickers (cluster_id, ticker, filings) "
+                                   "VALUES (?, ?, 1)", (cid, ticker))
+                if cur.rowcount:
+                    added.append((cid,))
+                else:
+                    conn.execute("UPDATE cluster_tickers SET filings = filings + 1 WHERE cluster_id = ? AND ticker = ?",
+                                 (cid, ticker))
+            conn.executemany("UPDATE clusters SET n_tickers = n_tickers + 1 WHERE cluster_id = ?", added)
+            conn.execute("INSERT INTO filings (accession, ticker, filing_date, clusters, boilerplate) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (accession, ticker, filing_date, _pack(cluster_ids), _pack(boilerplate)))
+
+    def stale_filings(self, boilerplate_tickers=5):
+        """Accessions that kept a cluster which has since reached ``boilerplate_tickers`` companies.
+
+        Filings recorded before dropped clusters were tracked count as having
+        kept every cluster.
+        """
+        boilerplate = np.fromiter((r[0] for r in self.conn.execute(
+            "SELECT cluster_id FROM clusters WHERE n_tickers >= ?", (boilerplate_tickers,))), dtype=np.int64)
+        if not len(boilerplate):
+            return []
+        stale = []
+        for accession, clusters, dropped in self.conn.execute("SELECT accession, clusters, boilerplate FROM filings"):
+            kept = np.setdiff1d(np.asarray(_unpack(clusters), dtype=np.int64),
+                                np.asarray(_unpack(dropped), dtype=np.int64))
+            if np.isin(kept, boilerplate, assume_unique=True).any():
+                stale.append(accession)
+        return stale
+
+    def previous_filing(self, accession):
+        """``(accession, filing_date)`` of the same ticker's filing before ``accession``, or None."""
+        row = self.conn.execute("SELECT seq, ticker, filing_date FROM filings WHERE accession = ?",
+                                (str(accession),)).fetchone()
+        if row is None:
+            return None
+        seq, ticker, filing_date = row
+        if filing_date:
+            prev = self.conn.execute(
+                "SELECT accession, filing_date FROM filings WHERE ticker = ? AND filing_date < ? "
+                "ORDER BY filing_date DESC LIMIT 1", (ticker, filing_date)).fetchone()
+        else:
+            prev = self.conn.execute(
+                "SELECT accession, filing_date FROM filings WHERE ticker = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT 1", (ticker, seq)).fetchone()
+        return tuple(prev) if prev else None
+
+    def _clusters_of(self, accession):
+        row = self.conn.execute("SELECT clusters FROM filings WHERE accession = ?", (str(accession),)).fetchone()
+        return set(_unpack(row[0])) if row else set()
+
+    def _texts(self, cluster_ids):
+        texts = {}
+        for chunk in chunks(cluster_ids):
+            rows = self.conn.execute(
+                f"SELECT cluster_id, text FROM clusters WHERE cluster_id IN ({','.join('?' * len(chunk))})", chunk)
+            texts.update(rows)
+        return texts
+
+    def diff(self, accession):
+        """New, removed and changed sentences since the previous filing of the same ticker.
+
+        Returns None when there is no earlier filing for the ticker.
+        """
+        prev = self.previous_filing(accession)
+        if prev is None:
+            return None
+        current, before = self._clusters_of(accession), self._clusters_of(prev[0])
+        new, removed = sorted(current - before), sorted(before - current)
+
+        # pair new and removed clusters that still overlap, via finer LSH bands over just these clusters
+        sigs = self._signatures(new + removed)
+        buckets = {}
+        for cid in removed:
+            for b, k in enumerate(band_buckets(sigs[cid], CHANGE_BANDS)):
+                buckets.setdefault((b, k), []).append(cid)
+        changed, paired = [], set()
+        for cid in new:
+            best, best_sim = None, self.change_threshold
+            for old in {o for b, k in enumerate(band_buckets(sigs[cid], CHANGE_BANDS)) for o in buckets.get((b, k), ())}:
+                sim = similarity(sigs[cid], sigs[old])
+                if old not in paired and sim >= best_sim:
+                    best, best_sim = old, sim
+            if best is not None:
+                paired.add(best)
+                changed.append((best, cid, best_sim))
+
+        texts = self._texts(new + removed)
+        changed_new = {c[1] for c in changed}
+        return {
+            "previous": {"accession": prev[0], "filing_date": prev[1]},
+            "new": [texts[c] for c in new if c not in changed_new],
+            "removed": [texts[c] for c in removed if c not in paired],
+            "changed": [{"before": texts[old], "after": texts[cid], "similarity": round(sim, 3)}
+                        for old, cid, sim in changed],
+        }
+
+
+class FilingScan:
+    """Streams one filing's sentences through the index.
+
+    ``filter`` yields the sentences worth classifying; ``commit`` then records
+    the filing's clusters. ``dropped_boilerplate`` and ``dropped_duplicates``
+    count what was filtered out.
+    """
+
+    def __init__(self, index, accession, ticker, filing_date, boilerplate_tickers, batch_size):
+        self.index = index
+        self.accession = accession
+        self.ticker = ticker
+        self.filing_date = filing_date
+        self.boilerplate_tickers = boilerplate_tickers
+        self.batch_size = batch_size
+        self.clusters = set()
+        self.boilerplate = set()
+        self.dropped_boilerplate = 0
+        self.dropped_duplicates = 0
+
+    def filter(self, sentences):
+        """Pass ``(part_id, sentence, ...)`` items through, minus boilerplate and repeats within the filing."""
+        batch = []
+        for item in sentences:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield from self._filter_batch(batch)
+                batch = []
+        if batch:
+            yield from self._filter_batch(batch)
+
+    def _filter_batch(self, batch):
+        for item, (cid, n_tickers) in zip(batch, self.index.assign([item[1] for item in batch])):
+            if cid in self.clusters:
+                self.dropped_duplicates += 1
+                continue
+            self.clusters.add(cid)
+            # n_tickers counts the companies whose earlier filings contain this cluster
+            if n_tickers >= self.boilerplate_tickers:
+                self.boilerplate.add(cid)
+                self.dropped_boilerplate += 1
+                continue
+            yield item
+
+    def commit(self):
+        self.index.record_filing(self.accession, self.ticker, self.filing_date, self.clusters, self.boilerplate)
+
+
+def open_near_duplicate_index(output_dir, **kwargs):
+    return NearDuplicateIndex(Path(output_dir) / NEAR_DUP_NAME, **kwargs)
@@ -0,0 +1,121 @@
+"""Minimal text-only PDF writer with no third-party dependencies.
+
+``TextPdf`` lays out wrapped lines of Helvetica text on US Letter pages and
+streams each page to the file as soon as it is full, so memory stays at one
+page however long the document gets. Text outside Latin-1 is transliterated
+or replaced, which is enough for report summaries.
+"""
+import textwrap
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter in points
+MARGIN = 54
+
+_FONTS = {"regular": "F1", "bold": "F2"}
+# objects 1-4 are fixed; pages and their content streams follow
+_CATALOG, _PAGES, _REGULAR, _BOLD = 1, 2, 3, 4
+_TRANSLITERATE = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-",
+    "•": "-", "…": "...", " ": " ", "™": "(TM)",
+})
+
+
+def _escape(text):
+    text = text.translate(_TRANSLITERATE).encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class TextPdf:
+    """Write a PDF of wrapped text lines to ``path``; use as a context manager."""
+
+    def __init__(self, path, title=None):
+        self.fh = open(path, "wb")
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5
+        self.title = title
+        self._ops = []
+        self._y = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(_REGULAR, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.fh.close()
+
+    # ---------------- low level ----------------
+
+    def _write(self, data):
+        self.fh.write(data)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.fh.tell()
+        self._write(f"{obj_id} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def _flush_page(self):
+        if self._y is None:
+            return
+        content = "\n".join(self._ops).encode("latin-1")
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, f"<< /Length {len(content)} >>\nstream\n".encode("ascii") + content + b"\nendstream")
+        self._object(page_id, (
+            f"<< /Type /Page /Parent {_PAGES} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {_REGULAR} 0 R /F2 {_BOLD} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("ascii"))
+        self.page_ids.append(page_id)
+        self._ops = []
+        self._y = None
+
+    # ---------------- layout ----------------
+
+    def new_page(self):
+        self._flush_page()
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def space(self, points):
+        if self._y is not None:
+            self._y -= points
+
+    def text(self, text, size=10, font="regular", color=(0, 0, 0), indent=0):
+        """Add ``text`` wrapped to the page width, starting a new page when needed."""
+        # Helvetica averages about half an em per character
+        width = int((PAGE_WIDTH - 2 * MARGIN - indent) / (size * 0.5))
+        leading = size * 1.35
+        for line in textwrap.wrap(str(text), width) or [""]:
+            if self._y is None or self._y - leading < MARGIN:
+                self.new_page()
+            self._y -= leading
+            r, g, b = color
+            self._ops.append(f"BT {r:.3f} {g:.3f} {b:.3f} rg /{_FONTS[font]} {size} Tf "
+                             f"{MARGIN + indent} {self._y:.1f} Td ({_escape(line)}) Tj ET")
+
+    def close(self):
+        if self.fh.closed:
+            return
+        if not self.page_ids and self._y is None:
+            self.new_page()
+        self._flush_page()
+        kids = " ".join(f"{p} 0 R" for p in self.page_ids)
+        self._object(_PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        info = ""
+        if self.title:
+            info_id = self.next_id
+            self.next_id += 1
+            self._object(info_id, f"<< /Title ({_escape(self.title)}) /Producer (StrategicSWOT) >>".encode("latin-1"))
+            info = f" /Info {info_id} 0 R"
+        self._object(_CATALOG, f"<< /Type /Catalog /Pages {_PAGES} 0 R >>".encode("ascii"))
+        xref = self.fh.tell()
+        size = self.next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[i]:010d} 00000 n \n" if i in self.offsets else "0000000000 65535 f \n"
+                  for i in range(1, size)]
+        self._write("".join(lines).encode("ascii"))
+        self._write(f"trailer\n<< /Size {size} /Root {_CATALOG} 0 R{info} >>\nstartxref\n{xref}\n%%EOF\n"
+                    .encode("ascii"))
+        self.fh.close()
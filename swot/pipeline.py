@@ -0,0 +1,846 @@
+"""Per-filing parse -> extract -> classify -> write, serially or on a process pool."""
+import hashlib
+import json
+import os
+import re
+import traceback
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+from tqdm import tqdm
+
+from swot.manifest import Manifest, document_hash, merge_index, write_json_atomic
+from swot import columnar
+from swot.catalog import open_catalog
+from swot.labelcache import open_label_cache, sentence_key
+from swot.classifier import ZeroShotClassifier
+from swot.matcher import KeywordMatcher
+from swot.metrics import Metrics, record_run, timed_iter
+from swot.reportfile import SUFFIX as REPORT_SUFFIX, read_report, split_report, update_sections, write_report
+from swot.search import open_evidence_index
+from swot.sentstore import open_sentence_store, open_sentence_store_writer
+from swot import sections as sections_module
+from swot.sections import has_items, index_sections, iter_section_texts, normalize as normalize_section
+from swot.neardup import open_near_duplicate_index
+from swot.segmenter import Segmenter
+from swot.stages import StageCache, code_version, stage_key
+from swot.tickers import normalize_cik
+from swot.text import MAX_SENTENCE_LENGTH, MIN_SENTENCE_LENGTH
+from swot.themes import label_term_counts, open_theme_index
+
+candidate_labels = ["Strength", "Weakness", "Opportunity", "Threat"]
+
+# bump when process_filing changes what it writes for the same input
+PIPELINE_VERSION = "2"
+
+# Map known CIKs to tickers
+CIK_TO_TICKER = {
+    '0000320193': 'AAPL',
+    '320193': 'AAPL'
+}
+
+STOPWORDS = {'that', 'with', 'have', 'this', 'will', 'from', 'they', 'been', 'said', 'each', 'which', 'their', 'there', 'these', 'those', 'would', 'could', 'should', 'other', 'such', 'more', 'also', 'may', 'can', 'its', 'our', 'us', 'we', 'you', 'your', 'the', 'and', 'or', 'but', 'so', 'if', 'when', 'where', 'how', 'what', 'who', 'why'}
+
+# one matcher per process, rebuilt only when the keyword rules change
+_matcher_cache = {}
+# one zero-shot model per process, reloaded only when its configuration changes
+_classifier_cache = {}
+
+# one sentence label cache connection per process (SQLite connections must not cross a fork)
+_label_cache = {}
+
+# a sentence cluster seen in this many companies is boilerplate
+BOILERPLATE_TICKERS = 5
+
+# sentences labelled (and looked up in the label cache) at a time; bounds memory while streaming
+CLASSIFY_CHUNK = 1024
+
+
+def make_settings(output_dir, keywords, tickers, min_len=MIN_SENTENCE_LENGTH,
+                  max_len=MAX_SENTENCE_LENGTH, labels=None, cache_dir=None, dataset_dir=None, classifier=None,
+                  dedup=None, profile=None, sections=None, ciks=None):
+    """Everything a worker needs to process a filing; must stay picklable.
+
+    ``classifier`` switches labelling from the keyword rules to the zero-shot
+    model: a dict with ``model`` (local checkpoint directory), optional
+    ``min_score`` (default 0.5) and any other ``ZeroShotClassifier`` argument.
+    ``dedup`` turns on near-duplicate filtering and year-over-year diffs: a
+    dict with optional ``boilerplate_tickers`` (default 5), ``threshold`` and
+    ``change_threshold`` (see ``swot.neardup``); boilerplate needs that many
+    companies in the output directory, so a single-ticker portfolio only
+    drops repeats. ``profile`` ("cprofile" or
+    "tracemalloc") profiles every filing into ``<output_dir>/profiles``.
+    ``sections`` is an include-list of 10-K Items (e.g. ``["1", "1A", "7",
+    "7A"]``, see ``swot.sections``); only their text is split and classified.
+    Filings in which no Item can be located are processed whole.
+    ``ciks`` maps CIKs to tickers (see ``swot.tickers``) for filings whose
+    metadata has no ticker.
+    """
+    settings = {
+        "output_dir": str(output_dir),
+        "cache_dir": str(cache_dir) if cache_dir else None,
+        "dataset_dir": str(dataset_dir) if dataset_dir else None,
+        "keywords": {label: list(kws) for label, kws in keywords.items()},
+        "tickers": list(tickers),
+        "min_len": min_len,
+        "max_len": max_len,
+        "labels": list(labels or candidate_labels),
+    }
+    # only present when set, so keyword-only runs keep their rules version
+    if classifier:
+        settings["classifier"] = dict(classifier)
+    if dedup is not None:
+        settings["dedup"] = dict(dedup)
+    if profile:
+        settings["profile"] = profile
+    if sections:
+        settings["sections"] = sorted({normalize_section(s) for s in sections})
+    if ciks:
+        settings["ciks"] = {normalize_cik(cik): ticker for cik, ticker in ciks.items()}
+    return settings
+
+
+# settings that do not change what a filing's report says: where things go, and the portfolio, which only
+# supplies the ticker of filings whose document has none (``ticker_changed`` checks those per filing)
+UNVERSIONED_SETTINGS = ("output_dir", "cache_dir", "profile", "dataset_dir", "tickers", "ciks")
+
+
+def rules_version(settings):
+    """Short hash of the pipeline version plus every setting that affects a filing's report."""
+    rules = {k: v for k, v in settings.items() if k not in UNVERSIONED_SETTINGS}
+    blob = json.dumps([PIPELINE_VERSION, rules], sort_keys=True)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def get_matcher(keywords):
+    key = json.dumps(keywords)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        _matcher_cache.clear()
+        matcher = _matcher_cache[key] = KeywordMatcher(keywords)
+    return matcher
+
+
+def get_classifier(config, labels):
+    key = json.dumps([config, labels], sort_keys=True)
+    classifier = _classifier_cache.get(key)
+    if classifier is None:
+        for old in _classifier_cache.values():
+            old.close()
+        _classifier_cache.clear()
+        options = {k: v for k, v in config.items() if k not in ("model", "min_score")}
+        classifier = _classifier_cache[key] = ZeroShotClassifier(config["model"], labels, **options)
+    return classifier
+
+
+def get_label_cache(cache_dir):
+    key = (os.getpid(), str(cache_dir))
+    cache = _label_cache.get(key)
+    if cache is None:
+        _label_cache.clear()
+        cache = _label_cache[key] = open_label_cache(cache_dir)
+    return cache
+
+
+def extract_key_phrases(sentences, max_phrases=3):
+    """Extract key phrases from sentences using simple frequency analysis.
+
+    Per-filing fallback; the pipeline scores themes against the corpus with ``swot.themes``.
+    """
+    # Combine all sentences and extract meaningful words
+    text = " ".join(sentences).lower()
+    words = re.findall(r'\b[a-z]{4,}\b', text)  # Words with 4+ characters
+
+    # Filter out common words
+    meaningful_words = [w for w in words if w not in STOPWORDS]
+
+    # Get most common words as key phrases
+    counter = Counter(meaningful_words)
+    return [word for word, count in counter.most_common(max_phrases)]
+
+
+def raw_metadata(doc):
+    """Metadata fields read from a parsed datamule document, before ticker resolution."""
+    meta = doc.data.get('metadata', {})
+
+    accession = (meta.get('accession_number') or
+                 meta.get('accession') or
+                 doc.__dict__.get('accession') or
+                 getattr(doc, 'accession_number', None) or
+                 'unknown')
+
+    cik = (meta.get('cik') or
+           getattr(doc, 'cik', None) or
+           doc.__dict__.get('cik'))
+
+    filing_date = (meta.get('filing_date') or
+                   meta.get('filed_as_of_date') or
+                   getattr(doc, 'filing_date', None))
+
+    return {"accession": accession, "cik": cik, "filing_date": filing_date,
+            "ticker": meta.get('ticker') or meta.get('symbol')}
+
+
+def resolve_metadata(raw, tickers, ciks=None):
+    """Report metadata with the ticker resolved from the document, CIK table or config.
+
+    ``ciks`` is a ``{cik: ticker}`` table; ``CIK_TO_TICKER`` is consulted after it.
+    """
+    cik = raw.get('cik')
+    ticker = raw.get('ticker')
+    if not ticker and cik:
+        ticker = (ciks or {}).get(normalize_cik(cik)) or CIK_TO_TICKER.get(normalize_cik(cik))
+    if not ticker:
+        ticker = tickers[0] if len(tickers) == 1 else 'UNKNOWN'  # Use config ticker if only one
+    return {"ticker": ticker, "cik": cik, "accession": raw.get('accession'), "filing_date": raw.get('filing_date')}
+
+
+def ticker_changed(entry, settings):
+    """True if ``entry``'s ticker was inferred (CIK table or config) and ``settings`` now infer another."""
+    if not entry or not entry.get("ticker_inferred"):
+        return False
+    return resolve_metadata({"cik": entry.get("cik")}, settings["tickers"], settings.get("ciks"))["ticker"] != \
+        entry.get("ticker")
+
+
+def filing_metadata(doc, tickers, ciks=None):
+    """Accession, CIK, ticker and filing date of a parsed datamule document."""
+    return resolve_metadata(raw_metadata(doc), tickers, ciks)
+
+
+def iter_filing_texts(doc_content, spans=None):
+    """Yield ``["t", part_id, fragment, section]`` for text inside dict parts, ``["f", ...]`` for top-level strings.
+
+    ``spans`` from ``swot.sections.index_sections`` (computed if not given)
+    assign every fragment its section; fragments never straddle two sections.
+    """
+    if spans is None:
+        spans = index_sections(doc_content)
+    yield from iter_section_texts(doc_content, spans)
+
+
+def iter_sentences(fragments, min_len=MIN_SENTENCE_LENGTH, max_len=MAX_SENTENCE_LENGTH, sections=None):
+    """Clean and split a stream of ``iter_filing_texts`` fragments into ``[part_id, sentence, section]``.
+
+    With a ``sections`` include-list, fragments of other sections are skipped
+    before they are split.
+    """
+    segmenter = Segmenter(min_len, max_len)
+    include = set(sections) if sections else None
+    found = False
+    fallback = []
+    for kind, part_id, t, section in fragments:
+        if include is not None and section not in include:
+            continue
+        if kind == "f":
+            fallback.append((part_id, t, section))
+            continue
+        for sent in segmenter.iter_split(t):
+            found = True
+            yield [part_id, sent, section]
+
+    # fallback: if no sentences found, try reading any string values directly from doc_content
+    if not found:
+        for part_id, t, section in fallback:
+            for sent in segmenter.iter_split(t):
+                yield [part_id, sent, section]
+
+
+def filing_sentences(doc_content, min_len=MIN_SENTENCE_LENGTH, max_len=MAX_SENTENCE_LENGTH, sections=None):
+    return [sent for _, sent, _ in iter_sentences(iter_filing_texts(doc_content), min_len, max_len, sections)]
+
+
+def classify_sentences(sentences, keywords, classifier=None, labels=candidate_labels, label_cache=None,
+                       version=None):
+    """Label a stream of ``(part_id, sentence, section)`` items; only labelled ones are kept.
+
+    Without ``classifier`` the first keyword rule that matches wins with score
+    1.0 and the record lists the matched keywords under ``matches``. With a
+    ``classifier`` config the zero-shot model scores ``labels``; a sentence
+    keeps its most probable label if that probability reaches ``min_score``,
+    and its record carries every label's probability under ``scores``.
+
+    The stream is labelled in chunks. With a ``label_cache`` only sentences
+    not yet cached under ``version`` are classified.
+    """
+    labeller = _zero_shot_labeller(classifier, labels) if classifier else _keyword_labeller(keywords)
+    records = []
+    n = 0
+    for chunk in _chunked(sentences, CLASSIFY_CHUNK):
+        n += len(chunk)
+        texts = [item[1] for item in chunk]
+        if label_cache is None:
+            results = labeller(texts)
+        else:
+            keys = [sentence_key(t, version) for t in texts]
+            cached = label_cache.get_many(keys)
+            # repeats within the chunk are classified once
+            todo = {k: t for k, t in zip(keys, texts) if k not in cached}
+            fresh = dict(zip(todo, labeller(list(todo.values()))))
+            label_cache.put_many(fresh.items())
+            results = [cached.get(k) or fresh[k] for k in keys]
+        for (part_id, sent, section), res in zip(chunk, results):
+            if res["label"]:
+                records.append(_record(part_id, sent, res, bool(classifier), section))
+    return {"sentences": n, "records": records}
+
+
+def _chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record(part_id, sent, result, zero_shot, section=None):
+    record = {"sentence": sent, "label": result["label"], "score": result["score"], "part_id": part_id,
+              "section": section}
+    record["scores" if zero_shot else "matches"] = result["details"]
+    return record
+
+
+def _keyword_labeller(keywords):
+    """``texts -> [{"label", "score", "details"}]`` from the keyword rules; details are the matched keywords."""
+    matcher = get_matcher(keywords)
+
+    def label(texts):
+        results = []
+        for sent in texts:
+            lab = matcher.first_label(sent)
+            if lab:
+                matches = sorted({kw for _, _, kw in matcher.match(sent)[lab]["matches"]})
+                results.append({"label": lab, "score": 1.0, "details": matches})
+            else:
+                results.append({"label": None, "score": 0.0, "details": None})
+        return results
+    return label
+
+
+def _zero_shot_labeller(config, labels):
+    """``texts -> [{"label", "score", "details"}]`` from the zero-shot model; details are all label probabilities."""
+    model = get_classifier(config, labels)
+    min_score = config.get("min_score", 0.5)
+
+    def label(texts):
+        if not texts:
+            return []
+        results = []
+        for p in model.classify(texts):
+            best = int(p.argmax())
+            results.append({"label": labels[best] if p[best] >= min_score else None, "score": float(p[best]),
+                            "details": dict(zip(labels, p.tolist()))})
+        return results
+    return label
+
+
+def build_report(df, labels=candidate_labels, themes=None):
+    # create a compact JSON report: top N bullets per label
+    # themes: {label: [terms]} from the corpus theme index; None falls back to per-filing word counts
+    # evidence_rows are the rows of the top bullets in the filing's CSV, i.e. positions in df
+    report = {}
+    for lab in labels:
+        lab_df = df[df['label'] == lab].sort_values('score', ascending=False, kind='stable')
+        all_sentences = lab_df['sentence'].tolist()
+        bullets = all_sentences[:3]  # Only top 3 sentences
+        if themes is None:
+            key_phrases = extract_key_phrases(all_sentences[:10])  # Extract from top 10
+        else:
+            key_phrases = themes.get(lab, [])
+
+        report[lab] = {
+            "count": len(lab_df),
+            "share": round(len(lab_df) / len(df), 4) if len(df) else 0.0,
+            "mean_score": round(float(lab_df['score'].mean()), 4) if len(lab_df) else None,
+            "top_bullets": bullets,
+            "evidence_rows": [int(i) for i in lab_df.index[:3]],
+            "key_themes": key_phrases,
+            "summary": f"{len(lab_df)} {lab.lower()} indicators found"
+        }
+    return report
+
+
+@lru_cache(maxsize=None)
+def _code_versions():
+    return {
+        # every rule in swot.sections decides where a section starts, so the whole module is versioned
+        "text": code_version(raw_metadata, iter_filing_texts, sections_module),
+        "sentences": code_version(iter_sentences, Segmenter),
+        "labels": code_version(classify_sentences, _record, _keyword_labeller, _zero_shot_labeller,
+                               KeywordMatcher, ZeroShotClassifier),
+        "report": code_version(build_report, extract_key_phrases),
+    }
+
+
+def _stage(cache, stage, key, compute):
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(stage, key, compute)
+
+
+def _stream_stage(cache, stage, key, compute):
+    stream = cache.get_stream(stage, key) if cache else None
+    if stream is None:
+        stream = compute()
+        if cache:
+            stream = cache.put_stream(stage, key, stream)
+    return stream
+
+
+def _parsed_fragments(doc, content_hash, metrics):
+    if doc is None:
+        raise RuntimeError(f"parsed text for {content_hash} is not in the stage cache")
+    if hasattr(doc, "iter_fragments"):
+        # uploads (swot.ingest.UploadedFiling) stream their own text in bounded memory
+        yield from doc.iter_fragments(metrics)
+        return
+    try:
+        with metrics.stage("parse"):
+            doc.parse()
+    except Exception as e:
+        # parse may fail for some docs; report it so the filing is retried next run
+        print("Warning: parse failed for a document; skipping")
+        raise RuntimeError(f"parse failed: {e}") from e
+    content = doc.data.get('document', {})
+    spans = index_sections(content)
+    yield {**raw_metadata(doc), "sections": spans}
+    yield from iter_filing_texts(content, spans)
+
+
+def process_filing(doc, settings, content_hash=None):
+    """Run one filing end to end and return its index entry, or None if skipped.
+
+    The entry and the report's ``meta`` carry the filing's ``metrics``: wall
+    and CPU time and peak RSS per stage (parse, extract, segment, dedup,
+    classify, themes, search, report, write, diff) plus sentence and byte counters.
+
+    Text fragments and sentences are streamed from the parsed document
+    through classification, so only the labelled records are held in memory.
+    With a ``cache_dir`` in ``settings`` and a ``content_hash`` each stage is
+    read from or written to the stage cache. ``doc`` may be None when the
+    parsed text is already cached, e.g. when re-running after a rule change.
+
+    With ``dedup`` settings the sentences pass through the near-duplicate
+    index before classification and a diff against the ticker's previous
+    filing is written next to the report.
+    """
+    metrics = Metrics(settings.get("profile"), Path(settings["output_dir"]) / "profiles")
+    try:
+        entry = _process_filing(doc, settings, content_hash, metrics)
+    finally:
+        metrics.finish(f"filing_{content_hash or getattr(doc, 'accession', 'unknown')}")
+    if entry is not None:
+        entry["metrics"] = metrics.to_dict()
+    return entry
+
+
+def _process_filing(doc, settings, content_hash, metrics):
+    versions = _code_versions()
+    cache = StageCache(settings["cache_dir"]) if settings.get("cache_dir") and content_hash else None
+    text_key = stage_key("text", content_hash, versions["text"])
+    sent_params = [settings["min_len"], settings["max_len"], versions["sentences"]]
+    if settings.get("sections"):
+        sent_params.append(settings["sections"])
+    sent_key = stage_key("sentences", text_key, sent_params)
+    label_params = [settings["keywords"], versions["labels"]]
+    if settings.get("classifier"):
+        label_params += [settings["classifier"], settings["labels"]]
+    label_key = stage_key("labels", sent_key, label_params)
+    # the sentence label cache is shared by every filing classified with the same rules
+    label_version = stage_key("sentence-labels", None, label_params)
+    label_cache = get_label_cache(settings["cache_dir"]) if settings.get("cache_dir") else None
+    report_key = stage_key("report", label_key, [settings["labels"], versions["report"]])
+
+    dedup = settings.get("dedup")
+    near_dups = None
+
+    # the text stream starts with the raw metadata, followed by the fragments
+    fragments = timed_iter(_stream_stage(cache, "text", text_key, lambda: _parsed_fragments(doc, content_hash, metrics)),
+                           metrics, "extract")
+    try:
+        raw = next(fragments)
+        report_meta = resolve_metadata(raw, settings["tickers"], settings.get("ciks"))
+        ticker, accession = report_meta["ticker"], report_meta["accession"]
+        spans = raw.get("sections") or []
+        include = settings.get("sections")
+        if include and not has_items(spans):
+            print(f"No 10-K Items found in accession {accession}; processing the whole document")
+            include = None
+
+        def label(scan=None):
+            sentences = _stream_stage(cache, "sentences", sent_key,
+                                      lambda: iter_sentences(fragments, settings["min_len"], settings["max_len"],
+                                                             include))
+            sentences = timed_iter(sentences, metrics, "segment", counter="sentences_in")
+            if scan:
+                sentences = timed_iter(scan.filter(sentences), metrics, "dedup")
+            before = label_cache.stats() if label_cache is not None else None
+            # the model is shared by every filing this process handles; its throughput is reported once per run
+            model = get_classifier(settings["classifier"], settings["labels"]) if settings.get("classifier") else None
+            model_before = model.throughput() if model is not None else None
+            labelled = classify_sentences(sentences, settings["keywords"], settings.get("classifier"),
+                                          settings["labels"], label_cache, label_version)
+            if model is not None:
+                model_after = model.throughput()
+                metrics.count("zero_shot_sentences", model_after["sentences"] - model_before["sentences"])
+                metrics.count("zero_shot_seconds", model_after["seconds"] - model_before["seconds"])
+            if label_cache is not None:
+                misses = label_cache.misses - before["misses"]
+                metrics.count("sentences_classified", misses)
+                print(f"Label cache: {labelled['sentences'] - misses} of {labelled['sentences']} "
+                      f"sentences reused, {misses} classified")
+            return labelled
+
+        if dedup is None:
+            with metrics.stage("classify"):
+                labelled = _stage(cache, "labels", label_key, label)
+        else:
+            # which sentences are boilerplate depends on the corpus, so these labels bypass the stage cache
+            near_dups = open_near_duplicate_index(settings["output_dir"], **_index_options(dedup))
+            scan = near_dups.scan(accession, ticker, report_meta["filing_date"],
+                                  dedup.get("boilerplate_tickers", BOILERPLATE_TICKERS))
+            with metrics.stage("classify"):
+                labelled = label(scan)
+            with metrics.stage("dedup"):
+                scan.commit()
+            metrics.count("sentences_boilerplate", scan.dropped_boilerplate)
+            metrics.count("sentences_repeated", scan.dropped_duplicates)
+            print(f"Dropped {scan.dropped_boilerplate} boilerplate and {scan.dropped_duplicates} repeated sentences")
+    finally:
+        fragments.close()
+        if near_dups:
+            near_dups.close()
+    print(f"Extracted {labelled['sentences']} sentences from accession {accession}")
+    metrics.count("sentences_out", len(labelled["records"]))
+
+    if not labelled["sentences"]:
+        print("No textual sentences found for this filing - skipping output generation.")
+        return None
+
+    # prepare DataFrame and per-label grouping
+    df = pd.DataFrame(labelled["records"])
+    if df.empty:
+        print("No records after labeling - skipping.")
+        return None
+
+    # save per-filing CSV
+    output_dir = Path(settings["output_dir"])
+    out_csv = output_dir / f"swot_{ticker}_{accession}.csv"
+    with metrics.stage("write"):
+        df[["sentence", "label", "score", "section"]].to_csv(out_csv, index=False)
+        metrics.count_bytes(out_csv)
+
+        # append to the consolidated, partitioned sentence dataset
+        if settings.get("dataset_dir"):
+            metrics.count_bytes(*columnar.write_filing(settings["dataset_dir"], report_meta, labelled["records"]))
+
+    # key themes depend on the whole corpus, so they are re-scored rather than taken from the stage cache
+    with metrics.stage("themes"), open_theme_index(output_dir) as theme_index:
+        theme_index.add_filing(accession, label_term_counts(labelled["records"]))
+        themes = theme_index.key_themes([accession])[str(accession)]
+    # every labelled sentence goes into the full-text evidence index, in CSV row order
+    with metrics.stage("search"), open_evidence_index(output_dir) as evidence:
+        evidence.add_filing(report_meta, labelled["records"])
+    with metrics.stage("report"):
+        report = _stage(None if dedup is not None else cache, "report", report_key,
+                        lambda: build_report(df, settings["labels"], themes))
+    for lab, section in report.items():
+        section["key_themes"] = themes.get(lab, [])
+    out_json = output_dir / f"swot_report_{ticker}_{accession}{REPORT_SUFFIX}"
+    with metrics.stage("write"):
+        # the report's metrics are as of just before it was written
+        meta = {**report_meta, "sections": spans, "section_filter": include, "metrics": metrics.to_dict()}
+        write_report(out_json, {"meta": meta, "report": report})
+        metrics.count_bytes(out_json)
+    # a JSON report from before the binary format is superseded
+    out_json.with_suffix(".json").unlink(missing_ok=True)
+
+    entry = {**report_meta, "csv": str(out_csv), "json": str(out_json)}
+    if not raw.get("ticker"):
+        entry["ticker_inferred"] = True
+    if dedup is not None:
+        with metrics.stage("diff"):
+            refresh_diffs(output_dir, [entry], dedup)
+            metrics.count_bytes(entry.get("diff"))
+    return entry
+
+
+def rollup_rows(entry, report, themes):
+    """Catalog rollup rows (one per label) for a filing's ``report`` and its scored ``themes``."""
+    accession = str(entry["accession"])
+    return [{
+        "accession": accession, "label": lab, "ticker": entry.get("ticker"), "filing_date": entry.get("filing_date"),
+        "count": section.get("count", 0), "share": section.get("share"), "mean_score": section.get("mean_score"),
+        "themes": themes.get(lab, []),
+        "evidence": [f"{accession}:{row}" for row in section.get("evidence_rows", [])],
+    } for lab, section in report.items()]
+
+
+def refresh_key_themes(output_dir, entries, n=3):
+    """Re-score ``key_themes`` in the reports of ``entries`` against the current corpus.
+
+    Filings processed early in a batch were scored against a smaller corpus;
+    this brings them up to date in one vectorized pass. Only the themes
+    section of a binary report is rewritten. The rewritten reports replace
+    their rows in the catalog's label rollups.
+    """
+    entries = [e for e in entries if e.get("json") and Path(e["json"]).exists()]
+    if not entries:
+        return 0
+    with open_theme_index(output_dir) as theme_index:
+        scores = theme_index.theme_scores([e["accession"] for e in entries], n=n)
+    rollups = []
+    for e in entries:
+        report = read_report(e["json"], parts=("counts", "themes", "evidence"))["report"]
+        themes = scores.get(str(e["accession"]), {})
+        for lab, section in report.items():
+            section["key_themes"] = [term for term, _ in themes.get(lab, [])]
+        update_sections(e["json"], themes=split_report({"report": report})["themes"])
+        rollups.extend(rollup_rows(e, report, themes))
+    with open_catalog(output_dir) as catalog:
+        catalog.upsert_rollups(rollups)
+    return len(entries)
+
+
+def index_evidence(output_dir, entries):
+    """Add the sentences of ``entries`` to the evidence search index from their CSVs."""
+    entries = [e for e in entries if e.get("csv") and Path(e["csv"]).exists()]
+    with open_evidence_index(output_dir) as evidence:
+        for e in entries:
+            records = pd.read_csv(e["csv"], usecols=["sentence", "label", "score"], keep_default_na=False).to_dict("records")
+            evidence.add_filing(e, records)
+    return len(entries)
+
+
+def store_sentences(output_dir, entries):
+    """Append the sentences of ``entries`` to the memory-mapped sentence store from their CSVs.
+
+    Runs in the parent process only: the store has a single writer.
+    """
+    entries = [e for e in entries if e.get("csv") and Path(e["csv"]).exists()]
+    with open_sentence_store_writer(output_dir) as store:
+        for e in entries:
+            # CSVs written before sections were tracked have no section column
+            df = pd.read_csv(e["csv"], dtype={"section": str}, keep_default_na=False)
+            store.add_filing(e, df.reindex(columns=["sentence", "label", "score", "section"]).to_dict("records"))
+    return len(entries)
+
+
+def write_dataset(dataset_dir, entries):
+    """Write the sentences of ``entries`` into the Parquet sentence dataset from their CSVs."""
+    entries = [e for e in entries if e.get("csv") and Path(e["csv"]).exists()]
+    for e in entries:
+        df = pd.read_csv(e["csv"], dtype={"section": str}, keep_default_na=False)
+        records = df.reindex(columns=["sentence", "label", "score", "section"]).to_dict("records")
+        columnar.write_filing(dataset_dir, e, records)
+    return len(entries)
+
+
+def _index_options(dedup):
+    return {k: dedup[k] for k in ("threshold", "change_threshold") if k in dedup}
+
+
+def refresh_diffs(output_dir, entries, dedup):
+    """Write ``swot_diff_<ticker>_<accession>.json`` for ``entries`` that have an earlier filing.
+
+    Sets ``entry["diff"]`` to the file written. Run again after a batch so a
+    filing processed before its predecessor still gets its diff.
+    """
+    output_dir = Path(output_dir)
+    written = 0
+    with open_near_duplicate_index(output_dir, **_index_options(dedup)) as near_dups:
+        for e in entries:
+            diff = near_dups.diff(e["accession"])
+            if diff is None:
+                continue
+            path = output_dir / f"swot_diff_{e['ticker']}_{e['accession']}.json"
+            meta = {k: e.get(k) for k in ("ticker", "cik", "accession", "filing_date")}
+            counts = {k: len(diff[k]) for k in ("new", "removed", "changed")}
+            write_json_atomic(path, {"meta": meta, "counts": counts, **diff}, indent=2, ensure_ascii=False)
+            e["diff"] = str(path)
+            written += 1
+    return written
+
+
+def _process_filing_safely(doc, settings, content_hash=None):
+    try:
+        return {"entry": process_filing(doc, settings, content_hash)}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+
+
+def process_filings(docs, settings, workers=1, on_result=None, hashes=None, progress=None):
+    """Process ``docs`` and return ``(entries, failures)`` in input order.
+
+    With ``workers > 1`` each filing runs in its own process-pool task. A filing
+    that raises is reported in ``failures`` as ``(position, message)`` and does
+    not stop the others. ``on_result(position, result)`` is called in this
+    process as soon as each filing finishes. ``hashes`` are the documents'
+    content hashes, used as stage cache keys. ``progress(stage, done, total,
+    message)`` is told how many filings have finished.
+    """
+    hashes = hashes or [None] * len(docs)
+    results = [None] * len(docs)
+    finished = 0
+
+    def report(i):
+        nonlocal finished
+        finished += 1
+        if on_result:
+            on_result(i, results[i])
+        if progress:
+            progress("filings", finished, len(docs), f"{finished}/{len(docs)} filings processed")
+
+    if workers <= 1:
+        for i, doc in enumerate(tqdm(docs, desc="Processing filings")):
+            results[i] = _process_filing_safely(doc, settings, hashes[i])
+            report(i)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_process_filing_safely, doc, settings, hashes[i]): i for i, doc in enumerate(docs)}
+            for fut in tqdm(as_completed(futures), total=len(futures), desc="Processing filings"):
+                i = futures[fut]
+                try:
+                    results[i] = fut.result()
+                except Exception as e:
+                    # the task never ran, e.g. the document could not be pickled
+                    results[i] = {"error": f"{type(e).__name__}: {e}"}
+                report(i)
+
+    entries, failures = [], []
+    for i, res in enumerate(results):
+        if "error" in res:
+            print(f"Warning: filing #{i} failed: {res['error']}")
+            failures.append((i, res["error"]))
+        elif res["entry"] is not None:
+            entries.append(res["entry"])
+    return entries, failures
+
+
+def run_incremental(docs, settings, workers=1, hashes=None, progress=None, metrics=None):
+    """Process only filings the manifest has not seen with these rules, then merge the index.
+
+    ``hashes`` defaults to the content hash of each document. Returns
+    ``(entries, failures)`` for the filings processed in this call.
+    ``progress`` is passed on to ``process_filings``. The run's stage times
+    (``metrics``, e.g. already holding the download) and the summed
+    per-filing stage times are appended to ``pipeline_runs.jsonl``.
+    """
+    metrics = metrics or Metrics()
+    output_dir = settings["output_dir"]
+    version = rules_version(settings)
+    if hashes is None:
+        hashes = [document_hash(doc) for doc in docs]
+
+    # skip filings whose content and rules are unchanged since they were last processed
+    manifest = Manifest(output_dir)
+    todo, todo_hashes, reused = [], [], []
+    for doc, h in zip(docs, hashes):
+        rec = manifest.lookup(h, version)
+        if rec and not ticker_changed(rec.get('entry'), settings):
+            if rec.get('entry'):
+                reused.append(rec['entry'])
+            continue
+        todo.append(doc)
+        todo_hashes.append(h)
+    print(f"{len(docs) - len(todo)} filing(s) unchanged since last run; processing {len(todo)}.")
+
+    def checkpointer(batch, batch_hashes):
+        def checkpoint(i, result):
+            manifest.record(batch_hashes[i], version, result, accession=getattr(batch[i], 'accession', None))
+        return checkpoint
+
+    with metrics.stage("filings"):
+        entries, failures = process_filings(todo, settings, workers=workers, on_result=checkpointer(todo, todo_hashes),
+                                            hashes=todo_hashes, progress=progress)
+    if settings.get("dedup") is not None:
+        # a filing only sees the companies processed before it, so the first ones to contain a cluster kept it
+        redo, redo_hashes = _stale_boilerplate(manifest, version, settings, dict(zip(hashes, docs)))
+        if redo:
+            print(f"Re-filtering {len(redo)} filing(s) with sentences that have since become boilerplate.")
+            with metrics.stage("refilter"):
+                redone, more_failures = process_filings(redo, settings, workers=workers,
+                                                        on_result=checkpointer(redo, redo_hashes), hashes=redo_hashes,
+                                                        progress=progress)
+            failures += more_failures
+            done = {str(e["accession"]) for e in redone}
+            entries = [e for e in entries if str(e["accession"]) not in done] + redone
+            reused = [e for e in reused if str(e["accession"]) not in done]
+    if failures:
+        print(f"{len(failures)} filing(s) failed; they will be retried on the next run.")
+
+    if progress:
+        progress("index", 0, 1, "Updating key themes, diffs, catalog and index")
+    with metrics.stage("index"):
+        # reports written by an interrupted run or before rollups existed are rolled up now
+        with open_catalog(output_dir) as catalog:
+            rolled_up = catalog.rolled_up([e["accession"] for e in reused])
+        refresh_key_themes(output_dir, entries + [e for e in reused if str(e["accession"]) not in rolled_up])
+        with open_evidence_index(output_dir) as evidence:
+            searchable = evidence.indexed([e["accession"] for e in reused])
+        index_evidence(output_dir, [e for e in reused if str(e["accession"]) not in searchable])
+        with open_sentence_store(output_dir) as store:
+            stored = {str(e["accession"]) for e in reused if store.block(e["accession"])}
+        store_sentences(output_dir, entries + [e for e in reused if str(e["accession"]) not in stored])
+        if settings.get("dataset_dir"):
+            # the dataset is not part of the rules version; filings processed before it was enabled are added now
+            write_dataset(settings["dataset_dir"],
+                          [e for e in reused if not columnar.filing_paths(settings["dataset_dir"], e["accession"])])
+        if settings.get("dedup") is not None:
+            refresh_diffs(output_dir, entries, settings["dedup"])
+        # the catalog is what the dashboard reads; index.json is kept for older tools
+        with open_catalog(output_dir) as catalog:
+            catalog.upsert(reused + entries)
+        merge_index(output_dir, reused + entries)
+
+    # per-filing stages ran in worker processes; their sum shows where the work went
+    per_filing = Metrics()
+    for entry in entries:
+        per_filing.merge(entry.get("metrics", {}))
+    if per_filing.counters.get("zero_shot_seconds"):
+        n = per_filing.counters["zero_shot_sentences"]
+        print(f"Zero-shot classified {n} sentences at {n / per_filing.counters['zero_shot_seconds']:.1f} sentences/s")
+    record_run(output_dir, metrics, filings=len(entries), reused=len(reused), failed=len(failures),
+               workers=workers, filing_stages=per_filing.stages, filing_counters=per_filing.counters)
+    return entries, failures
+
+
+def _stale_boilerplate(manifest, version, settings, docs_by_hash):
+    """``(docs, hashes)`` of finished filings that kept sentences which are boilerplate by now.
+
+    Filings outside this run are included when their text is in the stage
+    cache; ``docs`` holds None for those.
+    """
+    dedup = settings["dedup"]
+    with open_near_duplicate_index(settings["output_dir"], **_index_options(dedup)) as near_dups:
+        stale = near_dups.stale_filings(dedup.get("boilerplate_tickers", BOILERPLATE_TICKERS))
+    redo, redo_hashes = [], []
+    for accession in stale:
+        rec = manifest.records.get(accession)
+        if not rec or rec.get('version') != version or rec.get('status') != 'done':
+            continue
+        doc = docs_by_hash.get(rec['content_hash'])
+        if doc is None and not settings.get("cache_dir"):
+            continue
+        redo.append(doc)
+        redo_hashes.append(rec['content_hash'])
+    return redo, redo_hashes
+
+
+def rerun_from_cache(settings, workers=1, progress=None):
+    """Re-run sentences -> labels -> report for every filing in the manifest.
+
+    Uses only the stage cache, so no datamule Portfolio is opened; meant for
+    trying out rule changes. Filings that never parsed successfully are left
+    for the next full run.
+    """
+    manifest = Manifest(settings["output_dir"])
+    hashes = list(dict.fromkeys(rec['content_hash'] for rec in manifest.records.values()
+                                if rec.get('content_hash') and rec.get('status') != 'failed'))
+    return run_incremental([None] * len(hashes), settings, workers=workers, hashes=hashes, progress=progress)
@@ -0,0 +1,212 @@
+"""Versioned binary SWOT report files whose sections load independently.
+
+A report is ``{"meta": {...}, "report": {label: {...}}}``. Written as JSON it
+has to be parsed whole even when a page only needs the counts, and reports
+keep growing (evidence lists, per-stage metrics, 10-K section spans). A
+``.swotr`` file stores it split into sections, each compact JSON, behind a
+table of contents, so reading one section costs two small reads plus the
+section itself:
+
+    b"SWOTRPT\\0"                         magic
+    uint16 schema version, uint16 section count
+    per section: uint8 name length, name, uint32 offset, uint32 length
+    section payloads, back to back
+
+Sections (``SECTIONS``):
+
+- ``header``: the filing metadata and the report's label order; always loaded
+- ``counts``: per label count, share, mean score and summary
+- ``themes``: per label key themes (and key insights, if any)
+- ``evidence``: per label top bullets and their CSV rows
+- ``metrics``, ``sections``: the pipeline metrics and 10-K Item spans from ``meta``
+- ``extra``: anything else in the report, e.g. ``executive_overview``
+
+``read_report`` reassembles the requested sections into the usual dict and
+reads existing ``.json`` reports transparently, whole. All integers are
+little-endian.
+"""
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+from swot.manifest import write_json_atomic
+
+SCHEMA_VERSION = 1
+SUFFIX = ".swotr"
+MAGIC = b"SWOTRPT\x00"
+SECTIONS = ("header", "counts", "themes", "evidence", "metrics", "sections", "extra")
+# per-label fields and the section they are stored in
+_FIELDS = {"count": "counts", "share": "counts", "mean_score": "counts", "summary": "counts",
+           "key_themes": "themes", "key_insights": "themes",
+           "top_bullets": "evidence", "evidence_rows": "evidence"}
+# meta keys stored in a section of their own
+_META_SECTIONS = ("metrics", "sections")
+
+_PREFIX = struct.Struct("<8sHH")
+_ENTRY = struct.Struct("<II")
+
+
+def is_binary(path):
+    """Whether ``path`` is a binary report (as opposed to a JSON one)."""
+    with open(path, "rb") as fh:
+        return fh.read(len(MAGIC)) == MAGIC
+
+
+def split_report(data):
+    """``{section: value}`` for a report dict."""
+    meta = dict(data.get("meta", {}))
+    report = data.get("report", {})
+    parts = {name: {} for name in ("counts", "themes", "evidence", "extra")}
+    for name in _META_SECTIONS:
+        parts[name] = meta.pop(name, None)
+    parts["header"] = {"meta": meta, "labels": list(report)}
+    for lab, value in report.items():
+        if not isinstance(value, dict):
+            parts["extra"][lab] = value
+            continue
+        for field, field_value in value.items():
+            section = _FIELDS.get(field, "extra")
+            parts[section].setdefault(lab, {})[field] = field_value
+    return parts
+
+
+def join_report(parts):
+    """The report dict for ``parts`` as returned by ``split_report`` (sections may be missing)."""
+    meta = dict(parts["header"]["meta"])
+    for name in _META_SECTIONS:
+        if parts.get(name) is not None:
+            meta[name] = parts[name]
+    report = {}
+    for lab in parts["header"]["labels"]:
+        extra = parts.get("extra", {}).get(lab)
+        if extra is not None and not isinstance(extra, dict):
+            report[lab] = extra
+            continue
+        merged = {}
+        for name in ("counts", "themes", "evidence", "extra"):
+            merged.update((parts.get(name) or {}).get(lab, {}))
+        report[lab] = merged
+    return {"meta": meta, "report": report}
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _pack(payloads):
+    """File bytes for ``{name: encoded payload}``."""
+    names = [n.encode("utf-8") for n in payloads]
+    toc_size = sum(1 + len(n) + _ENTRY.size for n in names)
+    offset = _PREFIX.size + toc_size
+    out = [_PREFIX.pack(MAGIC, SCHEMA_VERSION, len(names))]
+    for name, payload in zip(names, payloads.values()):
+        out.append(bytes([len(name)]) + name + _ENTRY.pack(offset, len(payload)))
+        offset += len(payload)
+    out.extend(payloads.values())
+    return b"".join(out)
+
+
+def _write_atomic(path, data):
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_report(path, data):
+    """Write ``data`` to ``path`` atomically; as indented JSON if ``path`` ends in ``.json``."""
+    if str(path).endswith(".json"):
+        write_json_atomic(path, data, indent=2, ensure_ascii=False)
+        return
+    parts = split_report(data)
+    _write_atomic(path, _pack({name: _encode(parts[name]) for name in SECTIONS}))
+
+
+class ReportFile:
+    """Lazily loaded report; sections are read on first access. Use as a context manager."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.fh = open(self.path, "rb")
+        self._parts = {}
+        magic, version, count = _PREFIX.unpack(self.fh.read(_PREFIX.size).ljust(_PREFIX.size, b"\0"))
+        self.toc = None
+        if magic != MAGIC:
+            # a JSON report: there is nothing to skip, so split it once
+            self.fh.seek(0)
+            self._parts = split_report(json.loads(self.fh.read().decode("utf-8")))
+            self.version = None
+            return
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{path} uses report schema {version}; this version reads up to {SCHEMA_VERSION}")
+        self.version = version
+        self.toc = {}
+        for _ in range(count):
+            name = self.fh.read(self.fh.read(1)[0]).decode("utf-8")
+            self.toc[name] = _ENTRY.unpack(self.fh.read(_ENTRY.size))
+
+    def raw(self, name):
+        """The encoded bytes of section ``name`` (binary reports only)."""
+        offset, length = self.toc[name]
+        self.fh.seek(offset)
+        return self.fh.read(length)
+
+    def section(self, name):
+        if name not in self._parts:
+            self._parts[name] = json.loads(self.raw(name)) if self.toc and name in self.toc else None
+        return self._parts[name]
+
+    @property
+    def meta(self):
+        return self.section("header")["meta"]
+
+    def load(self, parts=None):
+        """The report dict with only ``parts`` of ``SECTIONS`` (all if None) besides the header."""
+        for name in SECTIONS if parts is None else ("header", *parts):
+            self.section(name)
+        return join_report(self._parts)
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_report(path, parts=None):
+    """The report at ``path`` (binary or JSON) with only ``parts`` of ``SECTIONS`` loaded."""
+    with ReportFile(path) as report:
+        return report.load(parts)
+
+
+def read_section(path, name):
+    """One section of the report at ``path``, e.g. ``"counts"``."""
+    with ReportFile(path) as report:
+        return report.section(name)
+
+
+def update_sections(path, **values):
+    """Replace whole sections of the report at ``path``; the others are copied without decoding."""
+    with ReportFile(path) as report:
+        if report.toc is None:
+            data = {**report._parts, **values}
+        else:
+            payloads = {name: _encode(values[name]) if name in values else report.raw(name) for name in report.toc}
+            payloads.update((name, _encode(v)) for name, v in values.items() if name not in payloads)
+    if report.toc is None:
+        write_json_atomic(path, join_report(data), indent=2, ensure_ascii=False)
+    else:
+        _write_atomic(path, _pack(payloads))
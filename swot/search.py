@@ -0,0 +1,239 @@
+"""Full-text index over every labelled sentence of every processed filing.
+
+``EvidenceIndex`` keeps the sentences in an SQLite FTS5 table
+(``<output_dir>/evidence.sqlite3``, WAL mode so pool workers can add filings
+concurrently). Besides the sentence text, the ticker, label and filing year
+are indexed as their own columns, so filters narrow the full-text match
+instead of scanning every match; the exact values are then checked on the
+rows that remain. Results are ranked by BM25 on the sentence column.
+
+Each filing's sentences get a contiguous block of rowids, recorded in
+``filings``; re-indexing a filing deletes that block and appends a new one.
+Every hit carries its evidence ID, ``<accession>:<row>`` with ``row`` the
+sentence's row in the filing's CSV.
+
+BM25 has to score every match before the best ones are known, which for a
+term in most sentences of a multi-million sentence corpus takes seconds. Such
+queries are therefore ranked among their ``RANK_WINDOW`` most recently
+indexed matches only; finding that window walks the matches in rowid order
+and stops early, so latency stays bounded however large the corpus grows.
+
+Queries use FTS5 syntax restricted to what users need: bare words (a trailing
+``*`` is a prefix search), ``"quoted phrases"``, ``AND``/``OR``/``NOT`` and
+parentheses. ``to_fts_query`` quotes everything else, so punctuation in a
+query can never be a syntax error, and drops unquoted stopwords, which match
+nearly every sentence. Prefix queries of 3 to 6 characters use FTS5 prefix
+indexes.
+"""
+import re
+import sqlite3
+from pathlib import Path
+
+from swot.db import chunks, connect, write_txn
+
+EVIDENCE_NAME = "evidence.sqlite3"
+RANK_WINDOW = 20_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    accession   TEXT PRIMARY KEY,
+    ticker      TEXT,
+    filing_date TEXT,
+    first_row   INTEGER NOT NULL,
+    last_row    INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS sentences USING fts5(
+    sentence, ticker, label, year,
+    accession UNINDEXED, filing_date UNINDEXED, row UNINDEXED, score UNINDEXED,
+    tokenize = "porter unicode61 remove_diacritics 2", prefix = '3 4 5 6'
+);
+"""
+
+_QUERY_TOKEN = re.compile(r'"[^"]*"?|\(|\)|[^\s()"]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were which will with
+""".split())
+
+
+def _quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def to_fts_query(text):
+    """Translate a user query into a safe FTS5 expression, or None if it has no terms.
+
+    Quoted phrases stay phrases, ``AND``/``OR``/``NOT`` and parentheses stay
+    operators, ``word*`` is a prefix query (shorter prefixes than three
+    characters are plain words) and every other token is quoted. Adjacent
+    terms and groups are joined with an explicit ``AND``. Unbalanced parentheses, dangling operators and unquoted stopwords (unless
+    the query has nothing else) are dropped.
+    """
+    tokens = _QUERY_TOKEN.findall(text or "")
+    if any(t.lower() not in STOPWORDS for t in tokens if t not in _OPERATORS and t not in "()"):
+        tokens = [t for t in tokens if t.lower() not in STOPWORDS or t in _OPERATORS]
+    out, depth = [], 0
+
+    def operand(term):
+        # FTS5 accepts implicit AND between terms but not next to a parenthesized group
+        if out and out[-1] not in _OPERATORS and out[-1] != "(":
+            out.append("AND")
+        out.append(term)
+
+    for token in tokens:
+        if token.startswith('"'):
+            phrase = token.strip('"').strip()
+            if phrase:
+                operand(_quote(phrase))
+        elif token in _OPERATORS:
+            if out and out[-1] not in _OPERATORS and out[-1] != "(":
+                out.append(token)
+        elif token == "(":
+            operand(token)
+            depth += 1
+        elif token == ")":
+            if depth and out[-1] != "(":
+                while out[-1] in _OPERATORS:
+                    out.pop()
+                out.append(token)
+                depth -= 1
+        elif token.endswith("*") and len(token.strip("*")) >= 3:
+            operand(_quote(token.rstrip("*")) + "*")
+        elif token.strip("*"):
+            operand(_quote(token.strip("*")))
+    while out and (out[-1] in _OPERATORS or out[-1] == "("):
+        if out.pop() == "(":
+            depth -= 1
+    out.extend(")" * depth)
+    if not any(t not in _OPERATORS and t not in "()" for t in out):
+        return None
+    return " ".join(out)
+
+
+def _values(values):
+    return [str(v) for v in ([values] if isinstance(values, str) else values)]
+
+
+def _column_filter(column, values):
+    return f"{column} : (" + " OR ".join(_quote(v) for v in _values(values)) + ")"
+
+
+class EvidenceIndex:
+    """FTS5 index of labelled sentences; use as a context manager."""
+
+    def __init__(self, path, timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit; writes go through write_txn so rowid blocks never interleave
+        self.conn = connect(self.path, timeout)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- updates ----------------
+
+    def add_filing(self, meta, records):
+        """Add or replace the sentences of one filing; ``records`` in CSV row order."""
+        accession = str(meta["accession"])
+        ticker = meta.get("ticker")
+        filing_date = meta.get("filing_date")
+        year = str(filing_date or "")[:4] or None
+        conn = self.conn
+        with write_txn(conn):
+            old = conn.execute("SELECT first_row, last_row FROM filings WHERE accession = ?", (accession,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM sentences WHERE rowid BETWEEN ? AND ?", (old[0], old[1]))
+            first = (conn.execute("SELECT MAX(last_row) FROM filings").fetchone()[0] or 0) + 1
+            conn.executemany(
+                "INSERT INTO sentences (rowid, sentence, ticker, label, year, accession, filing_date, row, score) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((first + i, r["sentence"], ticker, r["label"], year, accession, filing_date, i, r.get("score"))
+                 for i, r in enumerate(records)),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO filings (accession, ticker, filing_date, first_row, last_row) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (accession, ticker, filing_date, first, first + len(records) - 1),
+            )
+
+    def optimize(self):
+        """Merge the FTS5 b-trees into one; worth running after a large backfill."""
+        self.conn.execute("INSERT INTO sentences (sentences) VALUES ('optimize')")
+
+    # ---------------- queries ----------------
+
+    def indexed(self, accessions):
+        """The subset of ``accessions`` already in the index."""
+        accessions = [str(a) for a in accessions]
+        found = set()
+        for chunk in chunks(accessions):
+            rows = self.conn.execute(
+                f"SELECT accession FROM filings WHERE accession IN ({','.join('?' * len(chunk))})", chunk)
+            found.update(r[0] for r in rows)
+        return found
+
+    def sentence_count(self):
+        row = self.conn.execute("SELECT COALESCE(SUM(last_row - first_row + 1), 0) FROM filings").fetchone()
+        return row[0]
+
+    def search(self, query, tickers=None, labels=None, start_date=None, end_date=None, limit=50, offset=0,
+               window=RANK_WINDOW):
+        """Ranked matches for ``query``, best first, with a highlighted ``snippet``.
+
+        Ticker and label filters (and the years of a closed date range) are
+        part of the full-text match. Those columns are tokenized like the
+        sentences, so the match is only a prefilter (``UP`` also matches
+        ``UPS``, ``BRK`` matches ``BRK.B``); exact tickers, labels and date
+        bounds are checked on the matching rows. Only the ``window`` most recently indexed matches are
+        ranked (None ranks all of them).
+        """
+        expr = to_fts_query(query)
+        if expr is None:
+            return []
+        clauses = [f"sentence : ({expr})"]
+        if tickers:
+            clauses.append(_column_filter("ticker", tickers))
+        if labels:
+            clauses.append(_column_filter("label", labels))
+        if start_date and end_date:
+            clauses.append(_column_filter("year", range(int(str(start_date)[:4]), int(str(end_date)[:4]) + 1)))
+        where, params = ["sentences MATCH ?"], [" AND ".join(clauses)]
+        for column, values in (("ticker", tickers), ("label", labels)):
+            if values:
+                values = _values(values)
+                where.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if start_date:
+            where.append("filing_date >= ?")
+            params.append(str(start_date))
+        if end_date:
+            where.append("filing_date <= ?")
+            params.append(str(end_date))
+        if window:
+            # rowid order needs no scoring and stops after ``window`` matches
+            oldest = self.conn.execute(
+                f"SELECT rowid FROM sentences WHERE {' AND '.join(where)} ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (*params, int(window) - 1),
+            ).fetchone()
+            if oldest is not None:
+                where.append("rowid >= ?")
+                params.append(oldest[0])
+        rows = self.conn.execute(
+            "SELECT accession, ticker, filing_date, label, row, score, sentence, "
+            "snippet(sentences, 0, '**', '**', '…', 32) AS snippet, bm25(sentences, 1.0, 0.0, 0.0, 0.0) AS rank "
+            f"FROM sentences WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset)),
+        )
+        return [{**dict(r), "evidence_id": f"{r['accession']}:{r['row']}"} for r in rows]
+
+
+def open_evidence_index(output_dir):
+    return EvidenceIndex(Path(output_dir) / EVIDENCE_NAME)
@@ -0,0 +1,225 @@
+"""Locate the standard Items of a 10-K in a parsed datamule document.
+
+A 10-K is a sequence of Items (1 Business, 1A Risk Factors, 7 MD&A, ...)
+preceded by a cover page. datamule returns it as a tree of parts and titled
+sections, as plain strings, or a mix of both, so Items are recognised three
+ways: by a dict key such as ``item1a`` or ``part2item7``, by a ``title`` such
+as ``"Item 1A. Risk Factors"``, and by a heading line (``Item 7. ...`` at the
+start of a line, but not a cross-reference that a hard wrap put there; see
+``is_heading``) inside a string.
+
+``index_sections`` walks the document once and returns the spans of every
+section as character offsets into the document's text, i.e. every string
+leaf in walk order concatenated. ``iter_section_texts`` walks it again and
+yields the text fragments tagged with their section, splitting strings at
+section boundaries. Text before the first Item is the ``"cover"`` section.
+A table of contents only produces a few short spans before the real Items,
+which hold next to no sentences.
+"""
+import re
+
+COVER = "cover"
+
+ITEMS = {
+    "1": "Business", "1A": "Risk Factors", "1B": "Unresolved Staff Comments", "1C": "Cybersecurity",
+    "2": "Properties", "3": "Legal Proceedings", "4": "Mine Safety Disclosures",
+    "5": "Market for Registrant's Common Equity", "6": "[Reserved]",
+    "7": "Management's Discussion and Analysis", "7A": "Quantitative and Qualitative Disclosures About Market Risk",
+    "8": "Financial Statements and Supplementary Data", "9": "Changes in and Disagreements with Accountants",
+    "9A": "Controls and Procedures", "9B": "Other Information",
+    "9C": "Disclosure Regarding Foreign Jurisdictions that Prevent Inspections",
+    "10": "Directors, Executive Officers and Corporate Governance", "11": "Executive Compensation",
+    "12": "Security Ownership", "13": "Certain Relationships and Related Transactions",
+    "14": "Principal Accountant Fees and Services", "15": "Exhibits and Financial Statement Schedules",
+    "16": "Form 10-K Summary",
+}
+# the narrative Items a SWOT analysis draws on
+DEFAULT_SECTIONS = ("1", "1A", "7", "7A")
+
+_KEY = re.compile(r'^(?:part[_\-\s]*[ivx\d]+[_\-\s]*)?item[_\-\s]*(\d{1,2}[a-c]?)$', re.I)
+_TITLE = re.compile(r'^\s*item\s*(\d{1,2}[a-c]?)\b', re.I)
+# "Item 1A." / "ITEM 7 -" at the start of a line, or a short line that is only "Item 7 <title>"
+_HEADING = re.compile(r'^[ \t\xa0]*item[ \t\xa0]*(\d{1,2}[a-cA-C]?)(?:[ \t\xa0]*[.:\-–—]|(?=[ \t\xa0][^\n]{0,120}$)|$)',
+                      re.I | re.M)
+_WORDS = re.compile(r"[a-z]+")
+_SENTENCE_END = ('.', '!', '?', ':', ';', ')', '"', '”', '’')
+
+
+def _item(match):
+    item = match.group(1).upper()
+    return item if item.rstrip("ABC") and int(item.rstrip("ABC")) <= 16 else None
+
+
+def _title_words(text, n):
+    return _WORDS.findall(text.lower().replace("'", "").replace("’", ""))[:n]
+
+
+def is_heading(before, line, section):
+    """Whether ``line``, an ``Item`` line of ``section`` preceded by ``before``, is a heading.
+
+    Hard-wrapped text puts cross-references such as "described under / Item
+    7. Management's Discussion ..." at the start of a line too. A heading
+    starts the text or follows a blank line, is set in capitals, or follows a
+    finished sentence and names the Item's own title.
+    """
+    lines = before.split("\n")
+    previous = lines[-2].strip() if len(lines) > 1 else before.strip()
+    if not previous or (any(c.isalpha() for c in line) and line == line.upper()):
+        return True
+    title = _title_words(ITEMS.get(section, ""), 2)
+    rest = re.sub(r'^\s*item\s*\w+\s*[.:\-–—]?', '', line, flags=re.I)
+    return previous.endswith(_SENTENCE_END) and bool(title) and _title_words(rest, len(title)) == title
+
+
+def heading_matches(text, before=""):
+    """``(match, section)`` for every Item heading line in ``text``; ``before`` is the text preceding it."""
+    for match in _HEADING.finditer(text):
+        section = _item(match)
+        if not section:
+            continue
+        start, end = match.start(), text.find("\n", match.start())
+        # is_heading only looks at the previous line
+        preceding = text[max(0, start - 512):start]
+        if start < 512:
+            preceding = before[start - 512:] + preceding
+        if is_heading(preceding, text[start:end if end >= 0 else len(text)], section):
+            yield match, section
+
+
+def normalize(section):
+    """``"item 1a"``, ``"1a"`` or ``"Item 1A."`` -> ``"1A"``; other names are lowercased."""
+    match = _TITLE.match(str(section)) or re.match(r'^\s*(\d{1,2}[a-c]?)\b', str(section), re.I)
+    return match.group(1).upper() if match else str(section).strip().lower()
+
+
+def _walk(doc_content):
+    """Yield ``("item", section)`` markers and ``("text", part_id, kind, string)`` in document order.
+
+    ``kind`` is ``"t"`` for text inside dict parts and ``"f"`` for top-level
+    strings, as in ``swot.pipeline.iter_filing_texts``.
+    """
+    for part_id, part in doc_content.items():
+        match = _KEY.match(str(part_id))
+        if match and _item(match):
+            yield ("item", _item(match))
+        if isinstance(part, dict):
+            match = _TITLE.match(str(part.get("title") or ""))
+            if match and _item(match):
+                yield ("item", _item(match))
+            # same traversal as swot.text.iter_text_from_contents, with the keys and titles in view
+            stack = [iter([(None, part.get('contents', {}))])]
+            while stack:
+                entry = next(stack[-1], None)
+                if entry is None:
+                    stack.pop()
+                    continue
+                key, item = entry
+                if isinstance(item, str):
+                    yield ("text", str(part_id), "t", item)
+                    continue
+                match = _KEY.match(str(key)) if isinstance(key, str) else None
+                if match and _item(match):
+                    yield ("item", _item(match))
+                if isinstance(item, dict):
+                    stack.append(iter(item.items()))
+                elif isinstance(item, list):
+                    stack.append(iter(enumerate(item)))
+        elif isinstance(part, str) and len(part) > 30:
+            yield ("text", str(part_id), "f", part)
+
+
+def index_sections(doc_content):
+    """Spans ``{"section", "title", "start", "end"}`` covering the document's text, in order."""
+    spans = [{"section": COVER, "title": "Cover page", "start": 0, "end": 0}]
+    pos = 0
+
+    def start(section, offset):
+        if section == spans[-1]["section"]:
+            return
+        spans[-1]["end"] = offset
+        spans.append({"section": section, "title": ITEMS.get(section, section), "start": offset, "end": offset})
+
+    for event in _walk(doc_content):
+        if event[0] == "item":
+            start(event[1], pos)
+            continue
+        text = event[3]
+        for match, section in heading_matches(text):
+            start(section, pos + match.start())
+        pos += len(text)
+    spans[-1]["end"] = pos
+    # drop empty spans, e.g. the cover when the document opens with Item 1
+    return [s for s in spans if s["end"] > s["start"]]
+
+
+def iter_section_texts(doc_content, spans):
+    """Yield ``[kind, part_id, text, section]`` fragments, split at the boundaries in ``spans``."""
+    boundaries = [(s["start"], s["section"]) for s in spans]
+    i = 0
+    section = boundaries[0][1] if boundaries else COVER
+    pos = 0
+    for event in _walk(doc_content):
+        if event[0] != "text":
+            continue
+        _, part_id, kind, text = event
+        end = pos + len(text)
+        offset = pos
+        while i < len(boundaries) and boundaries[i][0] < end:
+            cut = boundaries[i][0] - pos
+            if cut > offset - pos:
+                yield [kind, part_id, text[offset - pos:cut], section]
+                offset = boundaries[i][0]
+            section = boundaries[i][1]
+            i += 1
+        if end > offset:
+            yield [kind, part_id, text[offset - pos:], section]
+        pos = end
+
+
+class SectionSplitter:
+    """Tag text that arrives in chunks with its section, without holding the whole text.
+
+    The streaming counterpart of ``index_sections`` + ``iter_section_texts``
+    for plain text: ``split`` cuts each chunk at Item heading lines and
+    ``spans`` grows as chunks pass. Chunks should end at line breaks: a
+    heading line cut in two is missed.
+    """
+
+    def __init__(self):
+        self.spans = [{"section": COVER, "title": "Cover page", "start": 0, "end": 0}]
+        self.pos = 0
+        self._line_start = True
+        self._tail = ""
+
+    @property
+    def section(self):
+        return self.spans[-1]["section"]
+
+    def split(self, text):
+        """Yield ``(section, piece)`` for ``text``, cut where an Item heading starts."""
+        offset = 0
+        for match, section in heading_matches(text, self._tail):
+            # a chunk cut mid-line does not start a line
+            if section == self.section or (match.start() == 0 and not self._line_start):
+                continue
+            if match.start() > offset:
+                yield self.section, text[offset:match.start()]
+            self.spans[-1]["end"] = self.pos + match.start()
+            self.spans.append({"section": section, "title": ITEMS.get(section, section),
+                               "start": self.pos + match.start(), "end": self.pos + match.start()})
+            offset = match.start()
+        if len(text) > offset:
+            yield self.section, text[offset:]
+        self.pos += len(text)
+        self.spans[-1]["end"] = self.pos
+        self._line_start = text.endswith("\n")
+        self._tail = (self._tail + text[-512:])[-512:]
+
+    def finish(self):
+        """The spans of every section seen, as ``index_sections`` returns them."""
+        return [s for s in self.spans if s["end"] > s["start"]]
+
+
+def has_items(spans):
+    """Whether any Item was found, i.e. whether section filtering can apply."""
+    return any(s["section"] != COVER for s in spans)
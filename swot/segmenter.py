@@ -0,0 +1,99 @@
+"""Abbreviation-aware sentence segmentation for filing text.
+
+``Segmenter`` replaces the ``clean_text`` + ``split_sentences`` pair: it drops
+control characters, finds sentence boundaries and collapses whitespace in one
+scan, and applies the length filter to the normalized sentences. Boundaries
+after abbreviations common in filings ("Inc.", "U.S.", "No. 1", "Item 1A.")
+are ignored unless the next word clearly starts a new sentence.
+"""
+import re
+
+from swot.text import MAX_SENTENCE_LENGTH, MIN_SENTENCE_LENGTH
+
+ABBREVIATIONS = frozenset("""
+inc corp co ltd llc llp lp plc sa ag nv bv
+no nos vs v etc approx est dept div assn bros
+mr mrs ms dr prof sr jr st gen gov rep sen
+jan feb mar apr jun jul aug sep sept oct nov dec
+fig figs sec secs art ch pp para par reg regs stat
+e.g i.e cf al ex exh viz
+""".split())
+
+# words that almost always start a sentence, even right after an abbreviation
+SENTENCE_STARTERS = frozenset("""
+the a an this these those that we our us it its in on at for as if
+however although because during while when where there such each any all
+no none other under pursuant see refer item part
+""".split())
+
+# C0 control characters that str.split() does not treat as whitespace, and DEL
+_CONTROL = re.compile(r'[\x00-\x08\x0e-\x1b\x7f]')
+
+# candidate boundary: terminal punctuation, optional closing quotes/brackets, whitespace
+_BOUNDARY = re.compile(r'[.!?]+["\'\)\]”’]*(\s+)')
+
+_INITIALISM = re.compile(r'^(?:[A-Za-z]\.)*[A-Za-z]$')
+_LEADING_PUNCT = '("\'[“‘'
+
+
+class Segmenter:
+    """Split text into sentences of ``min_len``..``max_len`` normalized characters."""
+
+    def __init__(self, min_len=MIN_SENTENCE_LENGTH, max_len=MAX_SENTENCE_LENGTH,
+                 abbreviations=ABBREVIATIONS, starters=SENTENCE_STARTERS):
+        self.min_len = min_len
+        self.max_len = max_len
+        self.abbreviations = frozenset(a.lower() for a in abbreviations)
+        self.starters = frozenset(w.lower() for w in starters)
+
+    def _is_boundary(self, text, m):
+        nxt = m.end()
+        if nxt >= len(text):
+            return True
+        if text[nxt].islower():
+            return False
+        dot = m.start()
+        if text[dot] != ".":
+            return True
+        # token before the dot; abbreviations are short, so a small window is enough
+        head = text[max(0, dot - 12):dot].split()
+        word = head[-1].lstrip(_LEADING_PUNCT) if head and dot and not text[dot - 1].isspace() else ""
+        if not word:
+            return True
+        if word.lower() not in self.abbreviations and not _INITIALISM.match(word):
+            return True
+        # "Apple Inc. The Company ..." vs. "Apple Inc. Board", "No. 1", "U.S. Treasury"
+        following = text[nxt:nxt + 16].split(None, 1)[0]
+        return following.strip('"\'(“‘').rstrip('.,;:').lower() in self.starters
+
+    def iter_split(self, text):
+        """Yield the sentences of ``text`` that pass the length filter."""
+        if not isinstance(text, str):
+            return
+        if _CONTROL.search(text):
+            text = _CONTROL.sub("", text)
+        min_len, max_len = self.min_len, self.max_len
+        is_boundary = self._is_boundary
+        start = 0
+        for m in _BOUNDARY.finditer(text):
+            if not is_boundary(text, m):
+                continue
+            sent = " ".join(text[start:m.start(1)].split())
+            start = m.end()
+            if min_len <= len(sent) <= max_len:
+                yield sent
+        sent = " ".join(text[start:].split())
+        if min_len <= len(sent) <= max_len:
+            yield sent
+
+    def split(self, text):
+        return list(self.iter_split(text))
+
+    def iter_split_batch(self, texts):
+        """Yield the sentences of every text in ``texts``, in order."""
+        for text in texts:
+            yield from self.iter_split(text)
+
+    def split_batch(self, texts):
+        """One sentence list per input text."""
+        return [self.split(text) for text in texts]
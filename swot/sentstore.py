@@ -0,0 +1,310 @@
+"""Compact, memory-mapped store of every labelled sentence.
+
+Reading a filing's CSV back means parsing all of it, although the dashboard
+only ever shows a handful of sentences at a time. ``<output_dir>/sentence_store/``
+holds the same sentences as flat files that are opened with ``mmap``, so any
+sentence, or any slice of labels, scores or sections, is read in O(1) without
+loading the rest:
+
+- ``text-<g>.bin``: the UTF-8 sentences back to back
+- ``ends-<g>.u64``: where each sentence ends in the text (it starts where the previous one ends)
+- ``filing-<g>.u32``, ``label-<g>.u8``, ``section-<g>.u8``, ``score-<g>.f32``: one value per sentence
+- ``filings-<g>.jsonl``: one line per filing block (accession, ticker, filing date, first row, row count)
+- ``meta.json``: the committed sizes, the label and section names behind the codes, and the generation ``g``
+
+The store is append-only and has a single writer (the pipeline's parent
+process). A filing is written as one contiguous block of rows in CSV order,
+so the evidence ID ``<accession>:<row>`` is row ``first + row``. Re-adding a
+filing appends a new block and the old one becomes garbage. Appends only
+become visible when ``meta.json`` is replaced, which a reader can check for
+with ``SentenceStore.stale()``. Bytes written after the last commit, e.g. by
+a crashed run, are truncated when the next writer opens. When garbage
+outgrows the live rows, the writer copies the live blocks into a new
+generation of files on close; open readers keep mapping the old files.
+"""
+import json
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+from swot.manifest import write_json_atomic
+
+STORE_DIR = "sentence_store"
+VERSION = 1
+
+# code 0 of the label and section vocabularies stands for "none"
+_ARRAYS = {"ends": np.uint64, "filing": np.uint32, "label": np.uint8, "section": np.uint8, "score": np.float32}
+_SUFFIXES = {"text": "bin", "filings": "jsonl", "ends": "u64", "filing": "u32", "label": "u8", "section": "u8",
+             "score": "f32"}
+_EMPTY_META = {"version": VERSION, "generation": 0, "rows": 0, "text_bytes": 0, "filings_bytes": 0,
+               "labels": [None], "sections": [None]}
+MAX_CODES = 256
+
+
+def _file(path, name, generation):
+    return Path(path) / f"{name}-{generation}.{_SUFFIXES[name]}"
+
+
+def _read_meta(path):
+    try:
+        with open(Path(path) / "meta.json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except FileNotFoundError:
+        return dict(_EMPTY_META)
+    if meta.get("version") != VERSION:
+        raise RuntimeError(f"unsupported sentence store version {meta.get('version')} in {path}")
+    return meta
+
+
+def _blank(value):
+    return value is None or value == "" or (isinstance(value, float) and value != value)
+
+
+def _latest_blocks(filings):
+    """The current block of each accession: later blocks replace earlier ones."""
+    return {f["accession"]: i for i, f in enumerate(filings)}
+
+
+class SentenceStoreWriter:
+    """Append filings to the store at ``path``; use as a context manager, which commits on exit."""
+
+    def __init__(self, path, compact_ratio=1.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.compact_ratio = compact_ratio
+        self.meta = _read_meta(self.path)
+        self._open(self.meta)
+
+    def _open(self, meta):
+        g = meta["generation"]
+        sizes = {"text": meta["text_bytes"], "filings": meta["filings_bytes"],
+                 **{name: meta["rows"] * np.dtype(dtype).itemsize for name, dtype in _ARRAYS.items()}}
+        self.files = {}
+        for name, size in sizes.items():
+            fh = open(_file(self.path, name, g), "ab")
+            # drop whatever an interrupted writer appended after the last commit
+            fh.truncate(size)
+            self.files[name] = fh
+        self.filings = self._read_filings(meta)
+        self.rows, self.text_bytes = meta["rows"], meta["text_bytes"]
+        self.labels, self.sections = list(meta["labels"]), list(meta["sections"])
+
+    def _read_filings(self, meta):
+        with open(_file(self.path, "filings", meta["generation"]), "rb") as fh:
+            return [json.loads(line) for line in fh.read(meta["filings_bytes"]).splitlines()]
+
+    def _code(self, vocab, value):
+        if _blank(value):
+            return 0
+        value = str(value)
+        try:
+            return vocab.index(value)
+        except ValueError:
+            if len(vocab) >= MAX_CODES:
+                raise ValueError(f"more than {MAX_CODES - 1} distinct values for one sentence store column")
+            vocab.append(value)
+            return len(vocab) - 1
+
+    def add_filing(self, meta, records):
+        """Append one filing's ``records`` (dicts with sentence, label, score, section) in CSV row order."""
+        records = list(records)
+        blobs = [str(r["sentence"]).encode("utf-8") for r in records]
+        ends = self.text_bytes + np.cumsum([len(b) for b in blobs], dtype=np.uint64)
+        filing_id = len(self.filings)
+        block = {"accession": str(meta["accession"]), "ticker": meta.get("ticker"),
+                 "filing_date": meta.get("filing_date"), "first": self.rows, "count": len(records)}
+        scores = [np.nan if _blank(r.get("score")) else float(r["score"]) for r in records]
+        self.files["text"].write(b"".join(blobs))
+        self.files["ends"].write(ends.astype(np.uint64).tobytes())
+        self.files["filing"].write(np.full(len(records), filing_id, dtype=np.uint32).tobytes())
+        self.files["label"].write(np.array([self._code(self.labels, r.get("label")) for r in records],
+                                           dtype=np.uint8).tobytes())
+        self.files["section"].write(np.array([self._code(self.sections, r.get("section")) for r in records],
+                                             dtype=np.uint8).tobytes())
+        self.files["score"].write(np.array(scores, dtype=np.float32).tobytes())
+        self.files["filings"].write(json.dumps(block, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.filings.append(block)
+        self.rows += len(records)
+        self.text_bytes = int(ends[-1]) if records else self.text_bytes
+        return block["first"]
+
+    def commit(self):
+        """Make every appended filing visible to readers."""
+        for fh in self.files.values():
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.meta = {**self.meta, "rows": self.rows, "text_bytes": self.text_bytes,
+                     "filings_bytes": self.files["filings"].tell(), "labels": self.labels, "sections": self.sections}
+        write_json_atomic(self.path / "meta.json", self.meta)
+
+    def garbage(self):
+        """Rows in blocks that a later block of the same filing replaced."""
+        live = sum(self.filings[i]["count"] for i in _latest_blocks(self.filings).values())
+        return self.rows - live
+
+    def compact(self):
+        """Copy the live blocks into a new generation of files and switch the store to it."""
+        self.commit()
+        old = self.meta
+        for fh in self.files.values():
+            fh.close()
+        with SentenceStore(self.path) as reader:
+            g = old["generation"] + 1
+            for name in ("text", "filings", *_ARRAYS):
+                _file(self.path, name, g).unlink(missing_ok=True)
+            self.meta = {**_EMPTY_META, "generation": g, "labels": old["labels"], "sections": old["sections"]}
+            self._open(self.meta)
+            for i in sorted(_latest_blocks(reader.filings).values()):
+                block = reader.filings[i]
+                start, stop = block["first"], block["first"] + block["count"]
+                self.add_filing(block, reader.rows(start, stop))
+            self.commit()
+        for name in ("text", "filings", *_ARRAYS):
+            try:
+                _file(self.path, name, old["generation"]).unlink(missing_ok=True)
+            except OSError:
+                pass  # still mapped by a reader on a platform that forbids deleting open files
+
+    def close(self):
+        if self.files["text"].closed:
+            return
+        self.commit()
+        if self.rows and self.garbage() > self.compact_ratio * (self.rows - self.garbage()):
+            self.compact()
+        for fh in self.files.values():
+            fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            # leave the last commit as it is; the next writer truncates what was appended since
+            for fh in self.files.values():
+                fh.close()
+
+
+class SentenceStore:
+    """Read-only, memory-mapped view of the store at ``path`` as of its last commit."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = _read_meta(self.path)
+        g, n = self.meta["generation"], self.meta["rows"]
+        self._maps = []
+        self.text = self._map(_file(self.path, "text", g), self.meta["text_bytes"])
+        arrays = {}
+        for name, dtype in _ARRAYS.items():
+            buf = self._map(_file(self.path, name, g), n * np.dtype(dtype).itemsize)
+            arrays[name] = np.frombuffer(buf, dtype=dtype, count=n) if n else np.empty(0, dtype=dtype)
+        self.ends, self.filing_ids = arrays["ends"], arrays["filing"]
+        self.label_codes, self.section_codes, self.scores = arrays["label"], arrays["section"], arrays["score"]
+        self.labels, self.sections = self.meta["labels"], self.meta["sections"]
+        filings_path = _file(self.path, "filings", g)
+        self.filings = []
+        if self.meta["filings_bytes"]:
+            with open(filings_path, "rb") as fh:
+                self.filings = [json.loads(line) for line in fh.read(self.meta["filings_bytes"]).splitlines()]
+        self._blocks = _latest_blocks(self.filings)
+
+    def _map(self, path, size):
+        if not size:
+            return b""
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def close(self):
+        # numpy views keep the maps alive; drop them before closing
+        self.ends = self.filing_ids = self.label_codes = self.section_codes = self.scores = None
+        self.text = None
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # a caller still holds a slice; the map closes when it is released
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def stale(self):
+        """Whether a writer has committed since this store was opened."""
+        return _read_meta(self.path) != self.meta
+
+    # ---------------- rows ----------------
+
+    def sentence(self, i):
+        start = int(self.ends[i - 1]) if i else 0
+        return self.text[start:int(self.ends[i])].decode("utf-8")
+
+    def record(self, i):
+        """Row ``i`` as a dict with its filing's metadata and evidence ID."""
+        block = self.filings[int(self.filing_ids[i])]
+        row = int(i) - block["first"]
+        score = float(self.scores[i])
+        return {"accession": block["accession"], "ticker": block["ticker"], "filing_date": block["filing_date"],
+                "row": row, "evidence_id": f"{block['accession']}:{row}", "sentence": self.sentence(i),
+                "label": self.labels[self.label_codes[i]], "section": self.sections[self.section_codes[i]],
+                "score": None if score != score else score}
+
+    def rows(self, start, stop):
+        return [self.record(i) for i in range(start, min(stop, len(self)))]
+
+    def block(self, accession):
+        """``(first, count)`` of the current rows of ``accession``, or None if it is not stored."""
+        i = self._blocks.get(str(accession))
+        return None if i is None else (self.filings[i]["first"], self.filings[i]["count"])
+
+    def get(self, evidence_id):
+        """The record behind ``"<accession>:<row>"``, or None if unknown."""
+        accession, _, row = str(evidence_id).rpartition(":")
+        block = self.block(accession)
+        if block is None or not row.isdigit() or int(row) >= block[1]:
+            return None
+        return self.record(block[0] + int(row))
+
+    def filing_rows(self, accession, labels=None, sections=None, offset=0, limit=None):
+        """Records of one filing in CSV order, optionally only the given labels and sections.
+
+        Filters are applied to the mapped code arrays, so only the returned
+        sentences are decoded.
+        """
+        block = self.block(accession)
+        if block is None:
+            return []
+        rows = np.flatnonzero(self._mask(block, labels, sections))[offset:None if limit is None else offset + limit]
+        return [self.record(block[0] + int(r)) for r in rows]
+
+    def count(self, accession, labels=None, sections=None):
+        block = self.block(accession)
+        return 0 if block is None else int(self._mask(block, labels, sections).sum())
+
+    def _mask(self, block, labels, sections):
+        first, count = block
+        mask = np.ones(count, dtype=bool)
+        for codes, vocab, values in ((self.label_codes, self.labels, labels),
+                                     (self.section_codes, self.sections, sections)):
+            if values is not None:
+                values = [values] if isinstance(values, str) else list(values)
+                mask &= np.isin(codes[first:first + count], [i for i, v in enumerate(vocab) if v in values])
+        return mask
+
+
+def open_sentence_store(output_dir):
+    return SentenceStore(Path(output_dir) / STORE_DIR)
+
+
+def open_sentence_store_writer(output_dir):
+    return SentenceStoreWriter(Path(output_dir) / STORE_DIR)
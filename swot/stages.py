@@ -0,0 +1,124 @@
+"""On-disk cache for materialized pipeline stages.
+
+The pipeline runs as four stages, each keyed by a hash of its input key, its
+parameters and the source of the code that computes it. ``text`` and
+``sentences`` are stored as gzipped JSON lines so they can be written and read
+back as streams:
+
+    text       parsed datamule document -> raw text fragments + metadata
+    sentences  text -> cleaned, split sentences
+    labels     sentences -> labelled records
+    report     labels -> per-label report
+
+Changing ``KEYWORDS`` only changes the ``labels`` and ``report`` keys, so the
+expensive ``doc.parse()`` and extraction results are reused as they are.
+"""
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+
+STAGES = ("text", "sentences", "labels", "report")
+
+
+def code_version(*funcs):
+    """Hash of the source of ``funcs`` (functions, classes or modules) so editing a stage function invalidates it."""
+    h = hashlib.sha256()
+    for fn in funcs:
+        try:
+            h.update(inspect.getsource(fn).encode('utf-8'))
+        except (OSError, TypeError):
+            h.update(f"{fn.__module__}.{fn.__qualname__}".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def stage_key(stage, upstream, params=None):
+    """Key for ``stage`` given the key (or content hash) of its input and its parameters."""
+    blob = json.dumps([stage, upstream, params], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    """Gzipped files under ``<cache_dir>/<stage>/<key[:2]>/``.
+
+    Whole values are stored as ``<key>.json.gz``; streams written with
+    ``put_stream`` as ``<key>.jsonl.gz``, one JSON value per line.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, stage, key, suffix=".json.gz"):
+        return self.cache_dir / stage / key[:2] / f"{key}{suffix}"
+
+    def has(self, stage, key):
+        return self._path(stage, key).exists()
+
+    def get(self, stage, key):
+        path = self._path(stage, key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError):
+            # truncated entry from an interrupted write; treat as a miss
+            return None
+
+    def put(self, stage, key, value):
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', compresslevel=5) as fh:
+                json.dump(value, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return value
+
+    def get_stream(self, stage, key):
+        """Iterator over a cached stream, or None if it is not cached."""
+        path = self._path(stage, key, ".jsonl.gz")
+        if not path.exists():
+            return None
+        return self._read_lines(path)
+
+    @staticmethod
+    def _read_lines(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                yield json.loads(line)
+
+    def put_stream(self, stage, key, items):
+        """Pass ``items`` through while writing them to the cache.
+
+        The entry only becomes visible once ``items`` is exhausted; if the
+        consumer stops early the partial file is discarded.
+        """
+        path = self._path(stage, key, ".jsonl.gz")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', compresslevel=5) as fh:
+                for item in items:
+                    fh.write(json.dumps(item, ensure_ascii=False))
+                    fh.write("\n")
+                    yield item
+            complete = True
+            os.replace(tmp, path)
+        finally:
+            if not complete and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def get_or_compute(self, stage, key, compute):
+        value = self.get(stage, key)
+        if value is None:
+            value = self.put(stage, key, compute())
+        return value
@@ -0,0 +1,58 @@
+"""Text utilities shared by the notebook and the filing workers."""
+import re
+from pathlib import Path
+
+MAX_SENTENCE_LENGTH = 500
+MIN_SENTENCE_LENGTH = 30
+
+_DONE = object()
+
+
+def ensure_dir(path):
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def clean_text(text: str) -> str:
+    if not isinstance(text, str):
+        return ""
+    # Normalize whitespace and remove control chars
+    t = re.sub(r"[\r\x0c]+", "\n", text)
+    t = re.sub(r"\s+", " ", t)
+    t = t.strip()
+    return t
+
+
+def split_sentences(text: str, min_len=MIN_SENTENCE_LENGTH, max_len=MAX_SENTENCE_LENGTH):
+    # naive punctuation-based split; good starting point
+    sents = re.split(r'(?<=[.!?])\s+', text)
+    out = []
+    for s in sents:
+        s = s.strip()
+        if len(s) >= min_len and len(s) <= max_len:
+            out.append(s)
+    return out
+
+
+def iter_text_from_contents(contents):
+    """Lazily yield strings from nested datamule 'contents' dicts or lists.
+
+    Uses an explicit stack instead of recursion, so arbitrarily deep nesting
+    neither builds intermediate lists nor hits the recursion limit. Strings
+    come out in the same order as a depth-first walk of the structure.
+    """
+    stack = [iter((contents,))]
+    while stack:
+        item = next(stack[-1], _DONE)
+        if item is _DONE:
+            stack.pop()
+        elif isinstance(item, str):
+            yield item
+        elif isinstance(item, dict):
+            stack.append(iter(item.values()))
+        elif isinstance(item, list):
+            stack.append(iter(item))
+
+
+def extract_text_from_contents(contents):
+    """Extract strings from nested datamule 'contents' dicts or lists."""
+    return list(iter_text_from_contents(contents))
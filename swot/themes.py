@@ -0,0 +1,188 @@
+"""Corpus-level TF-IDF key themes, updated incrementally as filings arrive.
+
+``ThemeIndex`` keeps a shared vocabulary and a sparse term-document index in
+SQLite (``<output_dir>/themes.sqlite3``, WAL mode so pool workers can add
+filings concurrently):
+
+* ``terms``: vocabulary with the number of filings each term appears in (df)
+* ``documents``: one row per accession with its packed, sorted term ids, so a
+  re-processed filing can be taken back out of the df counts
+* ``postings``: per (filing, label) term frequencies, capped to the
+  ``POSTINGS_PER_LABEL`` most frequent terms to keep the index small
+
+Adding a filing only touches that filing's rows and the df of its terms, so the
+corpus statistics never have to be recomputed from scratch. Themes are scored
+as sublinear tf x smoothed idf, vectorized over every (filing, label) of a
+batch at once.
+"""
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from swot.db import chunks, connect, write_txn
+
+THEMES_NAME = "themes.sqlite3"
+POSTINGS_PER_LABEL = 256
+
+_TOKEN = re.compile(r'\b[a-z]{4,}\b')
+
+# words that carry no theme on their own; corpus idf takes care of domain-generic ones
+STOPWORDS = frozenset("""
+that with have this will from they been said each which their there these those
+would could should other such more also into than then them were what when where
+while about after before over under upon within without through during including
+based however therefore thus only well most much many some very
+""".split())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term    TEXT NOT NULL UNIQUE,
+    df      INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id    INTEGER PRIMARY KEY,
+    accession TEXT NOT NULL UNIQUE,
+    terms     BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    doc_id  INTEGER NOT NULL,
+    label   TEXT NOT NULL,
+    term_id INTEGER NOT NULL,
+    tf      INTEGER NOT NULL,
+    PRIMARY KEY (doc_id, label, term_id)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text):
+    return [w for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS]
+
+
+def term_counts(sentences):
+    """Term frequencies of a list of sentences."""
+    counts = Counter()
+    for sentence in sentences:
+        counts.update(tokenize(sentence))
+    return counts
+
+
+def label_term_counts(records):
+    """``{label: Counter}`` over labelled records (dicts with ``sentence`` and ``label``)."""
+    by_label = {}
+    for r in records:
+        by_label.setdefault(r["label"], Counter()).update(tokenize(r["sentence"]))
+    return by_label
+
+
+def _pack(ids):
+    return zlib.compress(np.diff(np.asarray(sorted(ids), dtype=np.int64), prepend=0).astype(np.uint32).tobytes())
+
+
+def _unpack(blob):
+    return np.cumsum(np.frombuffer(zlib.decompress(blob), dtype=np.uint32).astype(np.int64)).tolist()
+
+
+class ThemeIndex:
+    """Vocabulary, document frequencies and per-label postings; use as a context manager."""
+
+    def __init__(self, path, timeout=60.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit; writes go through write_txn so df updates never interleave
+        self.conn = connect(self.path, timeout)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- updates ----------------
+
+    def _term_ids(self, terms):
+        ids = {}
+        for chunk in chunks(terms):
+            rows = self.conn.execute(
+                f"SELECT term, term_id FROM terms WHERE term IN ({','.join('?' * len(chunk))})", chunk)
+            ids.update(rows)
+        return ids
+
+    def add_filing(self, accession, label_counts):
+        """Add or replace one filing's ``{label: {term: tf}}`` counts."""
+        accession = str(accession)
+        vocabulary = set()
+        for counts in label_counts.values():
+            vocabulary.update(counts)
+
+        conn = self.conn
+        with write_txn(conn):
+            row = conn.execute("SELECT doc_id, terms FROM documents WHERE accession = ?", (accession,)).fetchone()
+            if row:
+                doc_id = row[0]
+                if row[1]:
+                    conn.executemany("UPDATE terms SET df = df - 1 WHERE term_id = ?",
+                                     [(t,) for t in _unpack(row[1])])
+                conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            else:
+                doc_id = conn.execute("INSERT INTO documents (accession) VALUES (?)", (accession,)).lastrowid
+
+            conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in vocabulary])
+            ids = self._term_ids(vocabulary)
+            conn.executemany("UPDATE terms SET df = df + 1 WHERE term_id = ?", [(i,) for i in ids.values()])
+            conn.execute("UPDATE documents SET terms = ? WHERE doc_id = ?", (_pack(ids.values()), doc_id))
+            conn.executemany(
+                "INSERT INTO postings (doc_id, label, term_id, tf) VALUES (?, ?, ?, ?)",
+                [(doc_id, label, ids[term], tf)
+                 for label, counts in label_counts.items()
+                 for term, tf in Counter(counts).most_common(POSTINGS_PER_LABEL)],
+            )
+
+    # ---------------- scoring ----------------
+
+    def document_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def key_themes(self, accessions, n=3):
+        """``{accession: {label: [top n terms]}}`` scored against the current corpus."""
+        return {accession: {label: [term for term, _ in terms] for label, terms in labels.items()}
+                for accession, labels in self.theme_scores(accessions, n).items()}
+
+    def theme_scores(self, accessions, n=3):
+        """``{accession: {label: [[term, tf-idf score], ...]}}`` for the top ``n`` terms."""
+        accessions = [str(a) for a in accessions]
+        frames = []
+        for chunk in chunks(accessions):
+            frames.append(pd.read_sql_query(
+                "SELECT d.accession, p.label, t.term, p.tf, t.df "
+                "FROM documents d JOIN postings p ON p.doc_id = d.doc_id JOIN terms t ON t.term_id = p.term_id "
+                f"WHERE d.accession IN ({','.join('?' * len(chunk))})",
+                self.conn, params=chunk))
+        themes = {a: {} for a in accessions}
+        if not frames or all(f.empty for f in frames):
+            return themes
+
+        postings = pd.concat(frames, ignore_index=True)
+        n_docs = self.document_count()
+        tf = postings["tf"].to_numpy(dtype=np.float64)
+        df = postings["df"].to_numpy(dtype=np.float64)
+        postings["score"] = (1.0 + np.log(tf)) * (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0)
+
+        top = (postings.sort_values(["accession", "label", "score", "term"], ascending=[True, True, False, True])
+               .groupby(["accession", "label"], sort=False).head(n))
+        for (accession, label), terms in top.groupby(["accession", "label"], sort=False):
+            themes[accession][label] = [[term, round(float(score), 4)]
+                                        for term, score in zip(terms["term"], terms["score"])]
+        return themes
+
+
+def open_theme_index(output_dir):
+    return ThemeIndex(Path(output_dir) / THEMES_NAME)
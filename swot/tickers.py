@@ -0,0 +1,81 @@
+"""Locally cached CIK <-> ticker table from SEC's company_tickers.json.
+
+``load_ticker_table`` downloads the table at most once per ``max_age_days``
+into ``<cache_dir>/company_tickers.json`` (written atomically, so workers on
+several nodes can share the cache directory) and falls back to the cached
+copy, however old, when SEC cannot be reached. CIKs are normalized to their
+integer form without leading zeros (``"0000320193"`` -> ``"320193"``).
+"""
+import json
+import time
+import urllib.request
+from pathlib import Path
+
+from swot.manifest import write_json_atomic
+
+TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+CACHE_NAME = "company_tickers.json"
+
+
+def normalize_cik(cik):
+    text = str(cik).strip()
+    return str(int(text)) if text.isdigit() else text
+
+
+class TickerTable:
+    """Lookups in both directions; a CIK with several share classes maps to its first-listed ticker."""
+
+    def __init__(self, rows):
+        self.by_ticker = {}
+        self.by_cik = {}
+        self.titles = {}
+        for row in rows:
+            ticker, cik = str(row["ticker"]).upper(), normalize_cik(row["cik_str"])
+            self.by_ticker.setdefault(ticker, cik)
+            self.by_cik.setdefault(cik, ticker)
+            self.titles.setdefault(cik, row.get("title"))
+
+    def __len__(self):
+        return len(self.by_ticker)
+
+    def cik(self, ticker):
+        return self.by_ticker.get(str(ticker).upper())
+
+    def ticker(self, cik):
+        return self.by_cik.get(normalize_cik(cik))
+
+    def tickers(self):
+        return sorted(self.by_ticker)
+
+    def resolve(self, tickers):
+        """``{cik: ticker}`` for ``tickers``, warning about any that are unknown."""
+        missing = [t for t in tickers if self.cik(t) is None]
+        if missing:
+            print("Warning: no CIK found for", ", ".join(missing))
+        return {self.cik(t): t.upper() for t in tickers if self.cik(t) is not None}
+
+
+def _fetch(url, user_agent, timeout=30):
+    request = urllib.request.Request(url, headers={"User-Agent": user_agent})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def load_ticker_table(cache_dir, user_agent=None, max_age_days=7, url=TICKERS_URL):
+    """The CIK/ticker table, refreshed from ``url`` when the cached copy is older than ``max_age_days``."""
+    path = Path(cache_dir) / CACHE_NAME
+    fresh = path.exists() and time.time() - path.stat().st_mtime < max_age_days * 86400
+    if not fresh and user_agent:
+        try:
+            data = _fetch(url, user_agent)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(path, data)
+        except Exception as e:
+            print(f"Warning: could not refresh the ticker table from {url}: {e}")
+    if not path.exists():
+        if not user_agent:
+            raise RuntimeError(f"no cached ticker table at {path}; pass user_agent to download it from SEC")
+        raise RuntimeError(f"ticker table unavailable: {url} could not be downloaded and {path} does not exist")
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    return TickerTable(data.values() if isinstance(data, dict) else data)
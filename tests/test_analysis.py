@@ -0,0 +1,42 @@
+import json
+
+from swot.analysis import analyze_uploads
+
+SUBMISSION = """<SEC-DOCUMENT>0000789019-24-000010.txt : 20240730
+<SEC-HEADER>
+ACCESSION NUMBER:\t\t0000789019-24-000010
+CONFORMED SUBMISSION TYPE:\t10-K
+FILED AS OF DATE:\t\t20240730
+COMPANY CONFORMED NAME:\tMICROSOFT CORP
+CENTRAL INDEX KEY:\t\t\t0000789019
+</SEC-HEADER>
+<DOCUMENT>
+<TYPE>10-K
+<SEQUENCE>1
+<FILENAME>msft-10k.htm
+<TEXT>
+<html><body>
+<p><b>Item 7. Management's Discussion and Analysis</b></p>
+<p>Revenue growth was strong across our cloud services this fiscal year.</p>
+<p>Competition in the cloud market remains intense and could reduce our margins.</p>
+</body></html>
+</TEXT>
+</DOCUMENT>
+</SEC-DOCUMENT>
+"""
+
+
+def test_upload_ticker_comes_from_the_cik_table(tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    (cache / "company_tickers.json").write_text(json.dumps({
+        "0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+        "1": {"cik_str": 789019, "ticker": "MSFT", "title": "MICROSOFT CORP"},
+    }))
+    upload = tmp_path / "msft-10k.txt"
+    upload.write_text(SUBMISSION)
+
+    entries, failures = analyze_uploads([upload], output_dir=tmp_path / "out", workers=1, cache_dir=cache,
+                                        dataset_dir=None)
+    assert failures == []
+    assert [e["ticker"] for e in entries] == ["MSFT"]
@@ -0,0 +1,54 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from swot.backfill import WorkQueue, merge_results, run_local
+from swot.catalog import open_catalog
+
+UNITS = [{"id": f"{t}_10-K_any_any", "ticker": t, "cik": str(i), "form": "10-K", "start": None, "end": None}
+         for i, t in enumerate(["AAA", "BBB", "CCC"], 1)]
+
+
+def fake_process(unit, config, work_dir, cache_dir, filing_workers):
+    """One filing per unit, written the way run_incremental records it: paths under ``work_dir``."""
+    accession = f"000000000{unit['cik']}-24-000001"
+    csv = Path(work_dir) / f"{unit['ticker']}_{accession}.csv"
+    csv.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame([{"sentence": f"{unit['ticker']} grew revenue strongly this year.", "label": "Strength",
+                   "score": 1.0, "section": "7"}]).to_csv(csv, index=False)
+    return {"entries": [{"accession": accession, "ticker": unit["ticker"], "filing_date": "2024-02-01",
+                         "csv": str(csv)}]}
+
+
+def plan_queue(root):
+    queue = WorkQueue(root)
+    queue.set_config({"keywords": {}, "user_agent": "test test@example.com", "portfolio_dir": "portfolio"})
+    queue.add(UNITS)
+    return queue
+
+
+def test_merge_from_another_cwd(tmp_path, monkeypatch):
+    node, elsewhere = tmp_path / "node", tmp_path / "elsewhere"
+    node.mkdir()
+    elsewhere.mkdir()
+    monkeypatch.chdir(node)
+    plan_queue("queue")
+    run_local("queue", "work", workers=2, lease_seconds=4, process=fake_process)
+
+    monkeypatch.chdir(elsewhere)
+    assert merge_results(node / "queue", "out") == 3
+    assert sorted(os.listdir(node / "queue" / "merged")) == sorted(u["id"] for u in UNITS)
+    with open_catalog(elsewhere / "out") as catalog:
+        assert catalog.count() == 3
+
+
+def test_unit_with_missing_output_stays_unmerged(tmp_path):
+    queue = plan_queue(tmp_path / "queue")
+    run_local(queue.root, tmp_path / "work", workers=1, lease_seconds=4, process=fake_process)
+    with open(queue.root / "done" / f"{UNITS[0]['id']}.json", "r", encoding="utf-8") as fh:
+        os.remove(json.load(fh)["entries"][0]["csv"])
+
+    assert merge_results(queue.root, tmp_path / "out") == 2
+    assert sorted(os.listdir(queue.root / "merged")) == sorted(u["id"] for u in UNITS[1:])
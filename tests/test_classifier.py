@@ -0,0 +1,100 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+from swot.classifier import ONNX_NAME, ZeroShotClassifier, available, length_buckets
+
+LABELS = ["Strength", "Weakness", "Opportunity", "Threat"]
+
+
+def test_length_buckets_cap_padded_tokens_and_keep_length_order():
+    # each item: 2 rows of length + 6 tokens, at most 100 padded tokens per batch
+    batches = length_buckets([10, 3, 50, 4, 3], pairs_per_item=2, extra_tokens=6, batch_tokens=100, max_batch=8)
+    # 3, 3, 4 pad to 10 (60 tokens); adding 10 would pad to 16 x 8 rows; 50 is too long for any batch
+    assert batches == [[1, 4, 3], [0], [2]]
+
+
+def test_length_buckets_cap_rows():
+    batches = length_buckets([1] * 10, pairs_per_item=3, extra_tokens=0, batch_tokens=10**6, max_batch=7)
+    assert batches == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+
+
+def test_length_buckets_cover_every_item_once():
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(1, 300, size=500).tolist()
+    batches = length_buckets(lengths, pairs_per_item=4, extra_tokens=12, batch_tokens=8192, max_batch=64)
+    assert sorted(i for batch in batches for i in batch) == list(range(500))
+    for batch in batches:
+        padded = max(lengths[i] for i in batch) + 12
+        assert len(batch) == 1 or (len(batch) * 4 * padded <= 8192 and len(batch) * 4 <= 64)
+    flat = [lengths[i] for batch in batches for i in batch]
+    assert flat == sorted(flat)
+    assert length_buckets([], 4, 12, 8192, 64) == []
+
+
+WORDS = "company strength weakness opportunity threat this text describes a revenue grew competition is intense"
+
+
+def tiny_onnx_model(path, vocab_size, hidden=8, labels=3):
+    """Sum of masked token embeddings -> linear layer, enough to exercise the ONNX session."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    weights = [numpy_helper.from_array(rng.normal(size=(vocab_size, hidden)).astype(np.float32), "embeddings"),
+               numpy_helper.from_array(rng.normal(size=(hidden, labels)).astype(np.float32), "classifier"),
+               numpy_helper.from_array(np.array([1], dtype=np.int64), "axis1"),
+               numpy_helper.from_array(np.array([2], dtype=np.int64), "axis2")]
+    nodes = [
+        helper.make_node("Gather", ["embeddings", "input_ids"], ["tokens"]),
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["mask", "axis2"], ["mask3"]),
+        helper.make_node("Mul", ["tokens", "mask3"], ["masked"]),
+        helper.make_node("ReduceSum", ["masked", "axis1"], ["pooled"], keepdims=0),
+        helper.make_node("MatMul", ["pooled", "classifier"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny-nli",
+        [helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "tokens"])
+         for name in ("input_ids", "attention_mask")],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", labels])], weights)
+    # an IR version every onnxruntime release still loads
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(model, str(path))
+
+
+@pytest.fixture(params=["torch", "onnx"])
+def tiny_checkpoint(request, tmp_path):
+    """A randomly initialised NLI checkpoint saved locally, so nothing is downloaded."""
+    backend = request.param
+    if not available(backend) or (backend == "onnx" and importlib.util.find_spec("onnx") is None):
+        pytest.skip(f"transformers or the {backend} backend is not installed")
+    import transformers
+
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "."] + WORDS.split()))
+    transformers.BertTokenizerFast(vocab_file=str(vocab)).save_pretrained(tmp_path)
+    config = transformers.BertConfig(vocab_size=len(WORDS.split()) + 6, hidden_size=16, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=32, num_labels=3,
+                                     id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+                                     label2id={"contradiction": 0, "neutral": 1, "entailment": 2})
+    if backend == "torch":
+        transformers.BertForSequenceClassification(config).save_pretrained(tmp_path)
+    else:
+        config.save_pretrained(tmp_path)
+        tiny_onnx_model(tmp_path / ONNX_NAME, config.vocab_size)
+    return tmp_path, backend
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_zero_shot_probabilities_sum_to_one(tiny_checkpoint, quantize):
+    path, backend = tiny_checkpoint
+    sentences = ["Revenue grew.", "Competition is intense.", "This company grew revenue. " * 20, "A threat."]
+    with ZeroShotClassifier(path, LABELS, backend=backend, quantize=quantize, batch_tokens=256, workers=2) as clf:
+        probs = clf.classify(sentences)
+        assert probs.shape == (len(sentences), len(LABELS))
+        np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
+        assert len(clf.batches(sentences)) > 1
+        assert clf.throughput()["sentences"] == len(sentences)
+        assert clf.classify([]).shape == (0, len(LABELS))
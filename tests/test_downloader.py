@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+from swot.downloader import DownloadError, EdgarDownloader, TokenBucket  # noqa: E402
+
+BODY = b"".join(b"line %06d of a canned SGML submission\n" % i for i in range(20_000))
+
+
+def stand_in():
+    """A stand-in for EDGAR whose first answer to each path is a failure."""
+    seen = {"429": 0, "archive": 0}
+    ranges = []
+
+    async def throttled(request):
+        seen["429"] += 1
+        if seen["429"] == 1:
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "0.3"})
+        return web.Response(body=b'{"ok": true}')
+
+    async def archive(request):
+        seen["archive"] += 1
+        start = request.http_range.start or 0
+        ranges.append(start)
+        resp = web.StreamResponse(status=206 if start else 200,
+                                  headers={"Content-Length": str(len(BODY) - start)})
+        if start:
+            resp.headers["Content-Range"] = f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+        await resp.prepare(request)
+        if seen["archive"] == 1:
+            # half the body, then the connection drops
+            await resp.write(BODY[:len(BODY) // 2])
+            request.transport.close()
+            return resp
+        await resp.write(BODY[start:])
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/throttled", throttled)
+    app.router.add_get("/archive.txt", archive)
+    return app, ranges
+
+
+async def get(tmp_path, path, dest=None, **options):
+    app, ranges = stand_in()
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    downloader = EdgarDownloader(tmp_path, "test test@example.com", www_base=base, data_base=base, **options)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return downloader, ranges, await downloader._get(session, TokenBucket(100), base + path, dest)
+    finally:
+        await runner.cleanup()
+
+
+def test_429_waits_for_retry_after(tmp_path):
+    t0 = time.perf_counter()
+    downloader, _, body = asyncio.run(get(tmp_path, "/throttled", backoff=30))
+    assert body == b'{"ok": true}'
+    assert downloader.stats["retries"] == 1
+    # Retry-After (0.3 s), not the 30 s backoff
+    assert 0.3 <= time.perf_counter() - t0 < 10
+
+
+def test_dropped_body_resumes_with_range(tmp_path):
+    part = tmp_path / ".archive.sgml.part"
+    downloader, ranges, dest = asyncio.run(get(tmp_path, "/archive.txt", dest=part, backoff=0.01))
+    assert dest == part
+    assert part.read_bytes() == BODY
+    assert ranges[0] == 0 and 0 < ranges[1] <= len(BODY) // 2
+    assert downloader.stats["resumed"] == 1
+
+
+def test_404_raises_download_error(tmp_path):
+    with pytest.raises(DownloadError, match="HTTP 404"):
+        asyncio.run(get(tmp_path, "/missing", backoff=0.01))
@@ -0,0 +1,54 @@
+from swot.ingest import UploadedFiling, iter_html
+
+PLAIN_SUBMISSION = """<SEC-DOCUMENT>0000012345-99-000001.txt : 19990330
+<SEC-HEADER>
+ACCESSION NUMBER:\t\t0000012345-99-000001
+CONFORMED SUBMISSION TYPE:\t10-K
+FILED AS OF DATE:\t\t19990330
+CENTRAL INDEX KEY:\t\t\t0000012345
+</SEC-HEADER>
+<DOCUMENT>
+<TYPE>10-K
+<SEQUENCE>1
+<TEXT>
+                       ANNUAL REPORT ON FORM 10-K
+
+Item 1.  Business
+
+     The Company makes widgets.  Demand for widgets grew strongly.
+
+Item 1A. Risk Factors
+
+     Competition could reduce our margins.
+<PAGE>
+Item 7.  Management's Discussion and Analysis
+
+     Revenue increased ten percent.
+</TEXT>
+</DOCUMENT>
+</SEC-DOCUMENT>
+"""
+
+
+def sections(path):
+    meta = next(UploadedFiling(path).iter_fragments())
+    return [span["section"] for span in meta["sections"]]
+
+
+def test_plain_text_submission_keeps_its_lines(tmp_path):
+    path = tmp_path / "0000012345-99-000001.txt"
+    path.write_text(PLAIN_SUBMISSION)
+    text = "".join(iter_html(path))
+    assert "\nItem 1A. Risk Factors\n" in text
+    assert "Competition could reduce our margins." in text
+    assert sections(path) == ["cover", "1", "1A", "7"]
+
+
+def test_pre_keeps_its_lines_and_html_does_not(tmp_path):
+    path = tmp_path / "10k.htm"
+    path.write_text("<html><body><p>Sales rose\nagain.</p><pre>Item 1A. Risk Factors\n\n"
+                    "Competition is intense.</pre></body></html>")
+    text = "".join(iter_html(path))
+    assert "Sales rose again." in text
+    assert "\nItem 1A. Risk Factors\n\nCompetition is intense." in text
+    assert sections(path) == ["cover", "1A"]
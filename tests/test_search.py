@@ -0,0 +1,53 @@
+import random
+import sqlite3
+
+import pytest
+
+from swot.search import EvidenceIndex, to_fts_query
+
+
+def add(index, accession, ticker, label="Strength"):
+    index.add_filing({"accession": accession, "ticker": ticker, "filing_date": "2024-02-01"},
+                     [{"sentence": f"{ticker} reported strong revenue growth.", "label": label, "score": 0.9}])
+
+
+def test_ticker_filter_is_exact(tmp_path):
+    with EvidenceIndex(tmp_path / "evidence.sqlite3") as index:
+        add(index, "1", "UPS")
+        add(index, "2", "UP")
+        add(index, "3", "BRK.B")
+        assert {r["ticker"] for r in index.search("growth", tickers=["UP"])} == {"UP"}
+        assert index.search("growth", tickers=["BRK"]) == []
+        assert {r["ticker"] for r in index.search("growth", tickers=["BRK.B", "UPS"])} == {"BRK.B", "UPS"}
+
+
+def test_label_filter_is_exact(tmp_path):
+    with EvidenceIndex(tmp_path / "evidence.sqlite3") as index:
+        add(index, "1", "AAPL", label="Strength")
+        add(index, "2", "MSFT", label="Weakness")
+        assert [r["ticker"] for r in index.search("growth", labels="Strength")] == ["AAPL"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("tariffs (china OR mexico)", '"tariffs" AND ( "china" OR "mexico" )'),
+    ("(china OR mexico) tariffs", '( "china" OR "mexico" ) AND "tariffs"'),
+    ("(china) (mexico)", '( "china" ) AND ( "mexico" )'),
+    ('supply "chain risk" costs*', '"supply" AND "chain risk" AND "costs"*'),
+    ("tariffs OR (china", '"tariffs" OR ( "china" )'),
+])
+def test_groups_are_joined_with_and(query, expected):
+    assert to_fts_query(query) == expected
+
+
+def test_translated_queries_are_valid_fts5():
+    rng = random.Random(0)
+    vocabulary = ["tariffs", "china", "the", "and", "AND", "OR", "NOT", "(", ")", '"', '"supply chain"', "cost*",
+                  "ab*", "*", "-", "a.b", "NEAR", ":", "^", "+"]
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE VIRTUAL TABLE t USING fts5(sentence)")
+    conn.execute("INSERT INTO t VALUES ('tariffs on china raised supply chain costs')")
+    for _ in range(2000):
+        query = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 8)))
+        expr = to_fts_query(query)
+        if expr is not None:
+            conn.execute("SELECT rowid FROM t WHERE t MATCH ?", (f"sentence : ({expr})",)).fetchall()
@@ -0,0 +1,38 @@
+from swot.sections import SectionSplitter, index_sections
+
+WRAPPED = (
+    "ITEM 1A. RISK FACTORS\n"
+    "\n"
+    "Our results depend on demand. Known trends are described under\n"
+    "Item 7. Management's Discussion and Analysis of Financial Condition, and\n"
+    "the financial statements appear under\n"
+    "Item 8 of this report. Further risks are listed in\n"
+    "Item 15. Exhibits and Financial Statement Schedules.\n"
+    "\n"
+    "Item 7. MD&A\n"
+    "\n"
+    "Revenue grew.\n"
+)
+
+
+def sections(spans):
+    return [s["section"] for s in spans]
+
+
+def test_wrapped_cross_references_are_not_headings():
+    spans = index_sections({"10k": WRAPPED})
+    assert sections(spans) == ["1A", "7"]
+    assert spans[1]["start"] == WRAPPED.index("Item 7. MD&A")
+
+
+def test_headings_after_a_finished_sentence_need_the_item_title():
+    text = "Sales rose.\nItem 7. Management's Discussion and Analysis\nCosts fell.\nItem 8. See the notes.\n"
+    assert sections(index_sections({"10k": text})) == ["cover", "7"]
+
+
+def test_splitter_matches_index_sections_across_chunks():
+    splitter = SectionSplitter()
+    lines = WRAPPED.splitlines(keepends=True)
+    pieces = [piece for line in lines for piece in splitter.split(line)]
+    assert "".join(text for _, text in pieces) == WRAPPED
+    assert splitter.finish() == index_sections({"10k": WRAPPED})